@@ -27,14 +27,17 @@ from src.config_manager import ConfigManager
 from src.content_generator import EnhancedContentGenerator
 from src.image_handler import ImageHandler
 from src.wordpress_poster import WordPressPoster
+from src.rate_limiter import EnhancedRateLimiter
 from src.seo_enhancer import SEOEnhancer
 from src.content_validator import ContentValidator
 from src.uniqueness_validator import UniquenessValidator
-from src.advanced_quality_validator import AdvancedQualityValidator
+from src.nlp_service import NLPValidationService
 from src.performance_monitor import PerformanceMonitor
+from src.content_management.publish_scheduler import PublishSlotScheduler
 
 MAX_RETRIES = 3
 SLEEP_INTERVAL = 840  # 14 minutes in seconds
+DEFAULT_WORKERS = 3
 
 class WordPressAutomationSystem:
     def __init__(self):
@@ -43,11 +46,19 @@ class WordPressAutomationSystem:
             self.content_generator = EnhancedContentGenerator(self.config)
             self.image_handler = ImageHandler(self.config)
             self.wordpress_poster = WordPressPoster(self.config)
+            # One limiter shared by every OpenAI and Unsplash caller, adapting to their headers
+            self.rate_limiter = EnhancedRateLimiter(self.config)
+            self.content_generator.engine.rate_limiter = self.rate_limiter
+            self.image_handler.rate_limiter = self.rate_limiter
             self.seo_enhancer = SEOEnhancer()
             self.content_validator = ContentValidator()
             self.uniqueness_validator = UniquenessValidator()
-            self.quality_validator = AdvancedQualityValidator()
+            self.quality_validator = NLPValidationService(
+                workers=self.config.config.getint('general', 'nlp_workers', fallback=0) or None
+            )
             self.performance_monitor = PerformanceMonitor()
+            self.post_interval = self._get_post_interval()
+            self.publish_scheduler = PublishSlotScheduler(self.post_interval)
             self.setup_logging()
         except Exception as e:
             logging.error(f"Initialization failed: {str(e)}")
@@ -63,6 +74,12 @@ class WordPressAutomationSystem:
         )
 
     async def process_content(self, topic_data: dict):
+        prepared = await self.prepare_content(topic_data)
+        if not prepared:
+            return None
+        return await self.publish_content(prepared)
+
+    async def prepare_content(self, topic_data: dict):
         retries = 0
         while retries < MAX_RETRIES:
             try:
@@ -90,25 +107,12 @@ class WordPressAutomationSystem:
                         topic_data['primary_keywords']
                     )
                     
-                    post_id = await self.wordpress_poster.create_post(
-                        title=topic_data['topic'],
-                        content=seo_result['optimized_content'],
-                        images=images,
-                        metadata={
-                            'seo_metrics': seo_result['seo_metrics'],
-                            'quality_metrics': quality_check
-                        }
-                    )
-                    
                     return {
-                        'post_id': post_id,
-                        'metrics': {
-                            'seo': seo_result['seo_metrics'],
-                            'quality': quality_check,
-                            'uniqueness': await self.uniqueness_validator.check_uniqueness(
-                                seo_result['optimized_content']
-                            )
-                        }
+                        'topic_data': topic_data,
+                        'content': seo_result['optimized_content'],
+                        'images': images,
+                        'seo_metrics': seo_result['seo_metrics'],
+                        'quality_metrics': quality_check
                     }
                     
             except asyncio.TimeoutError:
@@ -122,6 +126,96 @@ class WordPressAutomationSystem:
                     return None
                 await asyncio.sleep(2 ** retries)  # Exponential backoff
 
+    async def publish_content(self, prepared: dict):
+        topic_data = prepared['topic_data']
+        try:
+            images = prepared['images']
+            post_id = await self.wordpress_poster.create_post({
+                'title': topic_data['topic'],
+                'content': prepared['content'],
+                'featured_image': images[0] if images else None,
+                'content_images': images[1:],
+                'categories': self._split_terms(topic_data.get('category')),
+                'tags': self._split_terms(topic_data.get('tags')),
+                'status': 'publish'
+            })
+            
+            return {
+                'post_id': post_id,
+                'metrics': {
+                    'seo': prepared['seo_metrics'],
+                    'quality': prepared['quality_metrics'],
+                    'uniqueness': await self.uniqueness_validator.check_uniqueness(
+                        prepared['content']
+                    )
+                }
+            }
+        except Exception as e:
+            logging.error(f"Publishing failed for {topic_data['topic']}: {str(e)}")
+            return None
+
+    async def process_batch_pipelined(self, topics: List[Dict], workers: int = DEFAULT_WORKERS) -> List[Dict]:
+        """Prepare topics on a bounded worker pool and publish them one slot at a time."""
+        topic_queue = asyncio.Queue()
+        for topic in topics:
+            topic_queue.put_nowait(topic)
+        # Bounded so workers only run a limited number of posts ahead of the publisher
+        ready_queue = asyncio.Queue(maxsize=workers)
+        results = []
+        # Every term the batch needs is created in one go while the first posts are prepared
+        terms_ready = asyncio.create_task(self.wordpress_poster.prepare_terms({
+            'category': [name for topic in topics for name in self._split_terms(topic.get('category'))],
+            'post_tag': [name for topic in topics for name in self._split_terms(topic.get('tags'))]
+        }))
+
+        async def worker():
+            while True:
+                try:
+                    topic = topic_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                prepared = await self.prepare_content(topic)
+                if prepared:
+                    await ready_queue.put(prepared)
+                else:
+                    logging.warning(f"Skipping topic after preparation: {topic['topic']}")
+
+        async def publisher():
+            await terms_ready
+            while True:
+                prepared = await ready_queue.get()
+                if prepared is None:
+                    return
+                await self.publish_scheduler.wait_for_slot()
+                result = await self.publish_content(prepared)
+                if result:
+                    logging.info(f"Successfully processed: {prepared['topic_data']['topic']}")
+                    results.append(result)
+
+        async def finish_preparing():
+            await asyncio.gather(*worker_tasks)
+            await ready_queue.put(None)
+
+        worker_tasks = [asyncio.create_task(worker()) for _ in range(max(1, workers))]
+        publisher_task = asyncio.create_task(publisher())
+        preparing_task = asyncio.create_task(finish_preparing())
+        try:
+            # A failure on either side ends the batch, rather than leaving workers blocked on a full queue
+            await asyncio.gather(preparing_task, publisher_task)
+        finally:
+            for task in (*worker_tasks, preparing_task, publisher_task, terms_ready):
+                if not task.done():
+                    task.cancel()
+        return results
+
+    def _get_post_interval(self) -> int:
+        return self.config.config.getint('general', 'post_interval', fallback=SLEEP_INTERVAL // 60) * 60
+
+    def _split_terms(self, value) -> List[str]:
+        if not isinstance(value, str):
+            return []
+        return [term.strip() for term in value.split(',') if term.strip()]
+
     def _meets_quality_standards(self, quality_check: dict) -> bool:
         return (
             quality_check['readability_metrics']['flesch_reading_ease'] > 60 and
@@ -146,8 +240,13 @@ async def main():
     parser = argparse.ArgumentParser(description='WordPress Automation Tool')
     parser.add_argument('--input', required=True, help='Path to input CSV/Excel file')
     parser.add_argument('--config', default='config/config.ini', help='Path to config file')
+    parser.add_argument('--pipelined', action='store_true',
+                        help='Prepare topics ahead of time and apply the post interval to publishing only')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of topics prepared concurrently in pipelined mode')
     args = parser.parse_args()
 
+    system = None
     try:
         system = WordPressAutomationSystem()
         
@@ -157,6 +256,17 @@ async def main():
                 logging.info("No more topics to process")
                 break
                 
+            if args.pipelined:
+                workers = args.workers or system.config.config.getint(
+                    'general', 'pipeline_workers', fallback=DEFAULT_WORKERS
+                )
+                try:
+                    await system.process_batch_pipelined(topics, workers=workers)
+                except asyncio.CancelledError:
+                    logging.info("Processing interrupted, shutting down gracefully...")
+                    return
+                continue
+                
             for topic in topics:
                 try:
                     result = await system.process_content(topic)
@@ -178,6 +288,11 @@ async def main():
         sys.exit("Exiting due to fatal error")
     finally:
         logging.info("Cleaning up resources...")
+        if system:
+            system.quality_validator.shutdown(wait=False)
+            await system.image_handler.close()
+            await system.wordpress_poster.close()
+            await system.content_generator.engine.close()
 
 if __name__ == "__main__":
     try:
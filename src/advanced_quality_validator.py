@@ -12,14 +12,55 @@ import spacy
 import textstat
 from collections import defaultdict
 
+TRANSITION_WORDS = {
+    'additionally',
+    'also',
+    'besides',
+    'consequently',
+    'finally',
+    'first',
+    'furthermore',
+    'hence',
+    'however',
+    'instead',
+    'meanwhile',
+    'moreover',
+    'nevertheless',
+    'next',
+    'otherwise',
+    'second',
+    'similarly',
+    'still',
+    'then',
+    'therefore',
+    'thus'
+}
+
 class AdvancedQualityValidator:
-    def __init__(self):
-        self.nlp = spacy.load('en_core_web_sm')
+    def __init__(self, model_name: str = 'en_core_web_sm'):
+        self.nlp = spacy.load(model_name)
+        if not any(
+            self.nlp.has_pipe(name)
+            for name in ('parser', 'senter', 'sentencizer')
+        ):
+            # Pipelines without a parser, e.g.
+            # blank:en, still need sentence boundaries
+            self.nlp.add_pipe('sentencizer')
         self.min_paragraph_words = 50
         self.max_paragraph_words = 300
+        self.batch_size = 4
         
     def validate_content_quality(self, content: str) -> Dict:
-        doc = self.nlp(content)
+        return self._build_report(content, self.nlp(content))
+
+    def validate_batch(self, contents: List[str]) -> List[Dict]:
+        docs = self.nlp.pipe(contents, batch_size=self.batch_size)
+        return [
+            self._build_report(content, doc)
+            for content, doc in zip(contents, docs)
+        ]
+
+    def _build_report(self, content: str, doc) -> Dict:
         return {
             'readability_metrics': self._analyze_readability(content),
             'content_structure': self._analyze_structure(doc),
@@ -44,4 +85,38 @@ class AdvancedQualityValidator:
                 'too_long': sum(1 for p in paragraphs if len(p.split()) > self.max_paragraph_words)
             },
             'transition_words': self._count_transition_words(doc)
-        }
\ No newline at end of file
+        }
+
+    def _count_transition_words(self, doc) -> int:
+        return sum(1 for token in doc if token.lower_ in TRANSITION_WORDS)
+
+    def _analyze_language(self, doc) -> Dict:
+        words = [token.lower_ for token in doc if token.is_alpha]
+        sentences = list(doc.sents)
+        return {
+            'sentence_count': len(sentences),
+            'avg_sentence_tokens': (
+                len(doc) / len(sentences) if sentences else 0
+            ),
+            'lexical_diversity': len(set(words)) / len(words) if words else 0,
+            'long_sentences': sum(
+                1 for sentence in sentences if len(sentence) > 35
+            )
+        }
+
+    def _check_seo_compliance(self, doc) -> Dict:
+        counts = defaultdict(int)
+        for token in doc:
+            if token.is_alpha and not token.is_stop:
+                counts[token.lower_] += 1
+        word_count = sum(1 for token in doc if token.is_alpha)
+        top_terms = sorted(
+            counts.items(), key=lambda item: (-item[1], item[0])
+        )[:5]
+        return {
+            'word_count': word_count,
+            'keyword_density': {
+                term: count / word_count for term, count in top_terms
+            },
+            'meets_min_length': word_count >= 300
+        }
@@ -17,6 +17,7 @@ from pathlib import Path
 from src.content_generator import EnhancedContentGenerator
 from src.image_handler import ImageHandler
 from src.wordpress_poster import WordPressPoster
+from src.rate_limiter import EnhancedRateLimiter
 from src.content_quality import ContentQualityAnalyzer
 
 class AutomationManager:
@@ -25,6 +26,9 @@ class AutomationManager:
         self.content_generator = EnhancedContentGenerator(config_manager)
         self.image_handler = ImageHandler(config_manager)
         self.wordpress_poster = WordPressPoster(config_manager)
+        self.rate_limiter = EnhancedRateLimiter(self.config)
+        self.content_generator.engine.rate_limiter = self.rate_limiter
+        self.image_handler.rate_limiter = self.rate_limiter
         self.quality_analyzer = ContentQualityAnalyzer()
         self.post_interval = 14 * 60  # 14 minutes in seconds
         self.setup_logging()
@@ -50,6 +54,13 @@ class AutomationManager:
             logging.error(f"Failed to read input file: {str(e)}")
             raise
             
+    async def close(self) -> None:
+        # Executor threads and pooled connections
+        # would otherwise outlive the manager
+        await self.image_handler.close()
+        await self.wordpress_poster.close()
+        await self.content_generator.engine.close()
+
     async def process_batch(self, input_file: str) -> None:
         try:
             topics = self._read_input_file(input_file)
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Dec 13 11:02:37 2024
+
+@author: thesaint
+"""
+
+# src/cache_engine.py
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = Path('data/content_cache/cache.db')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Other processes' writes to the same file
+# only show up in the byte total on a recount
+RECOUNT_SECONDS = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires_at)
+    WHERE expires_at IS NOT NULL;
+CREATE TABLE IF NOT EXISTS permanent_namespaces (namespace TEXT PRIMARY KEY);
+"""
+
+
+class MemoryTier:
+    """In-process LRU of hot entries, each with its expiry from the store."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Any) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def set(
+        self, key: Any, value: Any, expires_at: Optional[float] = None
+    ) -> None:
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key: Any) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (_, expires_at) in self._entries.items()
+                       if expires_at is not None and expires_at <= now]
+            for key in expired:
+                del self._entries[key]
+            self.expirations += len(expired)
+        return len(expired)
+
+    def stats(self) -> Dict:
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
+
+
+class CacheEngine:
+    """Namespaced SQLite key/value cache with TTLs and an LRU size budget.
+
+    Values are stored as JSON. Every write is a single transaction, so readers
+    never see a partially written entry. Namespaces marked permanent are never
+    evicted and do not count toward ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path] = DEFAULT_CACHE_PATH,
+        max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._permanent = {
+            row[0]
+            for row in self._conn.execute(
+                'SELECT namespace FROM permanent_namespaces'
+            )
+        }
+        # Bytes held by evictable entries, kept up to date so writes need not
+        # sum the table
+        self._bytes = self._count_bytes()
+        self._counted_at = time.time()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        entry = self.get_entry(namespace, key)
+        return default if entry is None else entry[0]
+
+    def get_entry(
+        self, namespace: str, key: str
+    ) -> Optional[Tuple[Any, Optional[float]]]:
+        """(value, expiry), or None when the key is missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires_at FROM entries '
+                'WHERE namespace = ? AND key = ?',
+                (namespace, key)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._delete(namespace, key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._conn.execute(
+                'UPDATE entries SET accessed_at = '
+                '? WHERE namespace = ? AND key = ?',
+                (now, namespace, key)
+            )
+            self.hits += 1
+        return json.loads(value), expires_at
+
+    def set(
+        self, namespace: str, key: str, value: Any, ttl: Optional[float] = None
+    ) -> None:
+        self.set_many([(namespace, key, value)], ttl)
+
+    def set_many(
+        self, items: List[Tuple[str, str, Any]], ttl: Optional[float] = None
+    ) -> None:
+        """Write several (namespace, key, value) entries in one transaction."""
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        rows = []
+        for namespace, key, value in items:
+            encoded = json.dumps(value, ensure_ascii=False)
+            rows.append(
+                (
+                    namespace,
+                    key,
+                    encoded,
+                    len(encoded.encode('utf-8')),
+                    now,
+                    expires_at,
+                    now
+                )
+            )
+        with self._lock:
+            counted = self._bytes
+            try:
+                self._conn.execute('BEGIN IMMEDIATE')
+                self._bytes += self._size_change(rows)
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO entries '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    rows
+                )
+                self._evict()
+                self._conn.execute('COMMIT')
+            except Exception as e:
+                self._bytes = counted
+                self._conn.execute('ROLLBACK')
+                logging.error(
+                    "Cache write failed for "
+                    f"{[row[:2] for row in rows]}: {str(e)}"
+                )
+                raise
+
+    def touch(self, namespace: str, keys: Iterable[str]) -> None:
+        """Record hits that a cache in front of the store served itself."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                'UPDATE entries SET accessed_at = '
+                '? WHERE namespace = ? AND key = ?',
+                [(now, namespace, key) for key in keys]
+            )
+
+    def delete(self, namespace: str, key: str) -> bool:
+        with self._lock:
+            return self._delete(namespace, key)
+
+    def mark_permanent(self, namespace: str) -> None:
+        """Keep ``namespace`` out of eviction; entries stay until deleted."""
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR IGNORE INTO permanent_namespaces VALUES (?)',
+                (namespace,)
+            )
+            self._permanent.add(namespace)
+            self._bytes = self._count_bytes()
+
+    def contains(self, namespace: str, key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT 1 FROM entries WHERE namespace = ? AND key '
+                '= ? AND (expires_at IS NULL OR expires_at > ?)',
+                (namespace, key, time.time())
+            ).fetchone()
+        return row is not None
+
+    def keys(self, namespace: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT key FROM entries WHERE namespace = ? '
+                'AND (expires_at IS NULL OR expires_at > ?)',
+                (namespace, time.time())
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def purge_expired(self, namespace: Optional[str] = None) -> int:
+        # The partial index on expires_at means only expired rows are visited
+        query = (
+            'DELETE FROM entries '
+            'WHERE expires_at IS NOT NULL AND expires_at <= ?'
+        )
+        params = [time.time()]
+        if namespace is not None:
+            query += ' AND namespace = ?'
+            params.append(namespace)
+        with self._lock:
+            removed = self._released(
+                self._conn.execute(
+                    query + ' RETURNING namespace, size', params
+                )
+            )
+            self.expirations += removed
+        return removed
+
+    def purge_older_than(
+        self, namespace: str, max_age_seconds: float
+    ) -> List[str]:
+        # One statement, so it is atomic without a transaction of its own
+        cutoff = time.time() - max_age_seconds
+        with self._lock:
+            rows = self._conn.execute(
+                'DELETE FROM entries WHERE namespace = ? AND '
+                'created_at < ? RETURNING key, namespace, size',
+                (namespace, cutoff)
+            ).fetchall()
+            self._released(row[1:] for row in rows)
+        return [row[0] for row in rows]
+
+    def clear(self, namespace: str) -> int:
+        with self._lock:
+            return self._released(
+                self._conn.execute(
+                    'DELETE FROM entries WHERE namespace '
+                    '= ? RETURNING namespace, size',
+                    (namespace,)
+                )
+            )
+
+    def stats(self) -> Dict:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT namespace, COUNT(*), COALESCE(SUM(size), '
+                '0) FROM entries GROUP BY namespace'
+            ).fetchall()
+        namespaces = {
+            name: {'entries': count, 'bytes': size}
+            for name, count, size in rows
+        }
+        return {
+            'namespaces': namespaces,
+            'total_bytes': sum(ns['bytes'] for ns in namespaces.values()),
+            'evictable_bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'permanent': sorted(self._permanent),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _count_bytes(self) -> int:
+        return self._conn.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM entries '
+            'WHERE namespace NOT IN (SELECT '
+            'namespace FROM permanent_namespaces)'
+        ).fetchone()[0]
+
+    def _size_change(self, rows: List[Tuple]) -> int:
+        change = 0
+        for namespace, key, _, size, *_ in rows:
+            if namespace in self._permanent:
+                continue
+            replaced = self._conn.execute(
+                'SELECT size FROM entries WHERE namespace = ? AND key = ?',
+                (namespace, key)
+            ).fetchone()
+            change += size - (replaced[0] if replaced else 0)
+        return change
+
+    def _released(self, rows: Iterable[Tuple[str, int]]) -> int:
+        """Subtract deleted (namespace, size) rows; returns their count."""
+        count = 0
+        for namespace, size in rows:
+            count += 1
+            if namespace not in self._permanent:
+                self._bytes -= size
+        return count
+
+    def _delete(self, namespace: str, key: str) -> bool:
+        return (
+            self._released(
+                self._conn.execute(
+                    'DELETE FROM entries WHERE namespace = '
+                    '? AND key = ? RETURNING namespace, size',
+                    (namespace, key)
+                )
+            )
+            > 0
+        )
+
+    def _evict(self) -> None:
+        now = time.time()
+        if now - self._counted_at > RECOUNT_SECONDS:
+            self._bytes, self._counted_at = self._count_bytes(), now
+        if self._bytes <= self.max_bytes:
+            return
+        # Expired entries go first, then the least recently used ones
+        self.expirations += self._released(
+            self._conn.execute(
+                'DELETE FROM entries WHERE expires_at IS NOT NULL '
+                'AND expires_at <= ? RETURNING namespace, size',
+                (now,)
+            )
+        )
+        self._bytes, self._counted_at = self._count_bytes(), now
+        total = self._bytes
+        evicted = []
+        cursor = self._conn.execute(
+            'SELECT namespace, key, size FROM entries '
+            'WHERE namespace NOT IN (SELECT namespace FROM '
+            'permanent_namespaces) ORDER BY accessed_at'
+        )
+        for namespace, key, size in cursor:
+            if total <= self.max_bytes:
+                break
+            evicted.append((namespace, key))
+            total -= size
+        cursor.close()
+        self._conn.executemany(
+            'DELETE FROM entries WHERE namespace = ? AND key = ?', evicted
+        )
+        self._bytes = total
+        self.evictions += len(evicted)
+        if evicted:
+            logging.info(
+                f"Cache evicted {len(evicted)} entries "
+                f"to stay under {self.max_bytes} bytes"
+            )
+
+
+@lru_cache(maxsize=None)
+def _engine_for(path: str) -> CacheEngine:
+    return CacheEngine(path)
+
+
+def get_cache_engine(
+    path: Union[str, Path] = DEFAULT_CACHE_PATH
+) -> CacheEngine:
+    """One shared engine per database file, so caches share a connection."""
+    return _engine_for(str(Path(path).resolve()))
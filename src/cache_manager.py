@@ -7,26 +7,28 @@ Created on Mon Nov 25 18:10:25 2024
 """
 
 # src/cache_manager.py
-import json
-from pathlib import Path
 from typing import Dict, Optional
 import hashlib
 from datetime import datetime
+from src.cache_engine import CacheEngine, get_cache_engine
 
 class CacheManager:
-    def __init__(self):
-        self.cache_dir = Path('data/content_cache')
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
+    namespace = 'generation'
+
+    def __init__(
+        self, engine: Optional[CacheEngine] = None, max_age_hours: int = 24
+    ):
+        self.engine = engine or get_cache_engine()
+        self.max_age_hours = max_age_hours
         
     def get_cached_content(self, topic: str, keywords: Dict) -> Optional[Dict]:
         cache_key = self._generate_cache_key(topic, keywords)
-        cache_file = self.cache_dir / f"{cache_key}.json"
-        
-        if cache_file.exists():
-            with open(cache_file, 'r') as f:
-                cached_data = json.load(f)
-                if not self._is_cache_expired(cached_data):
-                    return cached_data['content']
+        cached_data = self.engine.get(self.namespace, cache_key)
+
+        if cached_data is not None and not self._is_cache_expired(
+            cached_data, self.max_age_hours
+        ):
+            return cached_data['content']
         return None
         
     def cache_content(self, topic: str, keywords: Dict, content: Dict) -> None:
@@ -36,11 +38,14 @@ class CacheManager:
             'timestamp': datetime.now().isoformat(),
             'keywords': keywords
         }
-        
-        cache_file = self.cache_dir / f"{cache_key}.json"
-        with open(cache_file, 'w') as f:
-            json.dump(cache_data, f, indent=4)
-            
+
+        self.engine.set(
+            self.namespace,
+            cache_key,
+            cache_data,
+            ttl=self.max_age_hours * 3600
+        )
+
     def _generate_cache_key(self, topic: str, keywords: Dict) -> str:
         cache_data = f"{topic}_{sorted(keywords.items())}"
         return hashlib.md5(cache_data.encode()).hexdigest()[:12]
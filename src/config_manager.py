@@ -63,12 +63,30 @@ class ConfigManager:
             'api_key': '',
             'model': 'gpt-4',
             'temperature': '0.9',
-            'max_tokens': '4000'
+            'max_tokens': '4000',
+            'max_concurrent_requests': '4',
+            'max_connections': '10',
+            'timeout': '120'
+        }
+        self.config['generation'] = {
+            'mode': 'standard',
+            'stream_max_words': '4500',
+            'stream_heading_within_words': '600',
+            'stream_language': 'en',
+            'stream_checkpoint_interval': '200',
+            'checkpoint_dir': 'data/generation_checkpoints'
         }
         self.config['wordpress'] = {
             'url': '',
             'username': '',
-            'password': ''
+            'password': '',
+            'backend': 'xmlrpc',
+            'media_verify_hours': '24',
+            'timeout': '60',
+            'upload_concurrency': '4',
+            'multicall_max_calls': '20',
+            'term_cache_hours': '24',
+            'term_page_size': '100'
         }
         self.config['unsplash'] = {
             'access_key': ''
@@ -79,11 +97,29 @@ class ConfigManager:
         self.config['rate_limits'] = {
             'openai_requests_per_minute': '20',
             'unsplash_requests_per_hour': '50',
-            'wordpress_requests_per_minute': '30'
+            'wordpress_requests_per_minute': '30',
+            'adaptive': 'true',
+            'adaptive_increase': '0.05',
+            'adaptive_decrease': '0.5'
         }
         self.config['general'] = {
             'post_interval': '14',
-            'word_count': '3200'
+            'word_count': '3200',
+            'pipeline_workers': '3',
+            'nlp_workers': '2'
+        }
+        self.config['media'] = {
+            'image_max_width': '1200',
+            'image_max_height': '800',
+            'image_quality': '85',
+            'image_content_widths': '800,400',
+            'image_thumbnail_size': '150',
+            'image_webp': 'false',
+            'image_cache_max_mb': '256',
+            'image_dedupe_distance': '6',
+            'image_dedupe_days': '90',
+            'image_spare_candidates': '3',
+            'featured_image_required': 'true'
         }
         self.save_config()
         
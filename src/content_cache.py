@@ -9,15 +9,25 @@ Created on Mon Nov 25 19:25:39 2024
 # src/content_cache.py
 import json
 import hashlib
-from pathlib import Path
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 import logging
+import time
+from src.cache_engine import CacheEngine, MemoryTier, get_cache_engine
 
 class ContentCache:
-    def __init__(self):
-        self.cache_dir = Path('data/content_cache')
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
+    namespace = 'content'
+
+    def __init__(
+        self, engine: Optional[CacheEngine] = None, memory_entries: int = 256
+    ):
+        self.engine = engine or get_cache_engine()
+        self.memory = MemoryTier(memory_entries)
+        # Memory hits are passed on to the store in batches, so its LRU sees
+        # what is hot
+        self.touch_batch = 32
+        self._touched = set()
+        self._touched_at = time.time()
         self.cache_duration = timedelta(days=7)
         self.setup_logging()
         
@@ -31,16 +41,19 @@ class ContentCache:
     async def get_cached_content(self, topic: str, keywords: List[str], gpt_version: str) -> Optional[Dict]:
         try:
             cache_key = self._generate_cache_key(topic, keywords, gpt_version)
-            cache_file = self.cache_dir / f'{cache_key}.json'
+            found, cached_data = self.memory.get(cache_key)
+            if found:
+                self._touch(cache_key)
+            else:
+                # The engine drops entries older than cache_duration on read
+                entry = self.engine.get_entry(self.namespace, cache_key)
+                if entry is not None:
+                    cached_data, expires_at = entry
+                    self.memory.set(cache_key, cached_data, expires_at)
             
-            if cache_file.exists():
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    cached_data = json.load(f)
-                    cached_time = datetime.fromisoformat(cached_data['timestamp'])
-                    
-                    if datetime.now() - cached_time <= self.cache_duration:
-                        logging.info(f"Cache hit for topic: {topic}")
-                        return cached_data['content']
+            if cached_data is not None:
+                logging.info(f"Cache hit for topic: {topic}")
+                return cached_data['content']
                     
             logging.info(f"Cache miss for topic: {topic}")
             return None
@@ -59,9 +72,9 @@ class ContentCache:
                 'keywords': keywords
             }
             
-            cache_file = self.cache_dir / f'{cache_key}.json'
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, indent=4, ensure_ascii=False)
+            ttl = self.cache_duration.total_seconds()
+            self.engine.set(self.namespace, cache_key, cache_data, ttl=ttl)
+            self.memory.set(cache_key, cache_data, time.time() + ttl)
                 
             logging.info(f"Content cached successfully for topic: {topic}")
             
@@ -69,6 +82,20 @@ class ContentCache:
             logging.error(f"Failed to cache content: {str(e)}")
             raise
             
+    def _touch(self, cache_key: str) -> None:
+        self._touched.add(cache_key)
+        if (
+            len(self._touched) >= self.touch_batch
+            or time.time() - self._touched_at >= 60
+        ):
+            self.flush_touches()
+
+    def flush_touches(self) -> None:
+        if self._touched:
+            self.engine.touch(self.namespace, self._touched)
+            self._touched = set()
+        self._touched_at = time.time()
+
     def _generate_cache_key(self, topic: str, keywords: List[str], gpt_version: str) -> str:
         # Create a unique string combining all relevant data
         cache_string = f"{topic}_{'-'.join(sorted(keywords))}_{gpt_version}"
@@ -77,15 +104,20 @@ class ContentCache:
         
     def clear_expired_cache(self) -> None:
         try:
-            current_time = datetime.now()
-            for cache_file in self.cache_dir.glob('*.json'):
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    cached_data = json.load(f)
-                    cached_time = datetime.fromisoformat(cached_data['timestamp'])
-                    
-                    if current_time - cached_time > self.cache_duration:
-                        cache_file.unlink()
-                        logging.info(f"Removed expired cache file: {cache_file.name}")
+            self.memory.purge_expired()
+            self.flush_touches()
+            removed = self.engine.purge_expired(self.namespace)
+            logging.info(f"Removed {removed} expired cache entries")
                         
         except Exception as e:
-            logging.error(f"Error clearing expired cache: {str(e)}")
\ No newline at end of file
+            logging.error(f"Error clearing expired cache: {str(e)}")
+
+    def get_stats(self) -> Dict:
+        store = self.engine.stats()
+        return {
+            'memory': self.memory.stats(),
+            'store': {
+                name: store[name]
+                for name in ('hits', 'misses', 'evictions', 'expirations')
+            }
+        }
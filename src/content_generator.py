@@ -8,22 +8,60 @@ Created on Mon Nov 27 06:50:05 2024
 
 # src/content_generator.py
 
-from openai import OpenAI
-from typing import Dict, List
+from typing import Dict, List, Union
 import logging
 from datetime import datetime
 from pathlib import Path
 import asyncio
+import hashlib
+from contextlib import aclosing
+from src.generation_engine import GenerationEngine
+from src.stream_monitor import (
+    StreamAbortError,
+    StreamCheckpoint,
+    StreamMonitor,
+    StreamRules
+)
+from src.section_generator import SectionedArticleGenerator
+from src.text_analysis import AnalyzedDocument, analyze_text
+from src.single_flight import SingleFlight, normalize_key
+
+CONTINUE_PROMPT = (
+    "Continue the article exactly where it stops. "
+    "Do not repeat any earlier text."
+)
 
 class EnhancedContentGenerator:
     def __init__(self, config_manager):
         self.config = config_manager.get_credentials('openai')
-        self.client = OpenAI(api_key=self.config['api_key'])
+        self.engine = GenerationEngine(self.config)
+        self.client = self.engine.client
         self.temperature = 0.9
         self.max_tokens = int(self.config.get('max_tokens', 4000))
         self.max_retries = 3
+        self.settings = self._load_generation_settings(config_manager)
+        self.generation_mode = self.settings.get('mode', 'standard')
+        self.stream_rules = StreamRules.from_config(self.settings)
+        self.checkpoint_interval = int(
+            self.settings.get('stream_checkpoint_interval', 200)
+        )
+        self.checkpoint_dir = Path(
+            self.settings.get('checkpoint_dir', 'data/generation_checkpoints')
+        )
+        self.section_generator = SectionedArticleGenerator(
+            self.engine,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens
+        )
+        self.single_flight = SingleFlight('generation')
         self.setup_logging()
         
+    def _load_generation_settings(self, config_manager) -> Dict:
+        try:
+            return dict(config_manager.get_credentials('generation'))
+        except Exception:
+            return {}
+
     def setup_logging(self):
         log_dir = Path('logs')
         log_dir.mkdir(exist_ok=True)
@@ -46,31 +84,56 @@ class EnhancedContentGenerator:
                 'primary': primary_keywords,
                 'secondary': [],
                 'audience': 'general',
-                'tone': 'professional'
+                'tone': 'professional',
+                'word_count': word_count
             }
             
-            content = await self._generate_with_retry(topic, keywords)
-            
-            if custom_outline:
-                content = await self.modify_outline(content, custom_outline.split('\n'))
-                
-            validation = await self.validate_content(content, keywords)
+            if self.generation_mode == 'sections':
+                # The custom outline drives section generation directly instead
+                # of a rewrite pass
+                outline = self.section_generator.parse_outline(custom_outline)
+                content = await self._generate_with_retry(
+                    topic, keywords, outline
+                )
+            else:
+                content = await self._generate_with_retry(topic, keywords)
+
+                if custom_outline:
+                    content = await self.modify_outline(
+                        content, custom_outline.split('\n')
+                    )
+
+            document = analyze_text(content)
+            validation = await self.validate_content(document, keywords)
             
             return {
                 'content': content,
-                'word_count': len(content.split()),
+                'word_count': document.word_count,
                 'validation': validation,
-                'keywords_used': self._count_keywords(content, primary_keywords)
+                'keywords_used': self._count_keywords(
+                    document, primary_keywords
+                )
             }
         except Exception as e:
             logging.error(f"Enhanced content generation failed: {str(e)}")
             raise
 
-    async def _generate_with_retry(self, topic: str, keywords: Dict) -> str:
+    async def _generate_with_retry(
+        self, topic: str, keywords: Dict, outline: List[str] = None
+    ) -> str:
+        # Duplicate topic rows running at the same time share one generation
+        key = normalize_key(self.generation_mode, topic, keywords, outline)
+        return await self.single_flight.do(
+            key, self._run_generation_with_retry, topic, keywords, outline
+        )
+
+    async def _run_generation_with_retry(
+        self, topic: str, keywords: Dict, outline: List[str] = None
+    ) -> str:
         retries = 0
         while retries < self.max_retries:
             try:
-                return await self.generate_article(topic, keywords)
+                return await self.generate_article(topic, keywords, outline)
             except Exception as e:
                 retries += 1
                 if retries == self.max_retries:
@@ -78,21 +141,90 @@ class EnhancedContentGenerator:
                     raise
                 logging.warning(f"Attempt {retries} failed: {str(e)}")
                 await asyncio.sleep(2 ** retries)  # Exponential backoff
-            
-    async def generate_article(self, topic: str, keywords: Dict) -> str:
+
+    async def generate_article(
+        self, topic: str, keywords: Dict, outline: List[str] = None
+    ) -> str:
+        if self.generation_mode == 'sections':
+            return await self.section_generator.generate(
+                topic, keywords, outline
+            )
+        if self.generation_mode == 'streaming':
+            return await self.generate_article_streaming(topic, keywords)
         try:
             prompt = self._create_prompt(topic, keywords)
-            response = await self.client.chat.completions.create(
-                model=self.config['model'],
-                messages=[{"role": "user", "content": prompt}],
+            return await self.engine.complete(
+                [{"role": "user", "content": prompt}],
                 temperature=self.temperature,
                 max_tokens=self.max_tokens
             )
-            return response.choices[0].message.content
         except Exception as e:
             logging.error(f"Content generation failed: {str(e)}")
             raise
-            
+
+    async def generate_article_streaming(
+        self, topic: str, keywords: Dict
+    ) -> str:
+        checkpoint = StreamCheckpoint(
+            self.checkpoint_dir
+            / f"{self._checkpoint_key(topic, keywords)}.txt"
+        )
+        partial = checkpoint.load()
+        messages = [
+            {"role": "user", "content": self._create_prompt(topic, keywords)}
+        ]
+        if partial:
+            logging.info(f"Resuming article from checkpoint: {topic}")
+            messages += [
+                {"role": "assistant", "content": partial},
+                {"role": "user", "content": CONTINUE_PROMPT}
+            ]
+        monitor = StreamMonitor(self.stream_rules, initial_text=partial)
+
+        try:
+            stream = self.engine.stream(
+                messages,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens
+            )
+            async with aclosing(stream) as deltas:
+                async for delta in deltas:
+                    monitor.feed(delta)
+                    if (
+                        monitor.words_since_checkpoint
+                        >= self.checkpoint_interval
+                    ):
+                        checkpoint.save(monitor.text)
+                        monitor.mark_checkpoint()
+            content = monitor.finish()
+        except StreamAbortError as e:
+            # The partial text failed a rule, so resuming from it would only
+            # repeat the problem
+            checkpoint.clear()
+            logging.warning(
+                "Streaming generation aborted after "
+                f"{monitor.word_count} words: {str(e)}"
+            )
+            raise
+        except Exception as e:
+            if monitor.text:
+                checkpoint.save(monitor.text)
+            logging.error(f"Streaming generation failed: {str(e)}")
+            raise
+
+        checkpoint.clear()
+        return content
+
+    def _checkpoint_key(self, topic: str, keywords: Dict) -> str:
+        key_string = f"{topic}_{'-'.join(sorted(keywords.get('primary', [])))}"
+        return hashlib.md5(key_string.encode('utf-8')).hexdigest()[:12]
+
+    def get_generation_metrics(self) -> Dict:
+        return {
+            **self.engine.get_metrics(),
+            'single_flight': self.single_flight.get_stats()
+        }
+
     def _create_prompt(self, topic: str, keywords: Dict) -> str:
         return f"""Write a unique, original article on: {topic}
                 Primary keywords: {keywords['primary']}
@@ -125,13 +257,11 @@ class EnhancedContentGenerator:
     async def modify_outline(self, content: str, new_outline: List[str]) -> str:
         try:
             outline_prompt = self._create_outline_prompt(content, new_outline)
-            response = await self.client.chat.completions.create(
-                model=self.config['model'],
-                messages=[{"role": "user", "content": outline_prompt}],
+            return await self.engine.complete(
+                [{"role": "user", "content": outline_prompt}],
                 temperature=self.temperature,
                 max_tokens=self.max_tokens
             )
-            return response.choices[0].message.content
         except Exception as e:
             logging.error(f"Outline modification failed: {str(e)}")
             raise
@@ -147,24 +277,33 @@ class EnhancedContentGenerator:
                 
     def _format_outline(self, outline: List[str]) -> str:
         return "\n".join([f"- {item}" for item in outline])
-        
-    async def validate_content(self, content: str, keywords: Dict) -> Dict:
-        word_count = len(content.split())
-        keyword_count = sum(content.lower().count(kw.lower()) for kw in keywords['primary'])
-        
+
+    async def validate_content(
+        self, content: Union[str, AnalyzedDocument], keywords: Dict
+    ) -> Dict:
+        doc = analyze_text(content)
+        word_count = doc.word_count
+        keyword_count = sum(
+            doc.lower.count(kw.lower()) for kw in keywords['primary']
+        )
+
         return {
             'word_count': word_count >= 3200,
             'keyword_density': keyword_count >= 20,
-            'structure': all(heading in content for heading in ['<h1>', '<h2>', '<h3>']),
-            'has_faq': '<faq>' in content.lower(),
+            'structure': all(
+                heading in doc.text for heading in ['<h1>', '<h2>', '<h3>']
+            ),
+            'has_faq': '<faq>' in doc.lower,
             'metrics': {
                 'total_words': word_count,
                 'keyword_occurrences': keyword_count
             }
         }
-        
-    def _count_keywords(self, content: str, keywords: List[str]) -> Dict[str, int]:
-        content_lower = content.lower()
+
+    def _count_keywords(
+        self, content: Union[str, AnalyzedDocument], keywords: List[str]
+    ) -> Dict[str, int]:
+        content_lower = analyze_text(content).lower
         return {
             keyword: content_lower.count(keyword.lower())
             for keyword in keywords
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Dec  2 09:14:37 2024
+
+@author: thesaint
+"""
+
+# src/content_management/publish_scheduler.py
+from typing import Optional
+import asyncio
+import logging
+from datetime import datetime
+from pathlib import Path
+
+
+class PublishSlotScheduler:
+    """Releases publish slots no closer together than the configured interval.
+
+    Only the publish step waits on a slot, so generation, quality checks and
+    media work for upcoming posts can run while the scheduler is idle.
+    """
+
+    def __init__(self, interval_seconds: float):
+        if interval_seconds < 0:
+            raise ValueError("Publish interval cannot be negative")
+        self.interval_seconds = interval_seconds
+        self.last_release: Optional[float] = None
+        self.released = 0
+        self._lock = asyncio.Lock()
+        self.setup_logging()
+
+    def setup_logging(self):
+        log_dir = Path('logs')
+        log_dir.mkdir(exist_ok=True)
+        logging.basicConfig(
+            filename=log_dir
+            / f'publish_scheduler_{datetime.now():%Y%m%d}.log',
+            level=logging.INFO,
+            format='%(asctime)s - %(levelname)s - %(message)s'
+        )
+
+    def seconds_until_next_slot(self) -> float:
+        if self.last_release is None:
+            return 0.0
+        loop = asyncio.get_running_loop()
+        return max(
+            0.0, self.last_release + self.interval_seconds - loop.time()
+        )
+
+    async def wait_for_slot(self) -> None:
+        # Callers are served one at a time so two posts can never share a slot
+        async with self._lock:
+            delay = self.seconds_until_next_slot()
+            if delay > 0:
+                logging.info(f"Waiting {delay:.0f}s for next publish slot")
+                await asyncio.sleep(delay)
+            self.last_release = asyncio.get_running_loop().time()
+            self.released += 1
@@ -7,12 +7,13 @@ Created on Mon Nov 25 20:59:50 2024
 """
 
 # src/content_quality.py
-from typing import Dict, List
+from typing import Dict, List, Union
 import re
 import nltk
-from textblob import TextBlob
 import logging
 from datetime import datetime
+from src.text_analysis import AnalyzedDocument, analyze_text
+from src.data_processing.keyword_matcher import KeywordMatches, match_keywords
 
 class ContentQualityAnalyzer:
     def __init__(self):
@@ -29,127 +30,99 @@ class ContentQualityAnalyzer:
             level=logging.INFO,
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
-        
-    async def analyze_content(self, content: str, keywords: List[str]) -> Dict:
+
+    async def analyze_content(
+        self, content: Union[str, AnalyzedDocument], keywords: List[str]
+    ) -> Dict:
         try:
+            doc = analyze_text(content)
+            matches = match_keywords(doc, keywords)
             return {
-                'readability_metrics': self._analyze_readability(content),
-                'keyword_optimization': self._analyze_keywords(content, keywords),
-                'content_structure': self._analyze_structure(content),
-                'quality_score': self._calculate_quality_score(content),
-                'engagement_metrics': self._analyze_engagement(content),
-                'seo_score': self._calculate_seo_score(content, keywords)
+                'readability_metrics': self._analyze_readability(doc),
+                'keyword_optimization': self._analyze_keywords(doc, matches),
+                'content_structure': self._analyze_structure(doc),
+                'quality_score': self._calculate_quality_score(doc),
+                'engagement_metrics': self._analyze_engagement(doc),
+                'seo_score': self._calculate_seo_score(doc, matches)
             }
         except Exception as e:
             logging.error(f"Content quality analysis failed: {str(e)}")
             raise
             
-    def _analyze_readability(self, content: str) -> Dict:
-        blob = TextBlob(content)
-        sentences = blob.sentences
+    def _analyze_readability(self, doc: AnalyzedDocument) -> Dict:
+        sentences = doc.sentences
         
         return {
-            'avg_sentence_length': sum(len(str(s).split()) for s in sentences) / len(sentences),
-            'paragraph_count': len(content.split('\n\n')),
-            'readability_score': self._calculate_flesch_score(content)
+            'avg_sentence_length': sum(len(s.split()) for s in sentences)
+            / len(sentences),
+            'paragraph_count': len(doc.paragraphs),
+            'readability_score': doc.flesch_score
         }
-        
-    def _analyze_keywords(self, content: str, keywords: List[str]) -> Dict:
+
+    def _analyze_keywords(
+        self, doc: AnalyzedDocument, matches: KeywordMatches
+    ) -> Dict:
         keyword_density = {}
-        words = content.lower().split()
         
-        for keyword in keywords:
-            count = len(re.findall(rf'\b{keyword.lower()}\b', content.lower()))
-            density = count / len(words)
+        for keyword, count in matches.counts.items():
+            density = count / doc.word_count
             keyword_density[keyword] = {
                 'count': count,
                 'density': density,
-                'in_headings': self._check_keyword_in_headings(content, keyword)
+                'in_headings': self._check_keyword_in_headings(
+                    matches, keyword
+                )
             }
             
         return keyword_density
         
-    def _analyze_engagement(self, content: str) -> Dict:
+    def _analyze_engagement(self, doc: AnalyzedDocument) -> Dict:
         return {
-            'question_count': len(re.findall(r'\?', content)),
-            'call_to_actions': len(re.findall(r'!|(?i)click|subscribe|comment|share', content)),
-            'subheading_count': len(re.findall(r'<h[2-4]', content)),
-            'internal_links': len(re.findall(r'<a\s+href=[^>]+>', content))
+            'question_count': doc.text.count('?'),
+            'call_to_actions': len(
+                re.findall(r'(?i)!|click|subscribe|comment|share', doc.text)
+            ),
+            'subheading_count': sum(
+                1 for level, _ in doc.headings if 2 <= level <= 4
+            ),
+            'internal_links': len(doc.links)
         }
-        
-    def _calculate_seo_score(self, content: str, keywords: List[str]) -> float:
+
+    def _calculate_seo_score(
+        self, doc: AnalyzedDocument, matches: KeywordMatches
+    ) -> float:
         scores = {
-            'keyword_presence': self._check_keyword_presence(content, keywords),
-            'heading_optimization': self._check_heading_optimization(content, keywords),
-            'content_length': len(content.split()) >= self.min_word_count,
-            'readability': self._calculate_flesch_score(content) > 60
+            'keyword_presence': self._check_keyword_presence(matches),
+            'heading_optimization': self._check_heading_optimization(matches),
+            'content_length': doc.word_count >= self.min_word_count,
+            'readability': doc.flesch_score > 60
         }
         return sum(scores.values()) / len(scores) * 100
         
-    def _check_keyword_presence(self, content: str, keywords: List[str]) -> bool:
-        content_lower = content.lower()
-        return all(
-            len(re.findall(rf'\b{keyword.lower()}\b', content_lower)) >= 20 
-            for keyword in keywords
-        )
-        
-    def _check_heading_optimization(self, content: str, keywords: List[str]) -> bool:
-        headings = re.findall(r'<h[1-4]>(.*?)</h[1-4]>', content, re.IGNORECASE)
-        keywords_lower = [k.lower() for k in keywords]
-        return any(
-            any(keyword in heading.lower() for keyword in keywords_lower)
-            for heading in headings
-        )
-        
-    def _calculate_flesch_score(self, content: str) -> float:
-        sentences = nltk.sent_tokenize(content)
-        words = content.split()
-        
-        total_words = len(words)
-        total_sentences = len(sentences)
-        total_syllables = sum(self._count_syllables(word) for word in words)
+    def _check_keyword_presence(self, matches: KeywordMatches) -> bool:
+        return all(count >= 20 for count in matches.counts.values())
         
-        if total_sentences == 0 or total_words == 0:
-            return 0.0
-            
-        return 206.835 - 1.015 * (total_words / total_sentences) - 84.6 * (total_syllables / total_words)
+    def _check_heading_optimization(self, matches: KeywordMatches) -> bool:
+        return any(matches.heading_hits.values())
         
-    def _count_syllables(self, word: str) -> int:
-        word = word.lower()
-        count = 0
-        vowels = "aeiouy"
-        previous_char_is_vowel = False
-        
-        if word.endswith('e'):
-            word = word[:-1]
-            
-        for char in word:
-            is_vowel = char in vowels
-            if is_vowel and not previous_char_is_vowel:
-                count += 1
-            previous_char_is_vowel = is_vowel
-            
-        if count == 0:
-            count = 1
-        return count
-        
-    def _calculate_quality_score(self, content: str) -> float:
+    def _calculate_quality_score(self, doc: AnalyzedDocument) -> float:
         metrics = {
-            'readability': self._calculate_flesch_score(content) > 60,
-            'length': len(content.split()) >= self.min_word_count,
-            'structure': bool(re.search(r'<h[1-4]>', content)),
-            'paragraphs': len(content.split('\n\n')) >= 5
+            'readability': doc.flesch_score > 60,
+            'length': doc.word_count >= self.min_word_count,
+            'structure': any(level <= 4 for level, _ in doc.headings),
+            'paragraphs': len(doc.paragraphs) >= 5
         }
         return sum(metrics.values()) / len(metrics) * 100
+
+    def _check_keyword_in_headings(
+        self, matches: KeywordMatches, keyword: str
+    ) -> bool:
+        return matches.heading_hits[keyword] > 0
         
-    def _check_keyword_in_headings(self, content: str, keyword: str) -> bool:
-        headings = re.findall(r'<h[1-4]>(.*?)</h[1-4]>', content, re.IGNORECASE)
-        return any(keyword.lower() in heading.lower() for heading in headings)
-        
-    def _analyze_structure(self, content: str) -> Dict:
+    def _analyze_structure(self, doc: AnalyzedDocument) -> Dict:
         return {
-            'heading_count': len(re.findall(r'<h[1-4]>', content)),
-            'paragraph_count': len(content.split('\n\n')),
-            'list_items': len(re.findall(r'<li>', content)),
-            'image_count': len(re.findall(r'<img', content))
+            'heading_count': sum(1 for level, _ in doc.headings if level <= 4),
+            'paragraph_count': len(doc.paragraphs),
+            'list_items': doc.lower.count('<li>'),
+            'image_count': doc.lower.count('<img')
         }
\ No newline at end of file
@@ -7,11 +7,12 @@ Created on Tue Nov 26 01:38:33 2024
 """
 
 # src/data_processing/keyword_manager.py
-from typing import Dict, List
+from typing import Dict, List, Union
 import logging
 from datetime import datetime
 from collections import defaultdict
-import re
+from src.text_analysis import AnalyzedDocument, analyze_text
+from src.data_processing.keyword_matcher import KeywordMatches, match_keywords
 
 class KeywordManager:
     def __init__(self):
@@ -81,51 +82,70 @@ class KeywordManager:
             },
             'total_keywords': len(primary) + len(secondary)
         }
-        
-    async def analyze_keyword_usage(self, content: str, keywords: Dict) -> Dict:
+
+    async def analyze_keyword_usage(
+        self, content: Union[str, AnalyzedDocument], keywords: Dict
+    ) -> Dict:
         try:
+            doc = analyze_text(content)
+            # One automaton pass finds every keyword type together
+            matches = match_keywords(
+                doc,
+                [
+                    kw
+                    for keyword_list in keywords.values()
+                    for kw in keyword_list
+                ]
+            )
+            counts = self._count_keyword_occurrences(matches, keywords)
+            heading_usage = self._analyze_heading_keywords(
+                matches, keywords['primary']
+            )
+            densities = self._analyze_keyword_density(doc, counts)
             return {
-                'keyword_counts': self._count_keyword_occurrences(content, keywords),
-                'heading_usage': self._analyze_heading_keywords(content, keywords['primary']),
-                'density_analysis': self._analyze_keyword_density(content, keywords),
-                'optimization_score': self._calculate_optimization_score(content, keywords)
+                'keyword_counts': counts,
+                'heading_usage': heading_usage,
+                'density_analysis': densities,
+                'optimization_score': self._calculate_optimization_score(
+                    counts, heading_usage, densities
+                )
             }
         except Exception as e:
             logging.error(f"Keyword usage analysis failed: {str(e)}")
             raise
-            
-    def _count_keyword_occurrences(self, content: str, keywords: Dict) -> Dict:
-        content_lower = content.lower()
+
+    def _count_keyword_occurrences(
+        self, matches: KeywordMatches, keywords: Dict
+    ) -> Dict:
         counts = {}
         for keyword_type, keyword_list in keywords.items():
             counts[keyword_type] = {
-                keyword: len(re.findall(rf'\b{re.escape(keyword)}\b', content_lower))
+                keyword: matches.counts[keyword]
                 for keyword in keyword_list
             }
         return counts
-        
-    def _analyze_heading_keywords(self, content: str, primary_keywords: List[str]) -> Dict:
-        headings = re.findall(r'<h[1-4]>(.*?)</h[1-4]>', content, re.IGNORECASE)
+
+    def _analyze_heading_keywords(
+        self, matches: KeywordMatches, primary_keywords: List[str]
+    ) -> Dict:
         return {
-            keyword: [h for h in headings if keyword.lower() in h.lower()]
+            keyword: list(matches.headings[keyword])
             for keyword in primary_keywords
         }
-        
-    def _analyze_keyword_density(self, content: str, keywords: Dict) -> Dict:
-        word_count = len(content.split())
+
+    def _analyze_keyword_density(
+        self, doc: AnalyzedDocument, counts: Dict
+    ) -> Dict:
+        word_count = doc.word_count
         densities = {}
-        for keyword_type, keyword_list in keywords.items():
-            total_occurrences = sum(
-                len(re.findall(rf'\b{re.escape(keyword)}\b', content.lower()))
-                for keyword in keyword_list
-            )
+        for keyword_type, keyword_counts in counts.items():
+            total_occurrences = sum(keyword_counts.values())
             densities[keyword_type] = (total_occurrences / word_count) * 100 if word_count > 0 else 0
         return densities
-        
-    def _calculate_optimization_score(self, content: str, keywords: Dict) -> float:
-        counts = self._count_keyword_occurrences(content, keywords)
-        heading_usage = self._analyze_heading_keywords(content, keywords['primary'])
-        
+
+    def _calculate_optimization_score(
+        self, counts: Dict, heading_usage: Dict, densities: Dict
+    ) -> float:
         score = 0
         max_score = 100
         
@@ -140,7 +160,6 @@ class KeywordManager:
                 score += 30 / len(heading_usage)
                 
         # Score based on density
-        densities = self._analyze_keyword_density(content, keywords)
         if 1.5 <= densities['primary'] <= 2.5:
             score += 30
             
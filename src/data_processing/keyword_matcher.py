@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Dec 10 15:07:46 2024
+
+@author: thesaint
+"""
+
+# src/data_processing/keyword_matcher.py
+from typing import Dict, List, Optional, Tuple, Union
+from dataclasses import dataclass
+from functools import lru_cache
+from bisect import bisect_right
+from collections import deque
+from src.text_analysis import AnalyzedDocument, TOKEN_PATTERN, analyze_text
+
+HEADING_LEVELS = (1, 2, 3, 4)
+
+
+@dataclass(frozen=True)
+class KeywordMatches:
+    counts: Dict[str, int]
+    positions: Dict[str, Tuple[int, ...]]
+    heading_hits: Dict[str, int]
+    headings: Dict[str, Tuple[str, ...]]
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over word tokens; finds all keywords in one pass.
+
+    Matching whole tokens gives the same word-boundary semantics as
+    ``\\bkeyword\\b``.
+    """
+
+    def __init__(self, keywords: Tuple[str, ...]):
+        self.keywords = tuple(dict.fromkeys(keywords))
+        self.phrases = [keyword.lower().strip() for keyword in self.keywords]
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[int]] = [[]]
+        self.token_counts = [
+            len(TOKEN_PATTERN.findall(phrase)) for phrase in self.phrases
+        ]
+        for index, phrase in enumerate(self.phrases):
+            self._add(index, TOKEN_PATTERN.findall(phrase))
+        self._build_failure_links()
+
+    def _add(self, index: int, tokens: List[str]) -> None:
+        if not tokens:
+            return
+        node = 0
+        for token in tokens:
+            if token not in self.goto[node]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[node][token] = len(self.goto) - 1
+            node = self.goto[node][token]
+        self.output[node].append(index)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and token not in self.goto[state]:
+                    state = self.fail[state]
+                self.fail[child] = self.goto[state].get(token, 0)
+                self.output[child] = (
+                    self.output[child] + self.output[self.fail[child]]
+                )
+
+    def match(self, content: Union[str, AnalyzedDocument]) -> KeywordMatches:
+        doc = analyze_text(content)
+        lower, spans = doc.lower, doc.token_spans
+        positions = [[] for _ in self.phrases]
+        last_end = [-1] * len(self.phrases)
+
+        node = 0
+        for position, (start, end) in enumerate(spans):
+            token = lower[start:end]
+            while node and token not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(token, 0)
+            for index in self.output[node]:
+                first = position - self.token_counts[index] + 1
+                # Separators between tokens must match the keyword exactly, as
+                # in the regex
+                if lower[spans[first][0]:end] != self.phrases[index]:
+                    continue
+                # Non-overlapping, like re.findall
+                if first > last_end[index]:
+                    positions[index].append(first)
+                    last_end[index] = position
+
+        # Same heading levels the analyzers check through heading_texts()
+        heading_spans = [
+            span
+            for span in doc.heading_spans
+            if doc.headings[span[0]][0] in HEADING_LEVELS
+        ]
+        heading_starts = [span[1] for span in heading_spans]
+        counts, found, heading_hits, headings = {}, {}, {}, {}
+        for index, keyword in enumerate(self.keywords):
+            hits = []
+            for first in positions[index]:
+                heading = self._heading_at(
+                    spans[first][0], heading_starts, heading_spans
+                )
+                if heading is not None:
+                    hits.append(heading)
+            counts[keyword] = len(positions[index])
+            found[keyword] = tuple(positions[index])
+            heading_hits[keyword] = len(hits)
+            headings[keyword] = tuple(
+                dict.fromkeys(doc.headings[h][1] for h in hits)
+            )
+        return KeywordMatches(counts, found, heading_hits, headings)
+
+    def _heading_at(
+        self, offset: int, heading_starts: List[int], heading_spans
+    ) -> Optional[int]:
+        slot = bisect_right(heading_starts, offset) - 1
+        if slot >= 0:
+            heading_index, start, end = heading_spans[slot]
+            if start <= offset < end:
+                return heading_index
+        return None
+
+
+@lru_cache(maxsize=128)
+def get_keyword_matcher(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    return KeywordMatcher(keywords)
+
+
+def match_keywords(
+    content: Union[str, AnalyzedDocument], keywords: List[str]
+) -> KeywordMatches:
+    return get_keyword_matcher(tuple(keywords)).match(content)
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Dec 12 09:18:54 2024
+
+@author: thesaint
+"""
+
+# src/fingerprint_store.py
+from typing import Dict, NamedTuple, Optional, Union
+from pathlib import Path
+import argparse
+import logging
+import os
+import zlib
+import numpy as np
+from src.minhash_index import hash_shingles
+
+INDEX_DTYPE = np.dtype([
+    ('key', 'S64'),
+    ('offset', '<u8'),
+    ('words', '<u4'),
+    ('shingles', '<u4'),
+    ('deleted', 'u1')
+])
+
+
+class Fingerprint(NamedTuple):
+    words: np.ndarray
+    shingles: np.ndarray
+
+
+def hash_words(text: str) -> np.ndarray:
+    """Sorted, unique crc32 hashes of the lowercased whitespace-split words."""
+    words = set(text.lower().split())
+    return np.unique(
+        np.fromiter(
+            (zlib.crc32(word.encode()) for word in words),
+            dtype=np.uint32,
+            count=len(words)
+        )
+    )
+
+
+def jaccard(first: np.ndarray, second: np.ndarray) -> float:
+    union = len(first) + len(second)
+    if not union:
+        return 0.0
+    shared = len(np.intersect1d(first, second, assume_unique=True))
+    return shared / (union - shared)
+
+
+class FingerprintStore:
+    """Append-only word and shingle hash sets for the uniqueness corpus.
+
+    Fingerprints live in ``fingerprints.bin`` as uint32 arrays and are read
+    through a memory map. Only the key table from ``fingerprints.idx`` is
+    held in memory: each key with the offset and sizes of its fingerprint.
+    """
+
+    def __init__(self, directory: Union[str, Path], shingle_size: int = 3):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.data_path = self.directory / 'fingerprints.bin'
+        self.index_path = self.directory / 'fingerprints.idx'
+        self.shingle_size = shingle_size
+        self._data: Optional[np.ndarray] = None
+        self._load_index()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.rows
+
+    def keys(self):
+        return self.rows.keys()
+
+    def fingerprint(self, text: str) -> Fingerprint:
+        return Fingerprint(
+            hash_words(text), hash_shingles(text, self.shingle_size)
+        )
+
+    def add(self, key: str, fingerprint: Fingerprint) -> None:
+        if key in self.rows:
+            return
+        if len(key.encode()) > INDEX_DTYPE['key'].itemsize:
+            raise ValueError(f"Fingerprint key too long: {key}")
+        offset = self._end
+        with open(self.data_path, 'ab') as f:
+            f.write(fingerprint.words.astype('<u4').tobytes())
+            f.write(fingerprint.shingles.astype('<u4').tobytes())
+        # The record is written after its data, so a
+        # crash never indexes a partial fingerprint
+        record = np.array(
+            [
+                (
+                    key.encode(),
+                    offset,
+                    len(fingerprint.words),
+                    len(fingerprint.shingles),
+                    0
+                )
+            ],
+            dtype=INDEX_DTYPE
+        )
+        with open(self.index_path, 'ab') as f:
+            f.write(record.tobytes())
+        self._end = offset + len(fingerprint.words) + len(
+            fingerprint.shingles
+        )
+        self.rows[key] = (
+            offset,
+            len(fingerprint.words),
+            len(fingerprint.shingles)
+        )
+
+    def get(self, key: str) -> Optional[Fingerprint]:
+        row = self.rows.get(key)
+        if row is None:
+            return None
+        offset, words, shingles = row
+        data = self._mapped(offset + words + shingles)
+        return Fingerprint(
+            data[offset: offset + words],
+            data[offset + words: offset + words + shingles]
+        )
+
+    def remove(self, key: str) -> None:
+        if self.rows.pop(key, None) is None:
+            return
+        record = np.array([(key.encode(), 0, 0, 0, 1)], dtype=INDEX_DTYPE)
+        with open(self.index_path, 'ab') as f:
+            f.write(record.tobytes())
+
+    def compact(self) -> Dict:
+        """Rewrite both files, keeping only the live fingerprints."""
+        try:
+            before = (
+                self.data_path.stat().st_size if self.data_path.exists() else 0
+            )
+            data_tmp = self.data_path.with_suffix('.bin.tmp')
+            index_tmp = self.index_path.with_suffix('.idx.tmp')
+            records, rows, offset = [], {}, 0
+            with open(data_tmp, 'wb') as f:
+                for key in list(self.rows):
+                    fingerprint = self.get(key)
+                    f.write(fingerprint.words.tobytes())
+                    f.write(fingerprint.shingles.tobytes())
+                    records.append(
+                        (
+                            key.encode(),
+                            offset,
+                            len(fingerprint.words),
+                            len(fingerprint.shingles),
+                            0
+                        )
+                    )
+                    rows[key] = (
+                        offset,
+                        len(fingerprint.words),
+                        len(fingerprint.shingles)
+                    )
+                    offset += len(fingerprint.words) + len(
+                        fingerprint.shingles
+                    )
+            np.array(records, dtype=INDEX_DTYPE).tofile(index_tmp)
+            self._data = None
+            os.replace(data_tmp, self.data_path)
+            os.replace(index_tmp, self.index_path)
+            self.rows = rows
+            self._end = offset
+            after = self.data_path.stat().st_size
+            logging.info(
+                f"Compacted fingerprint store: {before} "
+                f"-> {after} bytes, {len(rows)} entries"
+            )
+            return {
+                'entries': len(rows),
+                'bytes_before': before,
+                'bytes_after': after
+            }
+        except Exception as e:
+            logging.error(f"Fingerprint store compaction failed: {str(e)}")
+            raise
+
+    def _load_index(self) -> None:
+        self.rows: Dict[str, tuple] = {}
+        self._end = 0
+        if self.index_path.exists():
+            count = self.index_path.stat().st_size // INDEX_DTYPE.itemsize
+            # Appends go after whole records only, so a partial record left
+            # by an interrupted append is cut off first
+            self._truncate(self.index_path, count * INDEX_DTYPE.itemsize)
+            records = np.fromfile(self.index_path, dtype=INDEX_DTYPE)
+            for record in records:
+                key = record['key'].decode()
+                if record['deleted']:
+                    self.rows.pop(key, None)
+                    continue
+                row = (
+                    int(record['offset']),
+                    int(record['words']),
+                    int(record['shingles'])
+                )
+                self.rows[key] = row
+                self._end = max(self._end, sum(row))
+        # Data past the last indexed fingerprint belongs to an append that
+        # never got its record, and may end mid-word
+        if self.data_path.exists():
+            self._truncate(self.data_path, self._end * 4)
+
+    def _truncate(self, path: Path, size: int) -> None:
+        if path.stat().st_size > size:
+            logging.warning(
+                f"Truncating {path} to {size} bytes after an interrupted write"
+            )
+            os.truncate(path, size)
+
+    def _mapped(self, end: int) -> np.ndarray:
+        # Appends grow the file past the current
+        # map, so remap only when a read needs it
+        if self._data is None or len(self._data) < end:
+            self._data = np.memmap(self.data_path, dtype='<u4', mode='r')
+        return self._data
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Maintain the uniqueness fingerprint store'
+    )
+    parser.add_argument('command', choices=['compact', 'stats'])
+    parser.add_argument(
+        '--dir',
+        default='data/content_cache',
+        help='Directory holding the store'
+    )
+    args = parser.parse_args()
+
+    store = FingerprintStore(args.dir)
+    if args.command == 'compact':
+        stats = store.compact()
+        print(
+            f"Compacted {stats['entries']} entries: "
+            f"{stats['bytes_before']} -> {stats['bytes_after']} bytes"
+        )
+    else:
+        size = (
+            store.data_path.stat().st_size if store.data_path.exists() else 0
+        )
+        print(f"{len(store)} entries, {size} bytes")
+
+
+if __name__ == "__main__":
+    main()
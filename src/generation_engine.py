@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Dec  3 10:02:51 2024
+
+@author: thesaint
+"""
+
+# src/generation_engine.py
+from openai import AsyncOpenAI
+import httpx
+from typing import AsyncIterator, Dict, List, Optional
+from collections import deque
+import asyncio
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+class GenerationEngine:
+    """Async OpenAI client with one connection pool and an in-flight cap."""
+
+    def __init__(self, config: Dict):
+        self.model = config['model']
+        self.max_concurrent = int(config.get('max_concurrent_requests', 4))
+        self.max_connections = int(
+            config.get('max_connections', max(self.max_concurrent, 10))
+        )
+        self.timeout = float(config.get('timeout', 120))
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections
+            ),
+            timeout=self.timeout,
+            # Every attempt passes through here,
+            # including the SDK's own retries
+            event_hooks={'response': [self._observe_response]}
+        )
+        # Set to an EnhancedRateLimiter to pace requests by what OpenAI reports
+        self.rate_limiter = None
+        self.client = AsyncOpenAI(
+            api_key=config['api_key'],
+            base_url=config.get('base_url') or None,
+            http_client=self.http_client
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self.latencies = deque(maxlen=1000)
+        self.metrics = {
+            'calls': 0,
+            'errors': 0,
+            'in_flight': 0,
+            'peak_in_flight': 0,
+            'total_wait': 0.0
+        }
+        self.setup_logging()
+
+    def setup_logging(self):
+        log_dir = Path('logs')
+        log_dir.mkdir(exist_ok=True)
+        logging.basicConfig(
+            filename=log_dir
+            / f'generation_engine_{datetime.now():%Y%m%d}.log',
+            level=logging.INFO,
+            format='%(asctime)s - %(levelname)s - %(message)s'
+        )
+
+    async def _observe_response(self, response: httpx.Response) -> None:
+        if self.rate_limiter is not None:
+            self.rate_limiter.record_response(
+                'openai', response.status_code, response.headers
+            )
+
+    async def _acquire(self) -> None:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire('openai')
+
+    async def complete(self, messages: List[Dict], **params) -> str:
+        queued_at = time.perf_counter()
+        await self._acquire()
+        async with self._semaphore:
+            started_at = time.perf_counter()
+            self._enter(started_at - queued_at)
+            try:
+                response = await self.client.chat.completions.create(
+                    model=params.pop('model', self.model),
+                    messages=messages,
+                    **params
+                )
+                return response.choices[0].message.content
+            except Exception as e:
+                self.metrics['errors'] += 1
+                logging.error(f"Completion request failed: {str(e)}")
+                raise
+            finally:
+                self._exit(started_at)
+
+    async def stream(
+        self, messages: List[Dict], **params
+    ) -> AsyncIterator[str]:
+        """Yield deltas as they arrive; closing the generator aborts."""
+        queued_at = time.perf_counter()
+        await self._acquire()
+        async with self._semaphore:
+            started_at = time.perf_counter()
+            self._enter(started_at - queued_at)
+            response = None
+            try:
+                response = await self.client.chat.completions.create(
+                    model=params.pop('model', self.model),
+                    messages=messages,
+                    stream=True,
+                    **params
+                )
+                async for chunk in response:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            except Exception as e:
+                self.metrics['errors'] += 1
+                logging.error(f"Streaming completion failed: {str(e)}")
+                raise
+            finally:
+                if response is not None:
+                    await response.close()
+                self._exit(started_at)
+
+    def _enter(self, wait: float) -> None:
+        self.metrics['calls'] += 1
+        self.metrics['total_wait'] += wait
+        self.metrics['in_flight'] += 1
+        self.metrics['peak_in_flight'] = max(
+            self.metrics['peak_in_flight'], self.metrics['in_flight']
+        )
+
+    def _exit(self, started_at: float) -> None:
+        self.metrics['in_flight'] -= 1
+        latency = time.perf_counter() - started_at
+        self.latencies.append(latency)
+        logging.info(
+            f"Completion finished in {latency:.2f}s "
+            f"({self.metrics['in_flight']} in flight)"
+        )
+
+    def get_metrics(self) -> Dict:
+        latencies = sorted(self.latencies)
+        calls = self.metrics['calls']
+        return {
+            **self.metrics,
+            'max_concurrent': self.max_concurrent,
+            'avg_wait': self.metrics['total_wait'] / calls if calls else 0,
+            'avg_latency': sum(latencies) / len(latencies) if latencies else 0,
+            'p50_latency': self._percentile(latencies, 0.5),
+            'p95_latency': self._percentile(latencies, 0.95)
+        }
+
+    def _percentile(
+        self, values: List[float], fraction: float
+    ) -> Optional[float]:
+        if not values:
+            return None
+        return values[min(len(values) - 1, int(len(values) * fraction))]
+
+    async def close(self) -> None:
+        await self.client.close()
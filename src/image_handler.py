@@ -7,22 +7,59 @@ Created on Mon Nov 25 21:25:30 2024
 """
 
 # src/image_handler.py
-from PIL import Image
-import requests
-from io import BytesIO
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import asyncio
+import aiohttp
+from src.single_flight import SingleFlight, normalize_key
+from src.media_system.image_cache import ImageCache
+from src.media_system.perceptual_hash import PerceptualIndex, dhash, hamming
+from src.media_system.rendition_engine import RenditionEngine
+
+UNSPLASH_SEARCH_URL = 'https://api.unsplash.com/search/photos'
 
 class ImageHandler:
     def __init__(self, config_manager):
         self.unsplash_key = config_manager.get_credentials('unsplash')['access_key']
-        self.max_size = (800, 800)  # Maximum image dimensions
-        self.image_cache_dir = Path('data/image_cache')
-        self.image_cache_dir.mkdir(parents=True, exist_ok=True)
+        settings = self._load_media_settings(config_manager)
+        self.renditions = RenditionEngine.from_settings(settings)
+        self.quality = self.renditions.quality
+        self.image_cache = ImageCache(
+            max_bytes=int(settings.get('image_cache_max_mb', 256))
+            * 1024
+            * 1024
+        )
+        self.perceptual_index = PerceptualIndex(
+            'data/image_cache/perceptual_index.jsonl',
+            max_distance=int(settings.get('image_dedupe_distance', 6)),
+            window_days=float(settings.get('image_dedupe_days', 90))
+        )
+        self.spare_candidates = int(settings.get('image_spare_candidates', 3))
+        self.single_flight = SingleFlight('image_search')
+        self.max_connections = 8
+        self.request_timeout = 30
+        self.session: Optional[aiohttp.ClientSession] = None
+        # Set to an EnhancedRateLimiter to pace
+        # searches by what Unsplash reports
+        self.rate_limiter = None
+        # PIL releases the GIL while decoding, resizing and encoding, so
+        # threads run in parallel
+        self.executor = ThreadPoolExecutor(
+            max_workers=min(4, os.cpu_count() or 1), thread_name_prefix='image'
+        )
         self.setup_logging()
         
+    def _load_media_settings(self, config_manager) -> Dict:
+        try:
+            return dict(config_manager.get_credentials('media'))
+        except Exception:
+            return {}
+
     def setup_logging(self):
         logging.basicConfig(
             filename=f'logs/image_handler_{datetime.now():%Y%m%d}.log',
@@ -30,19 +67,75 @@ class ImageHandler:
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
         
+    async def _get_session(self) -> aiohttp.ClientSession:
+        # One keep-alive pool for the Unsplash API and image CDN, created
+        # inside the running loop
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_connections, keepalive_timeout=30
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+            )
+        return self.session
+
+    async def close(self) -> None:
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.executor.shutdown(wait=False)
+        self.image_cache.close()
+
+    async def _get_json(
+        self,
+        url: str,
+        params: Dict,
+        headers: Dict,
+        api_name: Optional[str] = None
+    ) -> Dict:
+        session = await self._get_session()
+        if api_name and self.rate_limiter is not None:
+            await self.rate_limiter.acquire(api_name)
+        async with session.get(
+            url, params=params, headers=headers
+        ) as response:
+            if api_name and self.rate_limiter is not None:
+                self.rate_limiter.record_response(
+                    api_name, response.status, response.headers
+                )
+            response.raise_for_status()
+            return await response.json()
+
+    async def _download(self, url: str) -> bytes:
+        session = await self._get_session()
+        async with session.get(url) as response:
+            response.raise_for_status()
+            return await response.read()
+
     async def fetch_images(self, topic: str, count: int = 3) -> List[Dict]:
+        # Identical searches running at the
+        # same time share one Unsplash request
+        return await self.single_flight.do(
+            normalize_key(topic, count), self._search_images, topic, count
+        )
+
+    async def _search_images(self, topic: str, count: int) -> List[Dict]:
         try:
             headers = {'Authorization': f'Client-ID {self.unsplash_key}'}
-            endpoint = f'https://api.unsplash.com/search/photos?query={topic}&per_page={count}'
-            
-            response = requests.get(endpoint, headers=headers)
-            response.raise_for_status()
-            
-            images = response.json()['results']
+            data = await self._get_json(
+                UNSPLASH_SEARCH_URL,
+                {'query': topic, 'per_page': count},
+                headers,
+                api_name='unsplash'
+            )
+
+            images = data['results']
             return [
                 {
                     'id': img['id'],
-                    'url': img['urls']['raw'],
+                    'url': self._sized_url(
+                        img['urls']['raw'], img.get('width'), img.get('height')
+                    ),
+                    'raw_url': img['urls']['raw'],
                     'description': img['description'] or topic,
                     'credit': {
                         'name': img['user']['name'],
@@ -63,79 +156,188 @@ class ImageHandler:
                 return cached_image
             
             # Download and process image
-            response = requests.get(image_data['url'])
-            response.raise_for_status()
+            started = time.perf_counter()
+            content = await self._download(image_data['url'])
+            downloaded = time.perf_counter()
             
-            img = Image.open(BytesIO(response.content))
-            
-            # Convert to RGB if necessary
-            if img.mode in ('RGBA', 'P'):
-                img = img.convert('RGB')
-                
-            # Resize image
-            img.thumbnail(self.max_size, Image.Resampling.LANCZOS)
-            
-            # Optimize and save
-            output = BytesIO()
-            img.save(output, 
-                    format='JPEG', 
-                    quality=85, 
-                    optimize=True)
+            loop = asyncio.get_running_loop()
+            renditions, phash = await loop.run_in_executor(
+                self.executor, self._process_image, content
+            )
+            processed = time.perf_counter()
             
+            primary = renditions[self.renditions.primary]
+            data = primary['data']
             optimized_data = {
                 'id': image_data['id'],
-                'data': output.getvalue(),
+                'data': data,
                 'format': 'jpeg',
-                'size': img.size,
+                'size': primary['size'],
+                'renditions': renditions,
+                'phash': f'{phash:016x}',
                 'description': image_data['description'],
-                'credit': image_data['credit']
+                'credit': image_data['credit'],
+                'timings': {
+                    'download': downloaded - started,
+                    'process': processed - downloaded,
+                    'bytes_in': len(content),
+                    'bytes_out': len(data)
+                }
             }
+            logging.info(
+                f"Image {image_data['id']}: download "
+                f"{downloaded - started:.2f}s, "
+                f"process {processed - downloaded:.2f}s, "
+                f"{len(content)} -> {len(data)} bytes"
+            )
             
-            # Cache the optimized image
-            self._cache_image(optimized_data)
-            
-            return optimized_data
+            # Cache the optimized image; timings describe this run only
+            cached = self._cache_image(
+                {k: v for k, v in optimized_data.items() if k != 'timings'}
+            )
+
+            return {**cached, 'timings': optimized_data['timings']}
             
         except Exception as e:
             logging.error(f"Image optimization failed: {str(e)}")
             raise
             
-    def _get_cached_image(self, image_id: str) -> Dict:
-        cache_file = self.image_cache_dir / f'{image_id}.jpg'
-        if cache_file.exists():
-            try:
-                with open(cache_file, 'rb') as f:
-                    return {
-                        'id': image_id,
-                        'data': f.read(),
-                        'format': 'jpeg',
-                        'cached': True
-                    }
-            except Exception as e:
-                logging.error(f"Failed to read cached image: {str(e)}")
-                return None
-        return None
+    def _sized_url(
+        self,
+        raw_url: str,
+        width: Optional[int] = None,
+        height: Optional[int] = None
+    ) -> str:
+        # Unsplash (imgix) resizes on the server, so we never download the
+        # full original. With the photo's size known the request is as wide as
+        # the renditions need: a panorama has to be wider than the widest one
+        # for the featured crop to reach its full height.
+        if width and height:
+            request_width = self.renditions.source_size((width, height))[0]
+        else:
+            request_width = self.renditions.max_width
+        parts = urlsplit(raw_url)
+        query = dict(parse_qsl(parts.query))
+        query.update(
+            {
+                'w': str(request_width),
+                'q': str(self.quality),
+                'fm': 'jpg',
+                'fit': 'max'
+            }
+        )
+        return urlunsplit(parts._replace(query=urlencode(query)))
+
+    def _process_image(self, content: bytes) -> Tuple[Dict[str, Dict], int]:
+        # One decode produces the featured crop, content sizes and thumbnail
+        renditions = self.renditions.render(content)
+        # The hash comes from the small primary JPEG, which decodes at 1/8
+        # scale almost for free
+        return renditions, dhash(renditions[self.renditions.primary]['data'])
+
+    def _get_cached_image(self, image_id: str) -> Optional[Dict]:
+        try:
+            return self.image_cache.get(image_id, self.renditions.params)
+        except Exception as e:
+            logging.error(f"Failed to read cached image: {str(e)}")
+            return None
         
-    def _cache_image(self, image_data: Dict) -> None:
+    def _cache_image(self, image_data: Dict) -> Dict:
         try:
-            cache_file = self.image_cache_dir / f"{image_data['id']}.jpg"
-            with open(cache_file, 'wb') as f:
-                f.write(image_data['data'])
+            cached = self.image_cache.put(
+                image_data['id'], self.renditions.params, image_data
+            )
             logging.info(f"Image cached successfully: {image_data['id']}")
+            return cached
         except Exception as e:
             logging.error(f"Failed to cache image: {str(e)}")
+            return image_data
             
+    async def _get_phash(self, image: Dict) -> int:
+        # Entries cached before hashes were recorded are hashed on first use
+        if 'phash' not in image:
+            loop = asyncio.get_running_loop()
+            phash = await loop.run_in_executor(
+                self.executor, dhash, image['data']
+            )
+            image['phash'] = f"{phash:016x}"
+        return int(image['phash'], 16)
+
+    async def _optimize_batch(self, batch: List[Dict]) -> List[Dict]:
+        # Each batch downloads and processes at the same time; a failed
+        # image leaves its slot to the next spare candidate
+        results = await asyncio.gather(
+            *[self.optimize_image(img) for img in batch],
+            return_exceptions=True
+        )
+        optimized = []
+        for img, image in zip(batch, results):
+            if isinstance(image, Exception):
+                logging.warning(f"Skipping image {img['id']}: {str(image)}")
+            elif isinstance(image, BaseException):
+                # Cancellation is not a failed image; it stops the whole fetch
+                raise image
+            else:
+                optimized.append(image)
+        return optimized
+
     async def fetch_and_optimize_images(self, topic: str, count: int = 3) -> List[Dict]:
         try:
-            images = await self.fetch_images(topic, count)
-            optimized_images = []
-            
+            images = await self.fetch_images(
+                topic, count + self.spare_candidates
+            )
+            # Photos already used on recent posts are only downloaded if
+            # nothing else fills the post
+            candidates, recent = [], []
             for img in images:
-                optimized = await self.optimize_image(img)
-                optimized_images.append(optimized)
-                
-            return optimized_images
+                if img['id'] in self.perceptual_index:
+                    recent.append(img)
+                else:
+                    candidates.append(img)
+            selected, reused = [], []
+            while candidates and len(selected) < count:
+                batch = candidates[:count - len(selected)]
+                candidates = candidates[len(batch):]
+                for image in await self._optimize_batch(batch):
+                    phash = await self._get_phash(image)
+                    used = self.perceptual_index.find(phash)
+                    if any(
+                        hamming(phash, int(other['phash'], 16))
+                        <= self.perceptual_index.max_distance
+                        for other in selected
+                    ):
+                        logging.info(
+                            f"Skipping image {image['id']}: "
+                            "near-duplicate within the post"
+                        )
+                    elif used:
+                        logging.info(
+                            f"Skipping image {image['id']}: "
+                            f"near-duplicate of recently used {used[0][0]}"
+                        )
+                        reused.append(image)
+                    else:
+                        selected.append(image)
+
+            # A repeated photo is better than a post without one; the copy
+            # made for its earlier post is usually still in the image cache
+            while recent and len(selected) + len(reused) < count:
+                batch = recent[:count - len(selected) - len(reused)]
+                recent = recent[len(batch):]
+                for image in await self._optimize_batch(batch):
+                    await self._get_phash(image)
+                    reused.append(image)
+
+            if len(selected) < count and reused:
+                logging.warning(
+                    f"Only {len(selected)} new images for {topic}, "
+                    f"reusing {min(len(reused), count - len(selected))}"
+                )
+                selected.extend(reused[:count - len(selected)])
+            for image in selected:
+                self.perceptual_index.add(image['id'], int(image['phash'], 16))
+            return selected
             
         except Exception as e:
             logging.error(f"Fetch and optimize operation failed: {str(e)}")
-            raise
\ No newline at end of file
+            raise
@@ -21,21 +21,21 @@ class MediaLibraryManager:
         try:
             # Handle featured image
             if content.get('featured_image'):
-                featured_id = await self.wp.upload_media(
+                featured = await self.wp.upload_media(
                     content['featured_image']['optimized_data'],
                     'featured-image.jpg'
                 )
-                content['featured_image_id'] = featured_id
+                content['featured_image_id'] = featured['id']
             
             # Handle content images
             if content.get('content_images'):
                 content['image_ids'] = []
                 for idx, img in enumerate(content['content_images']):
-                    image_id = await self.wp.upload_media(
+                    uploaded = await self.wp.upload_media(
                         img['optimized_data'],
                         f'content-image-{idx}.jpg'
                     )
-                    content['image_ids'].append(image_id)
+                    content['image_ids'].append(uploaded['id'])
             
             return content
         except Exception as e:
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Dec 18 09:27:51 2024
+
+@author: thesaint
+"""
+
+# src/media_registry.py
+from typing import Dict, Optional
+import hashlib
+import time
+from src.cache_engine import CacheEngine, get_cache_engine
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class MediaRegistry:
+    """Which attachment on a WordPress site already holds a file, by hash.
+
+    Entries are trusted for ``verify_after_hours``; after that the caller
+    re-checks the attachment the next time it wants to reuse it, and forgets it
+    if it is gone.
+    """
+    namespace = 'wordpress_media'
+
+    def __init__(
+        self,
+        site_url: str,
+        engine: Optional[CacheEngine] = None,
+        verify_after_hours: float = 24
+    ):
+        self.site_url = site_url
+        self.engine = engine or get_cache_engine()
+        # Forgetting an upload means uploading the same file again, so other
+        # caches filling up must not evict these entries
+        self.engine.mark_permanent(self.namespace)
+        self.verify_after = verify_after_hours * 3600
+        self.reused = 0
+        self.uploaded = 0
+
+    def _key(self, digest: str) -> str:
+        # One registry file serves every site, so the same bytes map to a media
+        # id per site
+        return f'{self.site_url}|{digest}'
+
+    def get(self, digest: str) -> Optional[Dict]:
+        return self.engine.get(self.namespace, self._key(digest))
+
+    def needs_check(self, entry: Dict) -> bool:
+        return time.time() - entry.get('checked_at', 0) > self.verify_after
+
+    def remember(
+        self, digest: str, media_id: str, url: Optional[str], filename: str
+    ) -> Dict:
+        entry = {
+            'id': str(media_id),
+            'url': url,
+            'filename': filename,
+            'checked_at': time.time()
+        }
+        self.engine.set(self.namespace, self._key(digest), entry)
+        return entry
+
+    def confirm(
+        self, digest: str, entry: Dict, url: Optional[str] = None
+    ) -> Dict:
+        entry = {
+            **entry,
+            'url': url or entry.get('url'),
+            'checked_at': time.time()
+        }
+        self.engine.set(self.namespace, self._key(digest), entry)
+        return entry
+
+    def forget(self, digest: str) -> None:
+        self.engine.delete(self.namespace, self._key(digest))
+
+    def get_stats(self) -> Dict:
+        return {'uploaded': self.uploaded, 'reused': self.reused}
@@ -8,15 +8,15 @@ Created on Tue Nov 26 01:41:57 2024
 
 # src/media_system/featured_image.py
 from typing import Dict, Optional
+import asyncio
 import logging
 from pathlib import Path
 from datetime import datetime
-from PIL import Image
-from io import BytesIO
+from src.media_system.rendition_engine import RenditionEngine
 
 class FeaturedImageHandler:
-    def __init__(self, image_optimizer):
-        self.image_optimizer = image_optimizer
+    def __init__(self, rendition_engine: Optional[RenditionEngine] = None):
+        self.rendition_engine = rendition_engine or RenditionEngine()
         self.featured_size = (1200, 630)  # Optimal size for social sharing
         self.setup_logging()
         
@@ -31,22 +31,29 @@ class FeaturedImageHandler:
         
     async def process_featured_image(self, image_data: Dict) -> Optional[Dict]:
         try:
-            # Optimize image for featured use
-            optimized = await self.image_optimizer.optimize_image(
-                image_data['data'],
-                image_data['id']
-            )
-            
-            # Additional featured image processing
-            featured = await self._prepare_featured_image(optimized)
+            # Images from ImageHandler already carry
+            # the crop made from the original decode
+            featured = image_data.get('renditions', {}).get('featured')
+            if featured is None:
+                renditions = await asyncio.to_thread(
+                    self.rendition_engine.render, image_data['data']
+                )
+                featured = renditions['featured']
             
             return {
                 'id': image_data['id'],
                 'data': featured['data'],
-                'size': self.featured_size,
+                'size': featured.get('size', self.featured_size),
                 'alt_text': self._generate_alt_text(image_data),
                 'caption': self._generate_caption(image_data)
             }
         except Exception as e:
             logging.error(f"Featured image processing failed: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+    def _generate_alt_text(self, image_data: Dict) -> str:
+        return (image_data.get('description') or '').strip()[:125]
+
+    def _generate_caption(self, image_data: Dict) -> str:
+        credit = image_data.get('credit')
+        return f"Photo by {credit['name']} on Unsplash" if credit else ''
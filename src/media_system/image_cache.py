@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Dec 16 10:14:38 2024
+
+@author: thesaint
+"""
+
+# src/media_system/image_cache.py
+from typing import Any, Dict, Optional, Union
+from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+
+DEFAULT_IMAGE_CACHE_DIR = Path('data/image_cache')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    key TEXT PRIMARY KEY,
+    source_id TEXT NOT NULL,
+    meta TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS images_accessed ON images (accessed_at);
+"""
+
+
+def cache_key(source_id: str, params: Dict) -> str:
+    """Key for one source rendered with one set of parameters."""
+    encoded = json.dumps([str(source_id), params], sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class ImageCache:
+    """Optimized images keyed by source id plus the parameters that made them.
+
+    Byte fields are stored as content-addressed blobs in a per-entry directory,
+    so a rendition identical to the primary image is written once. Everything
+    else in the image dict (description, credit, sizes) lives in a SQLite
+    sidecar index, which also tracks access times for LRU eviction under a
+    total byte budget.
+    """
+
+    def __init__(self, directory: Union[str, Path] = DEFAULT_IMAGE_CACHE_DIR,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.directory / 'index.db',
+            check_same_thread=False,
+            isolation_level=None
+        )
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, source_id: str, params: Dict) -> Optional[Dict]:
+        key = cache_key(source_id, params)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT meta FROM images WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            try:
+                image = self._restore(json.loads(row[0]), self._entry_dir(key))
+            except FileNotFoundError:
+                # A blob removed behind our back invalidates the whole entry
+                logging.warning(
+                    f"Image cache entry {source_id} "
+                    "is missing blobs, dropping it"
+                )
+                self._drop(key)
+                self.misses += 1
+                return None
+            self._conn.execute(
+                'UPDATE images SET accessed_at = ? WHERE key = ?',
+                (time.time(), key)
+            )
+            self.hits += 1
+        image['cached'] = True
+        return image
+
+    def put(self, source_id: str, params: Dict, image: Dict) -> Dict:
+        """Store ``image``; returns it with each ``data`` blob's ``path``."""
+        key = cache_key(source_id, params)
+        entry_dir = self._entry_dir(key)
+        staging = entry_dir.with_name(f'{key}.{uuid.uuid4().hex}.tmp')
+        try:
+            blobs: Dict[str, bytes] = {}
+            meta = self._strip(image, blobs)
+            staging.mkdir(parents=True)
+            for digest, data in blobs.items():
+                (staging / digest).write_bytes(data)
+            size = sum(len(data) for data in blobs.values())
+            with self._lock:
+                # The directory is complete before it becomes visible, and
+                # indexed only after that
+                if entry_dir.exists():
+                    shutil.rmtree(entry_dir)
+                os.replace(staging, entry_dir)
+                now = time.time()
+                self._conn.execute('BEGIN IMMEDIATE')
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?, ?)',
+                    (key, str(source_id), json.dumps(meta), size, now, now)
+                )
+                self._evict(keep=key)
+                self._conn.execute('COMMIT')
+            return self._with_paths(image, entry_dir)
+        except Exception as e:
+            if self._conn.in_transaction:
+                self._conn.execute('ROLLBACK')
+            shutil.rmtree(staging, ignore_errors=True)
+            logging.error(f"Failed to cache image {source_id}: {str(e)}")
+            raise
+
+    def delete(self, source_id: str, params: Dict) -> bool:
+        with self._lock:
+            return self._drop(cache_key(source_id, params))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries, total = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM images'
+            ).fetchone()
+        return {
+            'entries': entries,
+            'bytes': total,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def _strip(self, value: Any, blobs: Dict[str, bytes]) -> Any:
+        # Bytes become references to blobs named by their content hash
+        if isinstance(value, bytes):
+            digest = hashlib.sha256(value).hexdigest()
+            blobs[digest] = value
+            return {'$blob': digest}
+        if isinstance(value, dict):
+            return {
+                k: self._strip(v, blobs)
+                for k, v in value.items()
+                if k not in ('cached', 'path')
+            }
+        if isinstance(value, (list, tuple)):
+            return [self._strip(v, blobs) for v in value]
+        return value
+
+    def _restore(self, value: Any, entry_dir: Path) -> Any:
+        if isinstance(value, dict):
+            if set(value) == {'$blob'}:
+                return (entry_dir / value['$blob']).read_bytes()
+            # Image sizes go back to the tuples PIL reports
+            restored = {
+                k: (
+                    tuple(v)
+                    if k == 'size' and isinstance(v, list)
+                    else self._restore(v, entry_dir)
+                )
+                for k, v in value.items()
+            }
+            if isinstance(value.get('data'), dict) and set(value['data']) == {
+                '$blob'
+            }:
+                restored['path'] = str(entry_dir / value['data']['$blob'])
+            return restored
+        if isinstance(value, list):
+            return [self._restore(v, entry_dir) for v in value]
+        return value
+
+    def _with_paths(self, value: Any, entry_dir: Path) -> Any:
+        # Lets uploads stream a file straight
+        # from the cache instead of from memory
+        if isinstance(value, dict):
+            result = {
+                k: self._with_paths(v, entry_dir) for k, v in value.items()
+            }
+            if isinstance(value.get('data'), bytes):
+                result['path'] = str(
+                    entry_dir / hashlib.sha256(value['data']).hexdigest()
+                )
+            return result
+        return value
+
+    def _drop(self, key: str) -> bool:
+        removed = self._conn.execute(
+            'DELETE FROM images WHERE key = ?', (key,)
+        ).rowcount
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+        return removed > 0
+
+    def _evict(self, keep: str) -> None:
+        total = self._conn.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM images'
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        cursor = self._conn.execute(
+            'SELECT key, size FROM images WHERE key != ? ORDER BY accessed_at',
+            (keep,)
+        )
+        for key, size in cursor:
+            if total <= self.max_bytes:
+                break
+            evicted.append(key)
+            total -= size
+        cursor.close()
+        for key in evicted:
+            self._drop(key)
+        self.evictions += len(evicted)
+        if evicted:
+            logging.info(
+                f"Image cache evicted {len(evicted)} entries "
+                f"to stay under {self.max_bytes} bytes"
+            )
@@ -10,26 +10,80 @@ Created on Tue Nov 26 00:35:01 2024
 from PIL import Image
 from io import BytesIO
 import logging
-from typing import Dict, List
+from typing import Dict, Optional, Tuple, Union
 from pathlib import Path
+from datetime import datetime
+from src.media_system.image_cache import ImageCache
+
+
+def open_for_size(
+    source: Union[bytes, str, Path], size: Tuple[int, int]
+) -> Image.Image:
+    """Open an image decoded no larger than needed to produce ``size``.
+
+    JPEGs use DCT scaling (1/2, 1/4 or 1/8 during decode, never below
+    ``size``); other formats are box-reduced to no less than twice the fitted
+    size, like Pillow's ``reducing_gap=2``, so the final LANCZOS pass keeps its
+    quality.
+    """
+    img = Image.open(BytesIO(source) if isinstance(source, bytes) else source)
+    if img.format == 'JPEG':
+        img.draft('RGB', size)
+        return img
+    scale = min(size[0] / img.width, size[1] / img.height)
+    factor = int(1 / (scale * 2))
+    if factor >= 2:
+        if img.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+            img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+        img = img.reduce(factor)
+    return img
+
 
 class ImageOptimizer:
     def __init__(self):
         self.max_size = (800, 800)
         self.quality = 85
-        self.cache_dir = Path('data/image_cache')
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache = ImageCache()
         self.setup_logging()
         
-    async def optimize_image(self, image_data: bytes, image_id: str) -> Dict:
+    def setup_logging(self):
+        log_dir = Path('logs')
+        log_dir.mkdir(exist_ok=True)
+        logging.basicConfig(
+            filename=log_dir / f'image_optimizer_{datetime.now():%Y%m%d}.log',
+            level=logging.INFO,
+            format='%(asctime)s - %(levelname)s - %(message)s'
+        )
+
+    @property
+    def params(self) -> Dict:
+        return {'max_size': list(self.max_size), 'quality': self.quality}
+
+    def _get_cached_image(self, image_id: str) -> Optional[Dict]:
+        try:
+            return self.cache.get(image_id, self.params)
+        except Exception as e:
+            logging.error(f"Failed to read cached image: {str(e)}")
+            return None
+
+    def _cache_image(self, image_data: Dict) -> None:
+        try:
+            self.cache.put(image_data['id'], self.params, image_data)
+        except Exception as e:
+            logging.error(f"Failed to cache image: {str(e)}")
+
+    async def optimize_image(
+        self, image_data: Union[bytes, str, Path], image_id: str
+    ) -> Dict:
         try:
             # Check cache first
             cached_image = self._get_cached_image(image_id)
             if cached_image:
                 return cached_image
-                
-            # Process new image
-            img = Image.open(BytesIO(image_data))
+
+            # Process new image; local files and
+            # bytes decode straight at reduced size
+            img = open_for_size(image_data, self.max_size)
             
             # Convert to RGB if necessary
             if img.mode in ('RGBA', 'P'):
@@ -43,12 +97,14 @@ class ImageOptimizer:
                     quality=self.quality, 
                     optimize=True)
                     
-            return {
+            optimized_image = {
                 'id': image_id,
                 'data': optimized.getvalue(),
                 'format': 'jpeg',
                 'size': img.size
             }
+            self._cache_image(optimized_image)
+            return optimized_image
             
         except Exception as e:
             logging.error(f"Image optimization failed: {str(e)}")
@@ -25,21 +25,21 @@ class MediaLibrary:
             
             # Handle featured image
             if content.get('featured_image'):
-                featured_id = await self.wp.upload_media(
+                featured = await self.wp.upload_media(
                     content['featured_image']['data'],
                     f"featured-{content['featured_image']['id']}.jpg"
                 )
-                processed_content['featured_image_id'] = featured_id
+                processed_content['featured_image_id'] = featured['id']
                 
             # Handle content images
             if content.get('content_images'):
                 processed_content['image_ids'] = []
                 for img in content['content_images']:
-                    image_id = await self.wp.upload_media(
+                    uploaded = await self.wp.upload_media(
                         img['data'],
                         f"content-{img['id']}.jpg"
                     )
-                    processed_content['image_ids'].append(image_id)
+                    processed_content['image_ids'].append(uploaded['id'])
                     
             return processed_content
             
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Dec 17 11:32:05 2024
+
+@author: thesaint
+"""
+
+# src/media_system/perceptual_hash.py
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+from pathlib import Path
+import json
+import logging
+import time
+import numpy as np
+from PIL import Image
+from src.media_system.image_optimizer import open_for_size
+
+
+def dhash(source: Union[bytes, str, Path], hash_size: int = 8) -> int:
+    """64-bit difference hash: whether each pixel of a tiny grayscale copy is
+    brighter than its left neighbour. Resizing and recompression barely
+    change it."""
+    size = (hash_size + 1, hash_size)
+    img = (
+        open_for_size(source, size)
+        .convert('L')
+        .resize(size, Image.Resampling.LANCZOS)
+    )
+    pixels = np.asarray(img, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming(first: int, second: int) -> int:
+    return bin(first ^ second).count('1')
+
+
+class BKTree:
+    """Burkhard-Keller tree over a metric, so a radius search only visits the
+    subtrees the triangle inequality cannot rule out."""
+
+    def __init__(self, distance: Callable[[int, int], int] = hamming):
+        self.distance = distance
+        self.root: Optional[Tuple[int, Dict[int, tuple]]] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, item: int) -> bool:
+        if self.root is None:
+            self.root = (item, {})
+            self._size = 1
+            return True
+        node = self.root
+        while True:
+            distance = self.distance(item, node[0])
+            if distance == 0:
+                return False
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (item, {})
+                self._size += 1
+                return True
+            node = child
+
+    def search(self, item: int, radius: int) -> List[Tuple[int, int]]:
+        """(distance, item) pairs within ``radius``, closest first."""
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            value, children = stack.pop()
+            distance = self.distance(item, value)
+            if distance <= radius:
+                found.append((distance, value))
+            for edge, child in children.items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+        return sorted(found)
+
+
+class PerceptualIndex:
+    """Persistent perceptual hashes of images used on recent posts.
+
+    Hashes are appended to a JSONL file; entries older than ``window_days`` are
+    left out of the tree on load and dropped from the file once they outnumber
+    the live ones.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_distance: int = 6,
+        window_days: float = 90
+    ):
+        self.path = Path(path)
+        self.max_distance = max_distance
+        self.window = window_days * 86400
+        self.entries: Dict[str, Tuple[int, float]] = {}
+        self.by_hash: Dict[int, Set[str]] = {}
+        self.tree = BKTree()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, image_id: str) -> bool:
+        entry = self.entries.get(image_id)
+        return entry is not None and self._recent(entry[1])
+
+    def find(
+        self, phash: int, max_distance: Optional[int] = None
+    ) -> List[Tuple[str, int]]:
+        """Recently used images within ``max_distance`` bits, closest first."""
+        radius = self.max_distance if max_distance is None else max_distance
+        matches = []
+        for distance, value in self.tree.search(phash, radius):
+            for image_id in sorted(self.by_hash.get(value, ())):
+                if self._recent(self.entries[image_id][1]):
+                    matches.append((image_id, distance))
+        return matches
+
+    def add(
+        self, image_id: str, phash: int, used_at: Optional[float] = None
+    ) -> None:
+        used_at = time.time() if used_at is None else used_at
+        self._insert(image_id, phash, used_at)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(
+                json.dumps(
+                    {
+                        'id': image_id,
+                        'hash': f'{phash:016x}',
+                        'used_at': used_at
+                    }
+                )
+                + '\n'
+            )
+
+    def _recent(self, used_at: float) -> bool:
+        return used_at >= time.time() - self.window
+
+    def _insert(self, image_id: str, phash: int, used_at: float) -> None:
+        previous = self.entries.get(image_id)
+        if previous is not None and previous[0] != phash:
+            self.by_hash[previous[0]].discard(image_id)
+        self.entries[image_id] = (phash, used_at)
+        self.by_hash.setdefault(phash, set()).add(image_id)
+        self.tree.add(phash)
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        lines = torn = 0
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    lines += 1
+                    try:
+                        entry = json.loads(line)
+                        image_id = entry['id']
+                        phash = int(entry['hash'], 16)
+                        used_at = float(entry['used_at'])
+                    except (ValueError, KeyError, TypeError):
+                        # An interrupted add() leaves a partial last line
+                        torn += 1
+                        continue
+                    if self._recent(used_at):
+                        self._insert(image_id, phash, used_at)
+        except Exception as e:
+            logging.error(
+                f"Failed to load perceptual index {self.path}: {str(e)}"
+            )
+            raise
+        if torn:
+            logging.warning(f"Skipped {torn} unreadable lines in {self.path}")
+        # Rewriting drops a partial line before anything is appended to it
+        if torn or lines > 2 * len(self.entries):
+            self._rewrite()
+
+    def _rewrite(self) -> None:
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for image_id, (phash, used_at) in self.entries.items():
+                f.write(
+                    json.dumps(
+                        {
+                            'id': image_id,
+                            'hash': f'{phash:016x}',
+                            'used_at': used_at
+                        }
+                    )
+                    + '\n'
+                )
+        tmp.replace(self.path)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Dec 15 09:46:12 2024
+
+@author: thesaint
+"""
+
+# src/media_system/rendition_engine.py
+from typing import Dict, Iterable, Optional, Tuple, Union
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+import logging
+import math
+from PIL import Image, ImageOps
+from src.media_system.image_optimizer import open_for_size
+
+
+@dataclass(frozen=True)
+class RenditionSpec:
+    """One output size. ``crop`` fills the box, otherwise the image fits in it;
+    a height of 0 bounds the width only. Renditions are never upscaled."""
+    name: str
+    width: int
+    height: int = 0
+    crop: bool = False
+
+    def scale_for(self, size: Tuple[int, int]) -> float:
+        width_scale = self.width / size[0]
+        if not self.height:
+            return min(1.0, width_scale)
+        height_scale = self.height / size[1]
+        scale = (
+            max(width_scale, height_scale)
+            if self.crop
+            else min(width_scale, height_scale)
+        )
+        return min(1.0, scale)
+
+
+def default_renditions(max_width: int = 1200, max_height: int = 800,
+                       content_widths: Iterable[int] = (800, 400),
+                       thumbnail: int = 150) -> Tuple[RenditionSpec, ...]:
+    return (
+        RenditionSpec(
+            'featured', 1200, 630, crop=True
+        ),  # Optimal size for social sharing
+        RenditionSpec('large', max_width, max_height),
+        *(RenditionSpec(f'w{width}', width) for width in content_widths),
+        RenditionSpec('thumbnail', thumbnail, thumbnail, crop=True)
+    )
+
+
+class RenditionEngine:
+    """Decodes a source once and encodes every declared rendition from it.
+
+    The decode is only as large as the biggest rendition needs, so a JPEG
+    original is DCT-scaled on load and no rendition is derived from an already
+    shrunk copy.
+    """
+
+    def __init__(
+        self,
+        renditions: Tuple[RenditionSpec, ...] = None,
+        quality: int = 85,
+        webp: bool = False,
+        primary: str = 'large'
+    ):
+        self.renditions = tuple(renditions or default_renditions())
+        names = [spec.name for spec in self.renditions]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate rendition names: {names}")
+        if primary not in names:
+            raise ValueError(f"Primary rendition {primary} is not declared")
+        self.quality = quality
+        self.webp = webp
+        self.primary = primary
+
+    @classmethod
+    def from_settings(cls, settings: Dict) -> 'RenditionEngine':
+        """Build the engine from the ``[media]`` config section."""
+        widths = str(settings.get('image_content_widths', '800,400'))
+        renditions = default_renditions(
+            max_width=int(settings.get('image_max_width', 1200)),
+            max_height=int(settings.get('image_max_height', 800)),
+            content_widths=[
+                int(width) for width in widths.split(',') if width.strip()
+            ],
+            thumbnail=int(settings.get('image_thumbnail_size', 150))
+        )
+        return cls(
+            renditions,
+            quality=int(settings.get('image_quality', 85)),
+            webp=str(settings.get('image_webp', 'false')).lower()
+            in ('1', 'true', 'yes', 'on')
+        )
+
+    @property
+    def params(self) -> Dict:
+        """Everything that affects the output bytes, for cache keys."""
+        return {
+            'renditions': [
+                [spec.name, spec.width, spec.height, spec.crop]
+                for spec in self.renditions
+            ],
+            'quality': self.quality,
+            'webp': self.webp,
+            'primary': self.primary
+        }
+
+    @property
+    def max_width(self) -> int:
+        return max(spec.width for spec in self.renditions)
+
+    def source_size(self, size: Tuple[int, int]) -> Tuple[int, int]:
+        """The smallest copy of a ``size`` source that still holds every
+        rendition at full resolution."""
+        scale = max(spec.scale_for(size) for spec in self.renditions)
+        return (math.ceil(size[0] * scale), math.ceil(size[1] * scale))
+
+    def spec(self, name: str) -> Optional[RenditionSpec]:
+        return next(
+            (spec for spec in self.renditions if spec.name == name), None
+        )
+
+    def render(self, source: Union[bytes, str, Path]) -> Dict[str, Dict]:
+        """Every rendition of ``source`` by name, each with its JPEG ``data``
+        and ``size`` (plus ``webp`` bytes when enabled)."""
+        try:
+            img = self._decode(source)
+            renditions = {}
+            for spec in self.renditions:
+                renditions[spec.name] = self._encode(self._resize(img, spec))
+            return renditions
+        except Exception as e:
+            logging.error(f"Rendition failed: {str(e)}")
+            raise
+
+    def _decode(self, source: Union[bytes, str, Path]) -> Image.Image:
+        # Opening only reads the header; the pixels
+        # are decoded once, at the size needed
+        with Image.open(
+            BytesIO(source) if isinstance(source, bytes) else source
+        ) as header:
+            size = header.size
+        img = open_for_size(source, self.source_size(size))
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        img.load()
+        return img
+
+    def _resize(self, img: Image.Image, spec: RenditionSpec) -> Image.Image:
+        if spec.crop:
+            ratio = spec.width / spec.height
+            # Sources smaller than the box are cropped
+            # to its shape at their own resolution
+            crop_width = min(img.width, img.height * ratio)
+            width = max(1, min(spec.width, round(crop_width)))
+            size = (width, max(1, round(width / ratio)))
+            return ImageOps.fit(img, size, Image.Resampling.LANCZOS)
+        scale = spec.scale_for(img.size)
+        size = (
+            max(1, round(img.width * scale)),
+            max(1, round(img.height * scale))
+        )
+        return (
+            img
+            if size == img.size
+            else img.resize(size, Image.Resampling.LANCZOS)
+        )
+
+    def _encode(self, img: Image.Image) -> Dict:
+        output = BytesIO()
+        img.save(output, format='JPEG', quality=self.quality, optimize=True)
+        rendition = {
+            'data': output.getvalue(),
+            'format': 'jpeg',
+            'size': img.size
+        }
+        if self.webp:
+            output = BytesIO()
+            img.save(output, format='WEBP', quality=self.quality, method=4)
+            rendition['webp'] = output.getvalue()
+        return rendition
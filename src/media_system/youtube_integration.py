@@ -13,12 +13,15 @@ import logging
 from datetime import datetime
 from typing import Dict, List, Optional
 from pathlib import Path
+import asyncio
+from src.single_flight import SingleFlight, normalize_key
 
 class YouTubeIntegrator:
     def __init__(self, config_manager):
         self.api_key = config_manager.get_credentials('youtube')['api_key']
         self.youtube = build('youtube', 'v3', developerKey=self.api_key)
         self.max_results = 5  # Number of videos to search
+        self.single_flight = SingleFlight('youtube_search')
         self.setup_logging()
         
     def setup_logging(self):
@@ -60,19 +63,27 @@ class YouTubeIntegrator:
     async def _search_videos(self, topic: str, keywords: List[str]) -> Dict:
         search_query = f"{topic} {' '.join(keywords)}"
         try:
-            return self.youtube.search().list(
-                q=search_query,
-                part='snippet',
-                type='video',
-                maxResults=self.max_results,
-                videoEmbeddable='true',
-                videoSyndicated='true',
-                safeSearch='strict'
-            ).execute()
+            return await self.single_flight.do(
+                normalize_key(search_query, self.max_results),
+                asyncio.to_thread,
+                self._execute_search,
+                search_query
+            )
         except Exception as e:
             logging.error(f"Video search failed: {str(e)}")
             raise
             
+    def _execute_search(self, search_query: str) -> Dict:
+        return self.youtube.search().list(
+            q=search_query,
+            part='snippet',
+            type='video',
+            maxResults=self.max_results,
+            videoEmbeddable='true',
+            videoSyndicated='true',
+            safeSearch='strict'
+        ).execute()
+
     async def _select_best_match(self, videos: List[Dict], keywords: List[str]) -> Optional[Dict]:
         try:
             scored_videos = []
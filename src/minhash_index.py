@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Dec 11 10:42:19 2024
+
+@author: thesaint
+"""
+
+# src/minhash_index.py
+from typing import Dict, Iterable, List, Tuple, Union
+from pathlib import Path
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import zlib
+import numpy as np
+from src.text_analysis import TOKEN_PATTERN
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS signatures (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    signature BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS buckets (
+    bucket INTEGER NOT NULL,
+    id INTEGER NOT NULL,
+    PRIMARY KEY (bucket, id)
+) WITHOUT ROWID;
+"""
+
+
+def hash_shingles(text: str, size: int = 3) -> np.ndarray:
+    """Sorted, unique crc32 hashes of the word n-grams in ``text``."""
+    words = TOKEN_PATTERN.findall(text.lower())
+    k = min(size, len(words)) or 1
+    grams = {
+        ' '.join(words[i: i + k]) for i in range(max(len(words) - k + 1, 1))
+    }
+    return np.unique(
+        np.fromiter(
+            (zlib.crc32(gram.encode()) for gram in grams),
+            dtype=np.uint32,
+            count=len(grams)
+        )
+    )
+
+
+class MinHashLSHIndex:
+    """Persistent MinHash signatures in LSH band buckets for near-duplicates.
+
+    With 96 permutations in 32 bands of 3 rows, texts whose shingle Jaccard
+    similarity is above roughly 0.3 land in a shared bucket; everything else is
+    never compared. Signatures and buckets live in SQLite, each band hashed to
+    one 64-bit bucket id, so nothing is loaded up front and a query is a single
+    index lookup.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        num_perm: int = 96,
+        bands: int = 32,
+        shingle_size: int = 3,
+        seed: int = 1
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.path = Path(path)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.seed = seed
+        # Fixed seed keeps stored signatures comparable across runs
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MAX_HASH, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MAX_HASH, size=num_perm, dtype=np.uint64)
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._check_params()
+
+    @property
+    def params(self) -> Dict:
+        return {'num_perm': self.num_perm, 'bands': self.bands,
+                'shingle_size': self.shingle_size, 'seed': self.seed}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                'SELECT COUNT(*) FROM signatures'
+            ).fetchone()[0]
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return (
+                self._conn.execute(
+                    'SELECT 1 FROM signatures WHERE key = ?', (key,)
+                ).fetchone()
+                is not None
+            )
+
+    def shingles(self, text: str) -> np.ndarray:
+        return hash_shingles(text, self.shingle_size)
+
+    def signature(self, text: str) -> np.ndarray:
+        return self.signature_from_hashes(self.shingles(text))
+
+    def signature_from_hashes(self, hashes: np.ndarray) -> np.ndarray:
+        hashes = hashes.astype(np.uint64, copy=False)
+        # a * h + b stays below 2**64 because every operand is below 2**32
+        permuted = (
+            self._a[:, None] * hashes[None, :] + self._b[:, None]
+        ) % MERSENNE_PRIME
+        return (permuted & MAX_HASH).min(axis=1).astype(np.uint32)
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT signature FROM signatures WHERE key = ?', (key,)
+            ).fetchone()
+        return None if row is None else np.frombuffer(row[0], dtype=np.uint32)
+
+    def add(self, key: str, signature: np.ndarray) -> None:
+        self.add_many([(key, signature)])
+
+    def add_many(self, items: Iterable[Tuple[str, np.ndarray]]) -> None:
+        """Index several signatures in one transaction, skipping known keys."""
+        items = list(items)
+        with self._lock:
+            try:
+                self._conn.execute('BEGIN IMMEDIATE')
+                for key, signature in items:
+                    cursor = self._conn.execute(
+                        'INSERT OR IGNORE INTO signatures '
+                        '(key, signature) VALUES (?, ?)',
+                        (key, signature.astype(np.uint32).tobytes())
+                    )
+                    if cursor.rowcount:
+                        self._conn.executemany(
+                            'INSERT OR IGNORE INTO buckets VALUES (?, ?)',
+                            [
+                                (bucket, cursor.lastrowid)
+                                for bucket in self._buckets(signature)
+                            ]
+                        )
+                self._conn.execute('COMMIT')
+            except Exception as e:
+                self._conn.execute('ROLLBACK')
+                logging.error(f"MinHash index write failed: {str(e)}")
+                raise
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT id, signature FROM signatures WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return
+            row_id, signature = row
+            try:
+                self._conn.execute('BEGIN IMMEDIATE')
+                self._conn.executemany(
+                    'DELETE FROM buckets WHERE bucket = ? AND id = ?',
+                    [
+                        (bucket, row_id)
+                        for bucket in self._buckets(
+                            np.frombuffer(signature, dtype=np.uint32)
+                        )
+                    ]
+                )
+                self._conn.execute(
+                    'DELETE FROM signatures WHERE id = ?', (row_id,)
+                )
+                self._conn.execute('COMMIT')
+            except Exception as e:
+                self._conn.execute('ROLLBACK')
+                logging.error(
+                    f"MinHash index removal failed for {key}: {str(e)}"
+                )
+                raise
+
+    def query(self, signature: np.ndarray) -> List[str]:
+        buckets = self._buckets(signature)
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT DISTINCT s.key FROM buckets '
+                'b JOIN signatures s ON s.id = b.id '
+                f'WHERE b.bucket IN ({", ".join("?" * len(buckets))})',
+                buckets
+            ).fetchall()
+        return sorted(row[0] for row in rows)
+
+    def estimate_similarity(
+        self, first: np.ndarray, second: np.ndarray
+    ) -> float:
+        return float(np.mean(first == second))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _buckets(self, signature: np.ndarray) -> List[int]:
+        # The band number is part of the hash, so
+        # equal rows in different bands never collide
+        signature = signature.astype(np.uint32, copy=False)
+        return [
+            int.from_bytes(
+                hashlib.blake2b(
+                    band.to_bytes(2, 'little')
+                    + signature[
+                        band * self.rows: (band + 1) * self.rows
+                    ].tobytes(),
+                    digest_size=8
+                ).digest(),
+                'little',
+                signed=True
+            )
+            for band in range(self.bands)
+        ]
+
+    def _check_params(self) -> None:
+        params = json.dumps(self.params, sort_keys=True)
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE name = 'params'"
+        ).fetchone()
+        if row is not None and row[0] == params:
+            return
+        if row is not None:
+            # Signatures built with other parameters
+            # are not comparable; callers re-index
+            logging.warning(
+                f"MinHash index parameters changed, rebuilding {self.path}"
+            )
+        with self._lock:
+            try:
+                self._conn.execute('BEGIN IMMEDIATE')
+                self._conn.execute('DELETE FROM buckets')
+                self._conn.execute('DELETE FROM signatures')
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('params', ?)",
+                    (params,)
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Dec  6 14:38:52 2024
+
+@author: thesaint
+"""
+
+# src/nlp_service.py
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import multiprocessing
+import os
+from datetime import datetime
+from pathlib import Path
+
+# Each worker process keeps its own validator
+# so the spaCy model is loaded once per process
+_worker_validator = None
+
+
+def _init_worker(model_name: str) -> None:
+    global _worker_validator
+    from src.advanced_quality_validator import AdvancedQualityValidator
+    _worker_validator = AdvancedQualityValidator(model_name)
+
+
+def _validate_one(content: str) -> Dict:
+    return _worker_validator.validate_content_quality(content)
+
+
+def _validate_batch(contents: List[str]) -> List[Dict]:
+    return _worker_validator.validate_batch(contents)
+
+
+class NLPValidationService:
+    """Runs AdvancedQualityValidator in a process pool, off the event loop."""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        model_name: str = 'en_core_web_sm',
+        batch_size: int = 4
+    ):
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.model_name = model_name
+        self.batch_size = batch_size
+        # spawn keeps worker processes free of
+        # the parent's event loop and threads
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(model_name,)
+        )
+        self.setup_logging()
+
+    def setup_logging(self):
+        log_dir = Path('logs')
+        log_dir.mkdir(exist_ok=True)
+        logging.basicConfig(
+            filename=log_dir / f'nlp_service_{datetime.now():%Y%m%d}.log',
+            level=logging.INFO,
+            format='%(asctime)s - %(levelname)s - %(message)s'
+        )
+
+    def submit(self, content: str) -> asyncio.Future:
+        return asyncio.get_running_loop().run_in_executor(
+            self.executor, _validate_one, content
+        )
+
+    def submit_batch(self, contents: List[str]) -> asyncio.Future:
+        return asyncio.get_running_loop().run_in_executor(
+            self.executor, _validate_batch, list(contents)
+        )
+
+    async def validate_content_quality(self, content: str) -> Dict:
+        try:
+            return await self.submit(content)
+        except Exception as e:
+            logging.error(f"Quality validation failed: {str(e)}")
+            raise
+
+    async def validate_many(self, contents: List[str]) -> List[Dict]:
+        try:
+            # Batches go to different workers; each
+            # worker runs nlp.pipe over its batch
+            batches = [
+                contents[i: i + self.batch_size]
+                for i in range(0, len(contents), self.batch_size)
+            ]
+            results = await asyncio.gather(
+                *[self.submit_batch(batch) for batch in batches]
+            )
+            return [report for batch in results for report in batch]
+        except Exception as e:
+            logging.error(f"Batch quality validation failed: {str(e)}")
+            raise
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.executor.shutdown(wait=wait, cancel_futures=True)
@@ -7,42 +7,46 @@ Created on Mon Nov 25 18:21:16 2024
 """
 
 # src/quality_assurance.py
-from typing import Dict, List
-import re
+from typing import Dict, List, Union
 import nltk
-from textblob import TextBlob
+from src.text_analysis import AnalyzedDocument, analyze_text
+from src.data_processing.keyword_matcher import match_keywords
 
 class ContentQualityAssurance:
     def __init__(self):
         nltk.download('punkt')
         nltk.download('averaged_perceptron_tagger')
-        
-    def analyze_content(self, content: str, keywords: List[str]) -> Dict:
+
+    def analyze_content(
+        self, content: Union[str, AnalyzedDocument], keywords: List[str]
+    ) -> Dict:
+        doc = analyze_text(content)
         return {
-            'readability_metrics': self._check_readability(content),
-            'keyword_optimization': self._analyze_keywords(content, keywords),
-            'content_structure': self._analyze_structure(content),
-            'engagement_metrics': self._measure_engagement(content)
+            'readability_metrics': self._check_readability(doc),
+            'keyword_optimization': self._analyze_keywords(doc, keywords),
+            'content_structure': self._analyze_structure(doc),
+            'engagement_metrics': self._measure_engagement(doc)
         }
         
-    def _check_readability(self, content: str) -> Dict:
-        sentences = nltk.sent_tokenize(content)
-        words_per_sentence = len(content.split()) / len(sentences)
+    def _check_readability(self, doc: AnalyzedDocument) -> Dict:
+        words_per_sentence = doc.word_count / len(doc.sentences)
         
         return {
             'avg_sentence_length': words_per_sentence,
-            'paragraph_count': len(content.split('\n\n')),
-            'readability_score': self._calculate_readability_score(content)
+            'paragraph_count': len(doc.paragraphs),
+            'readability_score': self._calculate_readability_score(doc)
         }
-        
-    def _analyze_keywords(self, content: str, keywords: List[str]) -> Dict:
+
+    def _analyze_keywords(
+        self, doc: AnalyzedDocument, keywords: List[str]
+    ) -> Dict:
         keyword_density = {}
-        for keyword in keywords:
-            count = len(re.findall(rf'\b{keyword}\b', content, re.IGNORECASE))
-            density = count / len(content.split())
-            keyword_density[keyword] = density
+        for keyword, count in match_keywords(doc, keywords).counts.items():
+            keyword_density[keyword] = count / doc.word_count
             
         return {
             'keyword_density': keyword_density,
-            'keyword_in_headings': self._check_keywords_in_headings(content, keywords)
-        }
\ No newline at end of file
+            'keyword_in_headings': self._check_keywords_in_headings(
+                doc, keywords
+            )
+        }
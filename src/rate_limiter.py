@@ -7,12 +7,16 @@ Created on Mon Nov 25 17:59:02 2024
 """
 
 # src/rate_limiter.py
-from datetime import datetime, timedelta
 import asyncio
+import heapq
+import itertools
 import logging
-from typing import Dict, List, Optional
-from collections import defaultdict, deque
-from dataclasses import dataclass
+import re
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Hashable, List, Mapping, Optional, Tuple
+from collections import defaultdict
+from dataclasses import dataclass, field
 
 @dataclass
 class RateLimit:
@@ -20,9 +24,139 @@ class RateLimit:
     requests_per_hour: int
     base_retry_delay: int
     max_retry_attempts: int
+    # Requests allowed back to back, one by default. The rest of the window's
+    # budget is spaced out, so no rolling window ever admits more than its
+    # limit; a larger burst means a slower steady rate.
+    burst: Optional[int] = None
+
+
+class GCRA:
+    """Generic cell rate algorithm: ``limit`` requests per ``period`` in O(1).
+
+    Two theoretical arrival times are kept. ``tat`` books one ``interval`` of
+    the window per request and tracks how much of the window is in use, which
+    provider reports can also set. ``spaced_tat`` lets ``burst`` requests go
+    back to back and spaces the other ``limit - burst`` over the period, so
+    any ``period`` seconds hold at most ``limit`` requests.
+    """
+
+    def __init__(
+        self, limit: float, period: float, burst: Optional[int] = None
+    ):
+        self.period = period
+        self.burst_setting = burst
+        self.tat = 0.0
+        self.spaced_tat = 0.0
+        self.set_limit(limit)
+
+    def set_limit(self, limit: float) -> None:
+        # The next arrival times are kept, so the new rate applies from the
+        # next request
+        self.limit = limit
+        self.burst = max(1.0, min(self.burst_setting or 1, int(limit)))
+        self.interval = self.period / limit
+        self.spacing = self.period / max(1.0, limit - self.burst + 1)
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a request would be allowed, or 0 if it is now."""
+        booked = max(self.tat, now) + self.interval - self.period
+        spaced = (
+            max(self.spaced_tat, now) + self.spacing
+            - self.burst * self.spacing
+        )
+        return max(0.0, booked - now, spaced - now)
+
+    def consume(self, now: float) -> None:
+        self.tat = max(self.tat, now) + self.interval
+        self.spaced_tat = max(self.spaced_tat, now) + self.spacing
+
+    def remaining(self, now: float) -> int:
+        """Requests that could go back to back right now."""
+        booked = (now + self.period - max(self.tat, now)) / self.interval
+        spaced = (
+            now + self.burst * self.spacing - max(self.spaced_tat, now)
+        ) / self.spacing
+        return max(0, min(int(booked + 1e-9), int(spaced + 1e-9)))
+
+    def used(self, now: float) -> int:
+        """Requests still counted against the window."""
+        return (
+            min(
+                int(self.limit),
+                int(max(0.0, self.tat - now) / self.interval + 1 - 1e-9)
+            )
+            if self.tat > now
+            else 0
+        )
+
+    def sync(self, remaining: int, now: float) -> None:
+        """Allow only the ``remaining`` requests the provider reports."""
+        remaining = max(0, min(remaining, int(self.limit)))
+        self.tat = max(
+            self.tat, now + (self.limit - remaining) * self.interval
+        )
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """Seconds in a duration such as ``20ms``, ``1s`` or ``6m0s``."""
+    parts = re.findall(r'(\d+(?:\.\d+)?)(ms|h|m|s)', value or '')
+    if not parts:
+        return None
+    scale = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a ``Retry-After`` of seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class _ApiState:
+    minute: GCRA
+    hour: GCRA
+    # Heap of (priority, fair tag, sequence, future)
+    waiters: List[Tuple[int, float, int, asyncio.Future]]
+    timer: Optional[asyncio.TimerHandle] = None
+    virtual_time: float = 0.0
+    caller_tags: Dict[Hashable, float] = field(default_factory=dict)
+    # Capacity each window may ramp up to: the provider's reported limit, else
+    # the configured one
+    ceilings: Dict[str, float] = field(default_factory=dict)
+    paused_until: float = 0.0
+    throttles: int = 0
 
 class EnhancedRateLimiter:
-    def __init__(self):
+    """Per-API request limits with a priority wait queue.
+
+    Each API has a per-minute and a per-hour GCRA window, so admission costs
+    the same no matter how many requests were made. Callers that cannot go now
+    wait in a heap and are woken, in order, at the moment both windows have
+    room: lower ``priority`` values go first, and within a priority each
+    ``caller`` gets its turn in rotation so one busy caller cannot starve the
+    rest.
+
+    With ``adaptive`` on, ``record_response`` tunes the live limits from what
+    providers report (AIMD): each success adds a step of the window's capacity,
+    a 429 halves the rate and pauses the API for its ``Retry-After``, and
+    reported limits and remaining counts become the ceiling and current usage
+    of the matching window.
+    """
+
+    def __init__(
+        self,
+        config_manager=None,
+        api_limits: Optional[Dict[str, RateLimit]] = None
+    ):
         # API-specific configurations
         self.api_limits = {
             'openai': RateLimit(20, 1000, 2, 5),
@@ -30,12 +164,33 @@ class EnhancedRateLimiter:
             'youtube': RateLimit(100, 1000, 1, 3),
             'wordpress': RateLimit(30, 300, 3, 4)
         }
-        
-        # Request tracking and queuing
-        self.request_history = defaultdict(list)
-        self.request_queues = {api: deque() for api in self.api_limits.keys()}
+        self.api_limits.update(api_limits or {})
+        self.adaptive = True
+        # Fraction of a window's capacity added per success, and the factor
+        # applied on a 429
+        self.increase = 0.05
+        self.decrease = 0.5
+        # Tokens kept back from OpenAI's per-minute
+        # budget before holding requests
+        self.token_reserve = 0.05
+        self._apply_config(config_manager)
+
+        self.states = {
+            api: self._new_state(limit)
+            for api, limit in self.api_limits.items()
+        }
+        self._sequence = itertools.count()
         self.quota_warnings = defaultdict(int)
-        
+        self.metrics = defaultdict(
+            lambda: {
+                'acquired': 0,
+                'waited': 0,
+                'timeouts': 0,
+                'total_wait': 0.0,
+                'max_wait': 0.0
+            }
+        )
+
         self.setup_logging()
 
     def setup_logging(self):
@@ -45,76 +200,293 @@ class EnhancedRateLimiter:
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
 
-    async def acquire(self, api_name: str, priority: int = 1) -> bool:
+    def _apply_config(self, config_manager) -> None:
+        # e.g. openai_requests_per_minute = 20 in [rate_limits]
         try:
-            # Add request to queue
-            await self._enqueue_request(api_name, priority)
-            
-            # Process queue
-            while self.request_queues[api_name]:
-                if await self._can_process_request(api_name):
-                    self.request_queues[api_name].popleft()
-                    await self._record_request(api_name)
-                    return True
-                else:
-                    await self._apply_backoff(api_name)
-            
-            return False
-            
+            settings = (
+                dict(config_manager.get_credentials('rate_limits'))
+                if config_manager
+                else {}
+            )
+        except Exception:
+            settings = {}
+        self.adaptive = str(
+            settings.get('adaptive', self.adaptive)
+        ).lower() in ('true', '1', 'yes', 'on')
+        self.increase = float(settings.get('adaptive_increase', self.increase))
+        self.decrease = float(settings.get('adaptive_decrease', self.decrease))
+        for key, value in settings.items():
+            api, _, setting = key.partition('_')
+            if api in self.api_limits and setting in (
+                'requests_per_minute',
+                'requests_per_hour'
+            ):
+                setattr(self.api_limits[api], setting, int(value))
+
+    def _new_state(self, limit: RateLimit) -> _ApiState:
+        return _ApiState(
+            minute=GCRA(limit.requests_per_minute, 60, limit.burst),
+            hour=GCRA(limit.requests_per_hour, 3600, limit.burst),
+            waiters=[],
+            ceilings={
+                'minute': limit.requests_per_minute,
+                'hour': limit.requests_per_hour
+            }
+        )
+
+    async def acquire(
+        self,
+        api_name: str,
+        priority: int = 1,
+        caller: Hashable = None,
+        timeout: Optional[float] = None
+    ) -> bool:
+        """Wait for a request slot; False if ``timeout`` passes first."""
+        try:
+            state = self.states[api_name]
+            now = time.monotonic()
+            if not state.waiters and self._wait_time(state, now) == 0:
+                self._admit(api_name, state, now, 0.0)
+                return True
+
+            future = asyncio.get_running_loop().create_future()
+            enqueued_at = now
+            heapq.heappush(
+                state.waiters,
+                (
+                    priority,
+                    self._fair_tag(state, caller),
+                    next(self._sequence),
+                    future
+                )
+            )
+            self._monitor_queue_size(api_name)
+            self._schedule(api_name, state)
+            try:
+                await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                self.metrics[api_name]['timeouts'] += 1
+                logging.warning(
+                    f"{api_name} rate limit wait timed out after {timeout}s"
+                )
+                return False
+            wait = time.monotonic() - enqueued_at
+            metrics = self.metrics[api_name]
+            metrics['waited'] += 1
+            metrics['total_wait'] += wait
+            metrics['max_wait'] = max(metrics['max_wait'], wait)
+            return True
+
         except Exception as e:
             logging.error(f"Rate limiter error for {api_name}: {str(e)}")
             return False
 
-    async def _enqueue_request(self, api_name: str, priority: int) -> None:
-        # Priority queue implementation
-        self.request_queues[api_name].append((priority, datetime.now()))
-        self._monitor_queue_size(api_name)
-
-    async def _can_process_request(self, api_name: str) -> bool:
-        current_time = datetime.now()
-        await self._clean_history(api_name, current_time)
-        
-        minute_requests = self._count_recent_requests(api_name, minutes=1)
-        hour_requests = len(self.request_history[api_name])
-        
-        return (minute_requests < self.api_limits[api_name].requests_per_minute and
-                hour_requests < self.api_limits[api_name].requests_per_hour)
-
-    async def _apply_backoff(self, api_name: str) -> None:
-        attempts = self.quota_warnings[api_name]
-        if attempts < self.api_limits[api_name].max_retry_attempts:
-            delay = self.api_limits[api_name].base_retry_delay * (2 ** attempts)
-            self.quota_warnings[api_name] += 1
-            logging.warning(f"{api_name} rate limit backoff: {delay}s")
-            await asyncio.sleep(delay)
-        else:
-            raise Exception(f"Max retry attempts reached for {api_name}")
+    def _fair_tag(self, state: _ApiState, caller: Hashable) -> float:
+        # Start-time fair queuing: a caller's next request queues behind its
+        # previous one, but never behind requests already served. Anonymous
+        # requests each count as a new caller.
+        if caller is None:
+            return state.virtual_time + 1
+        tag = max(state.virtual_time, state.caller_tags.get(caller, 0.0)) + 1
+        state.caller_tags[caller] = tag
+        return tag
+
+    def _wait_time(self, state: _ApiState, now: float) -> float:
+        return max(
+            state.minute.wait_time(now),
+            state.hour.wait_time(now),
+            state.paused_until - now
+        )
 
-    async def _record_request(self, api_name: str) -> None:
-        self.request_history[api_name].append(datetime.now())
+    def _admit(
+        self, api_name: str, state: _ApiState, now: float, tag: float
+    ) -> None:
+        state.minute.consume(now)
+        state.hour.consume(now)
+        state.virtual_time = max(state.virtual_time, tag)
+        self.metrics[api_name]['acquired'] += 1
         self._update_quota_status(api_name)
 
+    def _schedule(self, api_name: str, state: _ApiState) -> None:
+        if state.timer is not None:
+            state.timer.cancel()
+            state.timer = None
+        now = time.monotonic()
+        while state.waiters:
+            priority, tag, _, future = state.waiters[0]
+            if future.done():
+                # Timed out or cancelled while queued
+                heapq.heappop(state.waiters)
+                continue
+            wait = self._wait_time(state, now)
+            if wait > 0:
+                state.timer = asyncio.get_running_loop().call_later(
+                    wait, self._schedule, api_name, state
+                )
+                return
+            heapq.heappop(state.waiters)
+            self._admit(api_name, state, now, tag)
+            future.set_result(True)
+        # With nobody queued every caller starts level again
+        state.caller_tags.clear()
+
+    def record_response(
+        self, api_name: str, status: int, headers: Mapping[str, str]
+    ) -> None:
+        """Adjust ``api_name``'s live limits from one response."""
+        state = self.states.get(api_name)
+        if state is None or not self.adaptive:
+            return
+        try:
+            now = time.monotonic()
+            headers = {key.lower(): value for key, value in headers.items()}
+            if status == 429 or (status == 503 and 'retry-after' in headers):
+                self._throttled(
+                    api_name,
+                    state,
+                    parse_retry_after(headers.get('retry-after')),
+                    now
+                )
+            else:
+                # OpenAI reports its per-minute request
+                # budget, Unsplash its hourly one
+                self._observe_window(
+                    state,
+                    'minute',
+                    headers.get('x-ratelimit-limit-requests'),
+                    headers.get('x-ratelimit-remaining-requests'),
+                    headers.get('x-ratelimit-reset-requests'),
+                    now
+                )
+                self._observe_window(
+                    state,
+                    'hour',
+                    headers.get('x-ratelimit-limit'),
+                    headers.get('x-ratelimit-remaining'),
+                    None,
+                    now
+                )
+                self._observe_tokens(state, headers, now)
+                if status < 400:
+                    state.throttles = 0
+                    self._increase(state)
+            if state.waiters:
+                self._schedule(api_name, state)
+        except Exception as e:
+            logging.error(f"Could not adapt {api_name} rate limit: {str(e)}")
+
+    def _observe_window(
+        self,
+        state: _ApiState,
+        name: str,
+        limit: Optional[str],
+        remaining: Optional[str],
+        reset: Optional[str],
+        now: float
+    ) -> None:
+        window = getattr(state, name)
+        if limit:
+            state.ceilings[name] = float(limit)
+            if window.limit > state.ceilings[name]:
+                window.set_limit(state.ceilings[name])
+        if remaining is not None:
+            window.sync(int(float(remaining)), now)
+            delay = (
+                parse_duration(reset) if int(float(remaining)) == 0 else None
+            )
+            if delay:
+                state.paused_until = max(state.paused_until, now + delay)
+
+    def _observe_tokens(
+        self, state: _ApiState, headers: Dict[str, str], now: float
+    ) -> None:
+        # Requests are what we count, so running out of tokens just holds them
+        # until the reset
+        limit, remaining = headers.get(
+            'x-ratelimit-limit-tokens'
+        ), headers.get('x-ratelimit-remaining-tokens')
+        if (
+            limit
+            and remaining is not None
+            and float(remaining) <= float(limit) * self.token_reserve
+        ):
+            delay = parse_duration(headers.get('x-ratelimit-reset-tokens'))
+            if delay:
+                state.paused_until = max(state.paused_until, now + delay)
+
+    def _increase(self, state: _ApiState) -> None:
+        for name in ('minute', 'hour'):
+            window, ceiling = getattr(state, name), state.ceilings[name]
+            if window.limit < ceiling:
+                window.set_limit(
+                    min(
+                        ceiling,
+                        window.limit + max(1.0, ceiling * self.increase)
+                    )
+                )
+
+    def _throttled(
+        self,
+        api_name: str,
+        state: _ApiState,
+        retry_after: Optional[float],
+        now: float
+    ) -> None:
+        limit = self.api_limits[api_name]
+        if retry_after is None:
+            retry_after = limit.base_retry_delay * 2 ** min(
+                state.throttles, limit.max_retry_attempts
+            )
+        if now >= state.paused_until:
+            # Responses to requests sent before
+            # the pause do not cut the rate again
+            state.throttles += 1
+            for name in ('minute', 'hour'):
+                window = getattr(state, name)
+                window.set_limit(max(1.0, window.limit * self.decrease))
+        state.paused_until = max(state.paused_until, now + retry_after)
+        logging.warning(
+            f"{api_name} throttled; pausing {retry_after:.1f}s at "
+            f"{state.minute.limit:.1f}/min, {state.hour.limit:.1f}/hour"
+        )
+
     def _update_quota_status(self, api_name: str) -> None:
-        hour_usage = len(self.request_history[api_name])
+        state = self.states[api_name]
+        hour_usage = state.hour.used(time.monotonic())
         hour_limit = self.api_limits[api_name].requests_per_hour
-        
+
         usage_percentage = (hour_usage / hour_limit) * 100
         if usage_percentage >= 80:
+            self.quota_warnings[api_name] += 1
             logging.warning(f"{api_name} quota usage at {usage_percentage:.1f}%")
 
     def _monitor_queue_size(self, api_name: str) -> None:
-        queue_size = len(self.request_queues[api_name])
+        queue_size = len(self.states[api_name].waiters)
         if queue_size > 100:  # Arbitrary threshold
             logging.warning(f"Large queue size for {api_name}: {queue_size} requests")
 
     async def get_status(self, api_name: str) -> Dict:
+        state = self.states[api_name]
+        now = time.monotonic()
+        metrics = self.metrics[api_name]
         return {
-            'queue_size': len(self.request_queues[api_name]),
-            'hour_usage': len(self.request_history[api_name]),
-            'minute_usage': self._count_recent_requests(api_name, minutes=1),
-            'quota_warnings': self.quota_warnings[api_name]
+            'queue_size': sum(
+                1 for waiter in state.waiters if not waiter[3].done()
+            ),
+            'hour_usage': state.hour.used(now),
+            'minute_usage': state.minute.used(now),
+            'next_slot_in': self._wait_time(state, now),
+            'live_limits': {
+                'minute': state.minute.limit,
+                'hour': state.hour.limit
+            },
+            'ceilings': dict(state.ceilings),
+            'paused_for': max(0.0, state.paused_until - now),
+            'quota_warnings': self.quota_warnings[api_name],
+            **metrics,
+            'avg_wait': (
+                metrics['total_wait'] / metrics['waited']
+                if metrics['waited']
+                else 0
+            )
         }
-
-    def _count_recent_requests(self, api_name: str, minutes: int) -> int:
-        cutoff = datetime.now() - timedelta(minutes=minutes)
-        return sum(1 for time in self.request_history[api_name] if time > cutoff)
\ No newline at end of file
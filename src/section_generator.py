@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Dec  5 11:26:08 2024
+
+@author: thesaint
+"""
+
+# src/section_generator.py
+from typing import Dict, List, Optional
+import asyncio
+import json
+import logging
+import re
+
+FRAME_SECTIONS = {
+    'intro': ('introduction', 'intro', 'overview'),
+    'faq': ('faq', 'faqs', 'frequently asked questions'),
+    'conclusion': ('conclusion', 'summary', 'final thoughts')
+}
+
+
+class SectionedArticleGenerator:
+    """Generates an outline, then writes every H2 section concurrently."""
+
+    def __init__(
+        self,
+        engine,
+        temperature: float = 0.9,
+        max_tokens: int = 4000,
+        section_retries: int = 2
+    ):
+        self.engine = engine
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.section_retries = section_retries
+
+    async def generate(
+        self, topic: str, keywords: Dict, outline: Optional[List[str]] = None
+    ) -> str:
+        try:
+            if outline:
+                title, headings = topic, self._body_headings(outline)
+            else:
+                title, headings = await self._generate_outline(topic, keywords)
+            if not headings:
+                raise ValueError(f"Outline for '{topic}' has no body sections")
+
+            word_count = int(keywords.get('word_count', 3200))
+            section_words = max(150, int(word_count * 0.8) // len(headings))
+            frame_words = max(100, int(word_count * 0.2) // 3)
+
+            # Intro, FAQ and conclusion only need the outline, so they run
+            # alongside the body
+            parts = await asyncio.gather(
+                self._write(
+                    'introduction',
+                    self._intro_prompt(topic, keywords, headings, frame_words),
+                    frame_words
+                ),
+                *[
+                    self._write(
+                        heading,
+                        self._section_prompt(
+                            topic, keywords, headings, heading, section_words
+                        ),
+                        section_words
+                    )
+                    for heading in headings
+                ],
+                self._write(
+                    'faq',
+                    self._faq_prompt(topic, keywords, headings, frame_words),
+                    frame_words
+                ),
+                self._write(
+                    'conclusion',
+                    self._conclusion_prompt(
+                        topic, keywords, headings, frame_words
+                    ),
+                    frame_words
+                )
+            )
+            return self._stitch(title, headings, parts)
+        except Exception as e:
+            logging.error(f"Sectioned generation failed: {str(e)}")
+            raise
+
+    def parse_outline(self, outline: Optional[str]) -> List[str]:
+        if not outline or not isinstance(outline, str):
+            return []
+        # topics.csv stores the outline with literal "\n" separators
+        return [
+            item.strip()
+            for item in re.split(r'\\n|\n', outline)
+            if item.strip()
+        ]
+
+    def _body_headings(self, outline: List[str]) -> List[str]:
+        return [item for item in outline if self._frame_kind(item) is None]
+
+    def _frame_kind(self, heading: str) -> Optional[str]:
+        normalized = heading.strip().lower().rstrip(':')
+        for kind, names in FRAME_SECTIONS.items():
+            if normalized in names:
+                return kind
+        return None
+
+    async def _generate_outline(self, topic: str, keywords: Dict) -> tuple:
+        response = await self.engine.complete(
+            [
+                {
+                    "role": "user",
+                    "content": self._outline_prompt(topic, keywords)
+                }
+            ],
+            temperature=self.temperature,
+            max_tokens=600
+        )
+        title, headings = self._parse_outline_response(response, topic)
+        logging.info(
+            f"Generated outline with {len(headings)} sections for: {topic}"
+        )
+        return title, self._body_headings(headings)
+
+    def _parse_outline_response(self, response: str, topic: str) -> tuple:
+        match = re.search(r'\{.*\}', response, re.DOTALL)
+        if match:
+            try:
+                data = json.loads(match.group(0))
+                return data.get('title') or topic, [
+                    str(h).strip()
+                    for h in data.get('sections', [])
+                    if str(h).strip()
+                ]
+            except json.JSONDecodeError:
+                pass
+        # Fall back to one heading per line when
+        # the model ignores the JSON instruction
+        lines = [
+            re.sub(r'^[\s\-\*\d\.\)]+', '', line).strip()
+            for line in response.splitlines()
+        ]
+        return topic, [line for line in lines if line]
+
+    async def _write(self, name: str, prompt: str, words: int) -> str:
+        attempt = 0
+        while True:
+            try:
+                return await self.engine.complete(
+                    [{"role": "user", "content": prompt}],
+                    temperature=self.temperature,
+                    max_tokens=min(self.max_tokens, words * 2)
+                )
+            except Exception as e:
+                attempt += 1
+                if attempt > self.section_retries:
+                    raise
+                logging.warning(
+                    f"Section '{name}' attempt {attempt} failed: {str(e)}"
+                )
+                await asyncio.sleep(2 ** attempt)
+
+    def _stitch(
+        self, title: str, headings: List[str], parts: List[str]
+    ) -> str:
+        intro, *body, faq, conclusion = [part.strip() for part in parts]
+        sections = [f"<h1>{title}</h1>", intro]
+        for heading, text in zip(headings, body):
+            sections.extend([f"<h2>{heading}</h2>", text])
+        sections.extend(
+            [
+                "<h2>Frequently Asked Questions</h2>",
+                faq,
+                "<h2>Conclusion</h2>",
+                conclusion
+            ]
+        )
+        return "\n\n".join(sections)
+
+    def _context(self, topic: str, keywords: Dict, headings: List[str]) -> str:
+        outline = "\n".join(f"- {heading}" for heading in headings)
+        return f"""Article topic: {topic}
+                Primary keywords: {keywords['primary']}
+                Additional keywords: {keywords.get('secondary', [])}
+                Target audience: {keywords.get('audience', 'general')}
+                Tone: {keywords.get('tone', 'professional')}
+                Article outline:
+                {outline}"""
+
+    def _outline_prompt(self, topic: str, keywords: Dict) -> str:
+        return f"""Create an SEO-optimized outline for an article on: {topic}
+                Primary keywords: {keywords['primary']}
+                Target audience: {keywords.get('audience', 'general')}
+                Return only JSON in the form
+                {{"title": "...", "sections": ["H2 heading", ...]}}
+                with 6 to 10 body sections.
+                Do not include introduction, FAQ or conclusion sections."""
+
+    def _section_prompt(
+        self,
+        topic: str,
+        keywords: Dict,
+        headings: List[str],
+        heading: str,
+        words: int
+    ) -> str:
+        return f"""{self._context(topic, keywords, headings)}
+
+                Write only the body of the section "{heading}"
+                in about {words} words. Use HTML paragraphs, H3/H4
+                subheadings, lists and examples where useful. Do not repeat
+                the section heading and do not cover the other sections."""
+
+    def _intro_prompt(
+        self, topic: str, keywords: Dict, headings: List[str], words: int
+    ) -> str:
+        return f"""{self._context(topic, keywords, headings)}
+
+                Write an engaging introduction of about {words} words in
+                HTML paragraphs. Open with an 8-10 word hook and preview
+                the sections above. No headings."""
+
+    def _faq_prompt(
+        self, topic: str, keywords: Dict, headings: List[str], words: int
+    ) -> str:
+        return f"""{self._context(topic, keywords, headings)}
+
+                Write a FAQ of about {words} words: 4-5 questions as <h3>
+                headings, each followed by a short HTML paragraph answer."""
+
+    def _conclusion_prompt(
+        self, topic: str, keywords: Dict, headings: List[str], words: int
+    ) -> str:
+        return f"""{self._context(topic, keywords, headings)}
+
+                Write a conclusion of about {words} words in HTML
+                paragraphs with an actionable bonus tip and an engagement
+                prompt. No headings."""
@@ -8,8 +8,8 @@ Created on Mon Nov 25 03:22:53 2024
 
 # src/seo_enhancer.py
 from typing import Dict, List
-import re
 from collections import Counter
+from src.text_analysis import analyze_text
 
 class SEOEnhancer:
     def __init__(self):
@@ -43,9 +43,10 @@ class SEOEnhancer:
         return '\n\n'.join(optimized_paragraphs)
     
     def _calculate_seo_metrics(self, content: str, keywords: List[str]) -> Dict:
+        doc = analyze_text(content)
         return {
-            'keyword_density': self._calculate_keyword_density(content, keywords),
-            'heading_optimization': self._analyze_headings(content, keywords),
-            'meta_tags_present': bool(re.search(r'<meta.*?>', content)),
-            'internal_links': len(re.findall(r'<a.*?href=.*?>', content))
+            'keyword_density': self._calculate_keyword_density(doc, keywords),
+            'heading_optimization': self._analyze_headings(doc, keywords),
+            'meta_tags_present': '<meta' in doc.lower,
+            'internal_links': len(doc.links)
         }
\ No newline at end of file
@@ -7,36 +7,45 @@ Created on Mon Nov 25 03:27:31 2024
 """
 
 # src/seo_quality_checker.py
-from typing import Dict, List, Tuple
+from typing import Dict, List, Union
 import re
 from urllib.parse import urlparse
+from src.text_analysis import AnalyzedDocument, analyze_text
+from src.data_processing.keyword_matcher import match_keywords
 
 class SEOQualityChecker:
     def __init__(self):
         self.heading_hierarchy = ['h1', 'h2', 'h3']
         self.optimal_keyword_density = (0.01, 0.03)
-        
-    def check_seo_quality(self, content: str, keywords: List[str]) -> Dict:
+
+    def check_seo_quality(
+        self, content: Union[str, AnalyzedDocument], keywords: List[str]
+    ) -> Dict:
+        doc = analyze_text(content)
         return {
-            'keyword_optimization': self._analyze_keyword_optimization(content, keywords),
-            'heading_structure': self._validate_heading_structure(content),
-            'link_quality': self._analyze_links(content),
-            'meta_optimization': self._check_meta_tags(content)
+            'keyword_optimization': self._analyze_keyword_optimization(
+                doc, keywords
+            ),
+            'heading_structure': self._validate_heading_structure(doc),
+            'link_quality': self._analyze_links(doc),
+            'meta_optimization': self._check_meta_tags(doc)
         }
-        
-    def _analyze_keyword_optimization(self, content: str, keywords: List[str]) -> Dict:
-        word_count = len(content.split())
-        keyword_positions = self._get_keyword_positions(content, keywords)
+
+    def _analyze_keyword_optimization(
+        self, doc: AnalyzedDocument, keywords: List[str]
+    ) -> Dict:
+        word_count = doc.word_count
+        keyword_positions = match_keywords(doc, keywords).positions
         
         return {
             'density': {kw: len(pos)/word_count for kw, pos in keyword_positions.items()},
             'first_paragraph': any(pos < 100 for positions in keyword_positions.values() for pos in positions),
-            'in_headings': self._check_keywords_in_headings(content, keywords),
+            'in_headings': self._check_keywords_in_headings(doc, keywords),
             'distribution_score': self._calculate_distribution_score(keyword_positions, word_count)
         }
         
-    def _validate_heading_structure(self, content: str) -> Dict:
-        headings = self._extract_headings(content)
+    def _validate_heading_structure(self, doc: AnalyzedDocument) -> Dict:
+        headings = doc.headings
         return {
             'hierarchy_valid': self._check_heading_hierarchy(headings),
             'keyword_presence': self._check_heading_keywords(headings),
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Dec 14 10:21:43 2024
+
+@author: thesaint
+"""
+
+# src/single_flight.py
+from typing import Any, Awaitable, Callable, Dict, Hashable
+import asyncio
+import copy
+import json
+import logging
+
+
+def normalize_key(*parts: Any) -> str:
+    """Request key ignoring case, extra whitespace and keyword list order."""
+    def normalize(value):
+        if isinstance(value, str):
+            return ' '.join(value.lower().split())
+        if isinstance(value, dict):
+            return {str(k): normalize(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple, set)):
+            return sorted((normalize(v) for v in value), key=repr)
+        return value
+    return json.dumps(
+        [normalize(part) for part in parts], sort_keys=True, default=str
+    )
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one in-flight call.
+
+    Callers that arrive while a call is running wait for it and get a copy of
+    its result (or its exception) instead of starting their own.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self.calls = 0
+        self.executions = 0
+        self.deduplicated = 0
+
+    async def do(
+        self, key: Hashable, fn: Callable[..., Awaitable], *args, **kwargs
+    ) -> Any:
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.deduplicated += 1
+            logging.info(f"{self.name}: joined in-flight call for {key}")
+            return copy.deepcopy(await self._wait(task))
+
+        self.executions += 1
+        task = asyncio.ensure_future(fn(*args, **kwargs))
+        self._in_flight[key] = task
+        self._waiters[task] = 0
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return await self._wait(task)
+
+    async def _wait(self, task: asyncio.Task) -> Any:
+        self._waiters[task] += 1
+        try:
+            # Shield so one impatient caller cannot cancel the call the others
+            # are waiting on
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and self._waiters.get(task) == 1:
+                task.cancel()
+            raise
+        finally:
+            if task in self._waiters:
+                self._waiters[task] -= 1
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        self._waiters.pop(task, None)
+        # Mark the exception retrieved even when every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'executions': self.executions,
+            'deduplicated': self.deduplicated,
+            'in_flight': len(self._in_flight)
+        }
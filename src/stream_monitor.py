@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Dec  4 08:47:19 2024
+
+@author: thesaint
+"""
+
+# src/stream_monitor.py
+from typing import Dict, Optional
+from dataclasses import dataclass
+from pathlib import Path
+import logging
+import os
+import re
+
+HEADING_TAG = re.compile(r'<h([1-6])\b', re.IGNORECASE)
+HTML_TAG = re.compile(r'<[^>]*>')
+ENGLISH_STOPWORDS = frozenset(
+    "the a an and or but of to in on for with "
+    "as at by from is are was were be been "
+    "this that these those it its you your "
+    "we our they their he she his her not can "
+    "will would should could have has had do "
+    "does did if then than so what which who "
+    "when where how why all any more most some such no into "
+    "about over also".split()
+)
+
+
+class StreamAbortError(Exception):
+    def __init__(self, rule: str, reason: str, partial_text: str = ''):
+        super().__init__(f"Stream aborted by {rule} rule: {reason}")
+        self.rule = rule
+        self.reason = reason
+        self.partial_text = partial_text
+
+
+@dataclass
+class StreamRules:
+    max_words: int = 4500
+    heading_within_words: int = 600
+    language: Optional[str] = 'en'
+    language_check_words: int = 150
+    min_stopword_ratio: float = 0.15
+
+    @classmethod
+    def from_config(cls, settings: Dict) -> 'StreamRules':
+        language = settings.get('stream_language', cls.language)
+        return cls(
+            max_words=int(settings.get('stream_max_words', cls.max_words)),
+            heading_within_words=int(
+                settings.get(
+                    'stream_heading_within_words', cls.heading_within_words
+                )
+            ),
+            language=language if language and language != 'any' else None,
+            language_check_words=int(
+                settings.get(
+                    'stream_language_check_words', cls.language_check_words
+                )
+            ),
+            min_stopword_ratio=float(
+                settings.get(
+                    'stream_min_stopword_ratio', cls.min_stopword_ratio
+                )
+            )
+        )
+
+
+class StreamMonitor:
+    """Keeps running word and heading counters over a streamed article."""
+
+    def __init__(self, rules: StreamRules, initial_text: str = ''):
+        self.rules = rules
+        self.chunks = []
+        self.word_count = 0
+        self.heading_counts = {f'h{level}': 0 for level in range(1, 7)}
+        self.checkpointed_words = 0
+        self.language_checked = False
+        self._tail = ''
+        self._unscanned = ''
+        if initial_text:
+            self.feed(initial_text)
+            self.checkpointed_words = self.word_count
+
+    @property
+    def text(self) -> str:
+        if len(self.chunks) > 1:
+            self.chunks = [''.join(self.chunks)]
+        return self.chunks[0] if self.chunks else ''
+
+    @property
+    def words_since_checkpoint(self) -> int:
+        return self.word_count - self.checkpointed_words
+
+    def feed(self, delta: str) -> None:
+        if not delta:
+            return
+        self.chunks.append(delta)
+        self._count_words(delta)
+        self._count_headings(delta)
+        self._check_rules()
+
+    def mark_checkpoint(self) -> None:
+        self.checkpointed_words = self.word_count
+
+    def finish(self) -> str:
+        if self._tail:
+            self.word_count += 1
+            self._tail = ''
+        if self.heading_counts['h2'] == 0:
+            self._abort(
+                'structure', "article finished without an <h2> heading"
+            )
+        return self.text
+
+    def _count_words(self, delta: str) -> None:
+        # A word is only counted once whitespace closes it, so words split
+        # across deltas count once
+        pieces = (self._tail + delta).split()
+        if not pieces:
+            self._tail = ''
+            return
+        if delta[-1].isspace():
+            self.word_count += len(pieces)
+            self._tail = ''
+        else:
+            self.word_count += len(pieces) - 1
+            self._tail = pieces[-1]
+
+    def _count_headings(self, delta: str) -> None:
+        pending = self._unscanned + delta
+        # Hold back a tag that has not been
+        # closed yet; it is scanned once complete
+        stop = len(pending)
+        last_open = pending.rfind('<')
+        if last_open != -1 and pending.find('>', last_open) == -1:
+            stop = last_open
+        for match in HEADING_TAG.finditer(pending, 0, stop):
+            self.heading_counts[f'h{match.group(1)}'] += 1
+        self._unscanned = pending[stop:]
+
+    def _check_rules(self) -> None:
+        rules = self.rules
+        if rules.max_words and self.word_count > rules.max_words:
+            self._abort('length', f"exceeded {rules.max_words} words")
+        if (
+            rules.heading_within_words
+            and self.word_count > rules.heading_within_words
+            and self.heading_counts['h2'] == 0
+        ):
+            self._abort(
+                'structure',
+                "no <h2> heading within the first "
+                f"{rules.heading_within_words} words"
+            )
+        if (
+            rules.language
+            and not self.language_checked
+            and self.word_count >= rules.language_check_words
+        ):
+            self.language_checked = True
+            self._check_language()
+
+    def _check_language(self) -> None:
+        if self.rules.language != 'en':
+            return
+        words = [
+            w.strip('.,;:!?"\'()').lower()
+            for w in HTML_TAG.sub(' ', self.text).split()
+        ]
+        words = [w for w in words if w]
+        if not words:
+            return
+        ratio = sum(1 for w in words if w in ENGLISH_STOPWORDS) / len(words)
+        if ratio < self.rules.min_stopword_ratio:
+            self._abort(
+                'language',
+                f"text does not look like English (stopword ratio {ratio:.2f})"
+            )
+
+    def _abort(self, rule: str, reason: str) -> None:
+        raise StreamAbortError(rule, reason, self.text)
+
+
+class StreamCheckpoint:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def load(self) -> str:
+        try:
+            return (
+                self.path.read_text(encoding='utf-8')
+                if self.path.exists()
+                else ''
+            )
+        except Exception as e:
+            logging.error(f"Failed to read generation checkpoint: {str(e)}")
+            return ''
+
+    def save(self, text: str) -> None:
+        try:
+            # Write to a temporary file first so a
+            # crash never leaves a torn checkpoint
+            tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logging.error(f"Failed to write generation checkpoint: {str(e)}")
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Dec 22 10:31:09 2024
+
+@author: thesaint
+"""
+
+# src/term_cache.py
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+import asyncio
+import html
+import logging
+import time
+from src.cache_engine import CacheEngine, get_cache_engine
+
+# fetch_page(taxonomy, offset, number,
+# newest_first) -> [{'id': int, 'name': str}, ...]
+FetchPage = Callable[[str, int, int, bool], Awaitable[List[Dict]]]
+# create_term(taxonomy, name) -> term id
+CreateTerm = Callable[[str, str], Awaitable[int]]
+
+
+def term_key(name: str) -> str:
+    # WordPress returns names HTML-escaped and matches them case-insensitively
+    return ' '.join(html.unescape(name).lower().split())
+
+
+class TermCache:
+    """Term ids by name for one site's taxonomies, so posts can send ids.
+
+    Each taxonomy is loaded once by paging through all of its terms and kept in
+    the cache engine. Later refreshes page newest-first and stop at the newest
+    term already known, since WordPress numbers terms in increasing order. A
+    full reload after ``reload_after_hours`` drops terms that were renamed or
+    deleted.
+    """
+    namespace = 'wordpress_terms'
+
+    def __init__(
+        self,
+        site_url: str,
+        fetch_page: FetchPage,
+        create_term: CreateTerm,
+        engine: Optional[CacheEngine] = None,
+        page_size: int = 100,
+        reload_after_hours: float = 24
+    ):
+        self.site_url = site_url
+        self.fetch_page = fetch_page
+        self.create_term = create_term
+        self.engine = engine or get_cache_engine()
+        self.page_size = page_size
+        self.reload_after = reload_after_hours * 3600
+        self._taxonomies: Dict[str, Dict] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.stats = {'loads': 0, 'refreshes': 0, 'pages': 0, 'created': 0}
+
+    def _key(self, taxonomy: str) -> str:
+        return f'{self.site_url}|{taxonomy}'
+
+    def _lock(self, taxonomy: str) -> asyncio.Lock:
+        return self._locks.setdefault(taxonomy, asyncio.Lock())
+
+    async def _entry(self, taxonomy: str) -> Dict:
+        entry = self._taxonomies.get(taxonomy)
+        if entry is None:
+            entry = self.engine.get(self.namespace, self._key(taxonomy))
+        if (
+            entry is None
+            or time.time() - entry['loaded_at'] > self.reload_after
+        ):
+            entry = await self._load(taxonomy)
+        self._taxonomies[taxonomy] = entry
+        return entry
+
+    async def _load(self, taxonomy: str) -> Dict:
+        terms, offset = {}, 0
+        while True:
+            page = await self._page(taxonomy, offset, newest_first=False)
+            terms.update(
+                (term_key(term['name']), int(term['id'])) for term in page
+            )
+            if len(page) < self.page_size:
+                break
+            offset += len(page)
+        entry = {
+            'terms': terms,
+            'max_id': max(terms.values(), default=0),
+            'loaded_at': time.time()
+        }
+        self._save(taxonomy, entry)
+        self.stats['loads'] += 1
+        logging.info(
+            f"Loaded {len(terms)} {taxonomy} terms from {self.site_url}"
+        )
+        return entry
+
+    async def _refresh(self, taxonomy: str, entry: Dict) -> None:
+        offset, newest = 0, entry['max_id']
+        while True:
+            page = await self._page(taxonomy, offset, newest_first=True)
+            fresh = [
+                term for term in page if int(term['id']) > entry['max_id']
+            ]
+            entry['terms'].update(
+                (term_key(term['name']), int(term['id'])) for term in fresh
+            )
+            newest = max([newest] + [int(term['id']) for term in fresh])
+            if len(fresh) < len(page) or len(page) < self.page_size:
+                break
+            offset += len(page)
+        entry['max_id'] = newest
+        self._save(taxonomy, entry)
+        self.stats['refreshes'] += 1
+
+    async def _page(
+        self, taxonomy: str, offset: int, newest_first: bool
+    ) -> List[Dict]:
+        self.stats['pages'] += 1
+        return await self.fetch_page(
+            taxonomy, offset, self.page_size, newest_first
+        )
+
+    def _save(self, taxonomy: str, entry: Dict) -> None:
+        self.engine.set(self.namespace, self._key(taxonomy), entry)
+
+    async def ensure(self, terms_names: Dict[str, Iterable[str]]) -> None:
+        """Create whichever named terms are missing, all together."""
+        await asyncio.gather(
+            *[
+                self._ensure(taxonomy, names)
+                for taxonomy, names in terms_names.items()
+            ]
+        )
+
+    async def _ensure(self, taxonomy: str, names: Iterable[str]) -> None:
+        wanted = {}
+        for name in names:
+            if name and name.strip():
+                # The first spelling of a name is the one created
+                wanted.setdefault(term_key(name), name.strip())
+        if not wanted:
+            return
+        async with self._lock(taxonomy):
+            entry = await self._entry(taxonomy)
+            missing = [key for key in wanted if key not in entry['terms']]
+            if missing:
+                # Someone may have added them on
+                # the site since the last refresh
+                await self._refresh(taxonomy, entry)
+                missing = [key for key in missing if key not in entry['terms']]
+            if not missing:
+                return
+            # Issued together so the XML-RPC
+            # batcher can send them in one request
+            results = await asyncio.gather(
+                *[self.create_term(taxonomy, wanted[key]) for key in missing],
+                return_exceptions=True
+            )
+            failed = []
+            for key, result in zip(missing, results):
+                if isinstance(result, Exception):
+                    failed.append(key)
+                    logging.warning(
+                        f"Could not create {taxonomy} "
+                        f"term {wanted[key]}: {str(result)}"
+                    )
+                else:
+                    # Left out of max_id so a refresh still sees terms others
+                    # created before it
+                    entry['terms'][key] = int(result)
+                    self.stats['created'] += 1
+            if failed:
+                # Usually created elsewhere in the meantime
+                await self._refresh(taxonomy, entry)
+            else:
+                self._save(taxonomy, entry)
+
+    async def resolve(
+        self, terms_names: Dict[str, Iterable[str]]
+    ) -> Dict[str, List[int]]:
+        """Term ids for the names in each taxonomy, creating missing ones."""
+        terms_names = {
+            taxonomy: list(names) for taxonomy, names in terms_names.items()
+        }
+        await self.ensure(terms_names)
+        resolved = {}
+        for taxonomy, names in terms_names.items():
+            terms = self._taxonomies.get(taxonomy, {}).get('terms', {})
+            ids = []
+            for name in names:
+                term_id = (
+                    terms.get(term_key(name))
+                    if name and name.strip()
+                    else None
+                )
+                if term_id is None:
+                    logging.warning(f"Skipping unknown {taxonomy} term {name}")
+                elif term_id not in ids:
+                    ids.append(term_id)
+            resolved[taxonomy] = ids
+        return resolved
+
+    def forget(self, taxonomy: Optional[str] = None) -> None:
+        """Forget cached terms, e.g. after a post was rejected."""
+        for name in [taxonomy] if taxonomy else list(self._taxonomies):
+            self._taxonomies.pop(name, None)
+            self.engine.delete(self.namespace, self._key(name))
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'terms': {
+                taxonomy: len(entry['terms'])
+                for taxonomy, entry in self._taxonomies.items()
+            }
+        }
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Dec  9 09:51:34 2024
+
+@author: thesaint
+"""
+
+# src/text_analysis.py
+from typing import Dict, List, Tuple, Union
+from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
+from types import MappingProxyType
+from collections import defaultdict
+import hashlib
+import re
+import nltk
+
+HEADING_PATTERN = re.compile(
+    r'<h([1-6])[^>]*>(.*?)</h\1>', re.IGNORECASE | re.DOTALL
+)
+LINK_PATTERN = re.compile(r'<a\s[^>]*?href=["\']?([^"\'\s>]+)', re.IGNORECASE)
+TOKEN_PATTERN = re.compile(r'\w+')
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?])\s+')
+
+
+def count_syllables(word: str) -> int:
+    word = word.lower()
+    count = 0
+    vowels = "aeiouy"
+    previous_char_is_vowel = False
+
+    if word.endswith('e'):
+        word = word[:-1]
+
+    for char in word:
+        is_vowel = char in vowels
+        if is_vowel and not previous_char_is_vowel:
+            count += 1
+        previous_char_is_vowel = is_vowel
+
+    if count == 0:
+        count = 1
+    return count
+
+
+@dataclass(frozen=True)
+class AnalyzedDocument:
+    """Single-pass analysis of one content version, shared by all checks.
+
+    Build it with ``analyze_text`` so repeated calls for the same content reuse
+    one instance.
+    """
+    text: str
+    lower: str = field(repr=False)
+    words: Tuple[str, ...] = field(repr=False)
+    paragraphs: Tuple[str, ...] = field(repr=False)
+    headings: Tuple[Tuple[int, str], ...] = field(repr=False)
+    links: Tuple[str, ...] = field(repr=False)
+
+    @classmethod
+    def from_text(cls, text: str) -> 'AnalyzedDocument':
+        return cls(
+            text=text,
+            lower=text.lower(),
+            words=tuple(text.split()),
+            paragraphs=tuple(text.split('\n\n')),
+            headings=tuple(
+                (int(level), heading.strip())
+                for level, heading in HEADING_PATTERN.findall(text)
+            ),
+            links=tuple(LINK_PATTERN.findall(text))
+        )
+
+    @property
+    def word_count(self) -> int:
+        return len(self.words)
+
+    @cached_property
+    def content_hash(self) -> str:
+        return hashlib.sha256(self.text.encode()).hexdigest()
+
+    @cached_property
+    def sentences(self) -> Tuple[str, ...]:
+        try:
+            return tuple(nltk.sent_tokenize(self.text))
+        except LookupError:
+            # punkt data not downloaded; a punctuation
+            # split is close enough for scoring
+            return tuple(
+                s for s in SENTENCE_PATTERN.split(self.text.strip()) if s
+            )
+
+    @cached_property
+    def syllable_count(self) -> int:
+        return sum(count_syllables(word) for word in self.words)
+
+    @cached_property
+    def flesch_score(self) -> float:
+        if not self.sentences or not self.words:
+            return 0.0
+        return (206.835 - 1.015 * (self.word_count / len(self.sentences))
+                - 84.6 * (self.syllable_count / self.word_count))
+
+    @cached_property
+    def token_spans(self) -> Tuple[Tuple[int, int], ...]:
+        return tuple(
+            match.span() for match in TOKEN_PATTERN.finditer(self.lower)
+        )
+
+    @cached_property
+    def token_index(self) -> Dict[str, Tuple[int, ...]]:
+        index = defaultdict(list)
+        for position, (start, end) in enumerate(self.token_spans):
+            index[self.lower[start:end]].append(position)
+        return MappingProxyType(
+            {token: tuple(positions) for token, positions in index.items()}
+        )
+
+    @cached_property
+    def heading_spans(self) -> Tuple[Tuple[int, int, int], ...]:
+        """(``headings`` index, start, end) of each heading's inner text."""
+        return tuple(
+            (index, match.start(2), match.end(2))
+            for index, match in enumerate(HEADING_PATTERN.finditer(self.text))
+        )
+
+    def heading_texts(
+        self, levels: Tuple[int, ...] = (1, 2, 3, 4)
+    ) -> List[str]:
+        return [text for level, text in self.headings if level in levels]
+
+    def keyword_positions(self, keyword: str) -> Tuple[int, ...]:
+        """Keyword start positions, with ``\\bkeyword\\b`` semantics."""
+        phrase = keyword.lower().strip()
+        parts = TOKEN_PATTERN.findall(phrase)
+        if not parts:
+            return ()
+        starts = self.token_index.get(parts[0], ())
+        if len(parts) == 1 and parts[0] == phrase:
+            return starts
+        # Compare the exact text spanned by the candidate tokens so separators
+        # must match too
+        spans = self.token_spans
+        last = len(parts) - 1
+        return tuple(
+            p
+            for p in starts
+            if p + last < len(spans)
+            and self.lower[spans[p][0]: spans[p + last][1]] == phrase
+        )
+
+    def count_keyword(self, keyword: str) -> int:
+        return len(self.keyword_positions(keyword))
+
+
+@lru_cache(maxsize=64)
+def _analyze_cached(text: str) -> AnalyzedDocument:
+    return AnalyzedDocument.from_text(text)
+
+
+def analyze_text(content: Union[str, AnalyzedDocument]) -> AnalyzedDocument:
+    if isinstance(content, AnalyzedDocument):
+        return content
+    return _analyze_cached(content)
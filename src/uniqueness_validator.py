@@ -15,6 +15,12 @@ from datetime import datetime
 from typing import Dict, List
 import json
 import asyncio
+from src.minhash_index import MinHashLSHIndex
+from src.fingerprint_store import Fingerprint, FingerprintStore, jaccard
+from src.cache_engine import get_cache_engine
+
+TEXT_NAMESPACE = 'uniqueness_text'
+ANALYSIS_NAMESPACE = 'uniqueness_analysis'
 
 class UniquenessValidator:
     def __init__(self, cache_dir: str = 'data/content_cache'):
@@ -23,6 +29,14 @@ class UniquenessValidator:
         self.similarity_threshold = 0.8
         self.max_retries = 3
         self.setup_logging()
+        self.engine = get_cache_engine(self.cache_dir / 'cache.db')
+        # The corpus that new articles are compared against must not be evicted
+        # as cache churns
+        self.engine.mark_permanent(TEXT_NAMESPACE)
+        self._import_legacy_files()
+        self.fingerprints = FingerprintStore(self.cache_dir)
+        self.index = MinHashLSHIndex(self.cache_dir / 'minhash_index.db')
+        self._backfill_index()
         
     def setup_logging(self):
         log_dir = Path('logs')
@@ -33,12 +47,78 @@ class UniquenessValidator:
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
 
+    def _import_legacy_files(self) -> None:
+        # Articles cached as loose .txt/.json files by older versions move into
+        # the engine once
+        if self.engine.keys(TEXT_NAMESPACE):
+            return
+        imported = 0
+        for cached_file in self.cache_dir.glob('*.txt'):
+            items = [
+                (
+                    TEXT_NAMESPACE,
+                    cached_file.stem,
+                    cached_file.read_text(encoding='utf-8')
+                )
+            ]
+            analysis_file = (
+                self.cache_dir / f'{cached_file.stem}_analysis.json'
+            )
+            if analysis_file.exists():
+                with open(analysis_file, 'r', encoding='utf-8') as f:
+                    items.append(
+                        (ANALYSIS_NAMESPACE, cached_file.stem, json.load(f))
+                    )
+            self.engine.set_many(items)
+            imported += 1
+        if imported:
+            logging.info(
+                f"Imported {imported} legacy cache files; "
+                "the .txt/.json files can be removed"
+            )
+
+    def _backfill_index(self) -> None:
+        # Content cached before the index existed is fingerprinted and signed
+        # once, on first start
+        added = 0
+        for key in self.engine.keys(TEXT_NAMESPACE):
+            if key not in self.fingerprints:
+                content = self.engine.get(TEXT_NAMESPACE, key)
+                self.fingerprints.add(
+                    key, self.fingerprints.fingerprint(content)
+                )
+                added += 1
+        # Also rebuilds the index after a parameter
+        # change, or from the old minhash_index.jsonl
+        missing = [
+            key for key in self.fingerprints.keys() if key not in self.index
+        ]
+        self.index.add_many(
+            (
+                key,
+                self.index.signature_from_hashes(
+                    self.fingerprints.get(key).shingles
+                )
+            )
+            for key in missing
+        )
+        if added:
+            logging.info(
+                f"Indexed {added} cached articles for similarity lookup"
+            )
+
     async def check_uniqueness(self, content: str) -> Dict:
         retries = 0
         while retries < self.max_retries:
             try:
                 content_hash = self._generate_hash(content)
-                similarity_scores = await self._check_similarity(content)
+                fingerprint = self.fingerprints.fingerprint(content)
+                signature = self.index.signature_from_hashes(
+                    fingerprint.shingles
+                )
+                similarity_scores = await self._check_similarity(
+                    content, fingerprint, signature
+                )
                 plagiarism_check = await self._check_plagiarism(content)
                 
                 result = {
@@ -48,8 +128,10 @@ class UniquenessValidator:
                     'plagiarism_check': plagiarism_check,
                     'timestamp': datetime.now().isoformat()
                 }
-                
-                await self._cache_content(content, content_hash, result)
+
+                await self._cache_content(
+                    content, content_hash, result, fingerprint, signature
+                )
                 logging.info(f"Uniqueness check completed: {result['is_unique']}")
                 
                 return result
@@ -61,28 +143,42 @@ class UniquenessValidator:
                     raise
                 await asyncio.sleep(2 ** retries)
         
+    def _forget(self, key: str) -> None:
+        self.index.remove(key)
+        self.fingerprints.remove(key)
+
     def _generate_hash(self, content: str) -> str:
         return hashlib.sha256(content.encode()).hexdigest()
-        
-    async def _check_similarity(self, content: str) -> Dict[str, float]:
+
+    async def _check_similarity(
+        self, content: str, fingerprint: Fingerprint, signature
+    ) -> Dict[str, float]:
         try:
             similarity_scores = {}
-            content_words = set(content.lower().split())
             
-            for cached_file in self.cache_dir.glob('*.txt'):
-                with open(cached_file, 'r', encoding='utf-8') as f:
-                    cached_content = f.read()
-                    cached_words = set(cached_content.lower().split())
-                    
-                    # Word-based similarity
-                    word_similarity = len(content_words.intersection(cached_words)) / len(content_words.union(cached_words))
-                    
-                    # Sequence-based similarity
-                    sequence_similarity = SequenceMatcher(None, content, cached_content).ratio()
-                    
-                    # Combined score
-                    similarity_scores[cached_file.stem] = (word_similarity + sequence_similarity) / 2
+            # Only articles sharing an LSH bucket can be near-duplicates
+            for key in self.index.query(signature):
+                cached_fingerprint = self.fingerprints.get(key)
+                cached_content = self.engine.get(TEXT_NAMESPACE, key)
+                if cached_fingerprint is None or cached_content is None:
+                    self._forget(key)
+                    continue
                     
+                # Word-based similarity, from the stored word hashes
+                word_similarity = jaccard(
+                    fingerprint.words, cached_fingerprint.words
+                )
+
+                # Sequence-based similarity
+                sequence_similarity = SequenceMatcher(
+                    None, content, cached_content
+                ).ratio()
+
+                # Combined score
+                similarity_scores[key] = (
+                    word_similarity + sequence_similarity
+                ) / 2
+
             return similarity_scores
             
         except Exception as e:
@@ -104,17 +200,24 @@ class UniquenessValidator:
             'trigram_count': len(trigrams),
             'complexity_score': len(trigrams) / word_count if word_count > 0 else 0
         }
-        
-    async def _cache_content(self, content: str, content_hash: str, result: Dict) -> None:
+
+    async def _cache_content(
+        self,
+        content: str,
+        content_hash: str,
+        result: Dict,
+        fingerprint: Fingerprint,
+        signature
+    ) -> None:
         for attempt in range(self.max_retries):
             try:
-                content_file = self.cache_dir / f'{content_hash}.txt'
-                with open(content_file, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                    
-                result_file = self.cache_dir / f'{content_hash}_analysis.json'
-                with open(result_file, 'w', encoding='utf-8') as f:
-                    json.dump(result, f, indent=4)
+                self.engine.set_many([
+                    (TEXT_NAMESPACE, content_hash, content),
+                    (ANALYSIS_NAMESPACE, content_hash, result)
+                ])
+
+                self.fingerprints.add(content_hash, fingerprint)
+                self.index.add(content_hash, signature)
                     
                 logging.info(f"Content cached successfully: {content_hash}")
                 break
@@ -127,11 +230,14 @@ class UniquenessValidator:
                 
     async def cleanup_old_cache(self, max_age_days: int = 30):
         try:
-            current_time = datetime.now()
-            for cache_file in self.cache_dir.glob('*.*'):
-                file_age = datetime.fromtimestamp(cache_file.stat().st_mtime)
-                if (current_time - file_age).days > max_age_days:
-                    cache_file.unlink()
-                    logging.info(f"Removed old cache file: {cache_file}")
+            max_age = max_age_days * 86400
+            removed = self.engine.purge_older_than(TEXT_NAMESPACE, max_age)
+            self.engine.purge_older_than(ANALYSIS_NAMESPACE, max_age)
+            for key in removed:
+                self._forget(key)
+            logging.info(
+                f"Removed {len(removed)} cached "
+                f"articles older than {max_age_days} days"
+            )
         except Exception as e:
             logging.error(f"Cache cleanup failed: {str(e)}")
\ No newline at end of file
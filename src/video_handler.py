@@ -8,13 +8,16 @@ Created on Mon Nov 25 19:37:08 2024
 
 # src/video_handler.py
 from googleapiclient.discovery import build
+import asyncio
 import logging
 from typing import Dict, Optional
+from src.single_flight import SingleFlight, normalize_key
 
 class YouTubeHandler:
     def __init__(self, config_manager):
         self.api_key = config_manager.get_credentials('youtube')['api_key']
         self.youtube = build('youtube', 'v3', developerKey=self.api_key)
+        self.single_flight = SingleFlight('youtube_search')
         
     async def find_relevant_video(self, topic: str) -> Optional[Dict]:
         try:
@@ -32,5 +35,23 @@ class YouTubeHandler:
             logging.error(f"YouTube video search failed: {str(e)}")
             return None
             
+    async def _search_videos(self, topic: str, max_results: int = 1) -> Dict:
+        return await self.single_flight.do(
+            normalize_key(topic, max_results),
+            asyncio.to_thread,
+            self._execute_search,
+            topic,
+            max_results
+        )
+
+    def _execute_search(self, topic: str, max_results: int) -> Dict:
+        return self.youtube.search().list(
+            q=topic,
+            part='snippet',
+            type='video',
+            maxResults=max_results,
+            videoEmbeddable='true'
+        ).execute()
+
     def _generate_embed_code(self, video_id: str) -> str:
         return f'<iframe width="560" height="315" src="https://www.youtube.com/embed/{video_id}" frameborder="0" allowfullscreen></iframe>'
\ No newline at end of file
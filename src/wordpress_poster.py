@@ -7,25 +7,76 @@ Created on Mon Nov 25 21:32:22 2024
 """
 
 # src/wordpress_poster.py
-from wordpress_xmlrpc import Client, WordPressPost
-from wordpress_xmlrpc.methods import posts, media
+from wordpress_xmlrpc import Client, WordPressPost, WordPressTerm
+from wordpress_xmlrpc.methods import posts, media, taxonomies
 from wordpress_xmlrpc.compat import xmlrpc_client
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import html
 import logging
 from datetime import datetime
 import mimetypes
+from src.media_registry import MediaRegistry, content_hash
+from src.single_flight import SingleFlight
+from src.term_cache import TermCache
+from src.xmlrpc_batch import MulticallBatcher
+from src.xmlrpc_executor import SiteExecutor
+from src.wordpress_rest import WordPressRestClient, WordPressRestError
+
+REST_TAXONOMIES = {'category': 'categories', 'post_tag': 'tags'}
+
+
+class GetTermPage(taxonomies.GetTerms):
+    # The library tests for collections.Iterable, which Python 3.10 removed
+    def process_result(self, raw_result):
+        return [WordPressTerm(term) for term in raw_result or []]
 
 class WordPressPoster:
     def __init__(self, config_manager):
         self.config = config_manager.get_credentials('wordpress')
-        self.client = Client(
-            self.config['url'],
-            self.config['username'],
-            self.config['password']
-        )
+        self.backend = self.config.get('backend', 'xmlrpc').strip().lower()
+        if self.backend not in ('xmlrpc', 'rest'):
+            raise ValueError(f"Unknown WordPress backend: {self.backend}")
         self.media_dir = Path('data/media')
         self.media_dir.mkdir(parents=True, exist_ok=True)
+        self.media_registry = MediaRegistry(
+            self.config['url'],
+            verify_after_hours=float(self.config.get('media_verify_hours', 24))
+        )
+        self.upload_flight = SingleFlight('media_upload')
+        self.term_cache = TermCache(
+            self.config['url'],
+            self._fetch_terms,
+            self._create_term,
+            page_size=int(self.config.get('term_page_size', 100)),
+            reload_after_hours=float(self.config.get('term_cache_hours', 24))
+        )
+        if self.backend == 'rest':
+            # The session's connection limit
+            # bounds concurrent requests per site
+            self.rest = WordPressRestClient(self.config)
+            self.client = None
+            self.executor = None
+            self.batcher = None
+        else:
+            self.rest = None
+            self.client = Client(
+                self.config['url'],
+                self.config['username'],
+                self.config['password']
+            )
+            # One poster talks to one site, so
+            # this is the site's connection pool
+            self.executor = SiteExecutor(
+                self.client,
+                max_workers=int(self.config.get('upload_concurrency', 4)),
+                timeout=float(self.config.get('timeout', 60))
+            )
+            self.batcher = MulticallBatcher(
+                self.executor,
+                max_calls=int(self.config.get('multicall_max_calls', 20))
+            )
         self.setup_logging()
         
     def setup_logging(self):
@@ -35,35 +86,174 @@ class WordPressPoster:
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
         
+    async def close(self) -> None:
+        if self.rest is not None:
+            await self.rest.close()
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def get_publishing_metrics(self) -> Dict:
+        metrics = {
+            'site': self.config['url'],
+            'backend': self.backend,
+            'media': self.media_registry.get_stats(),
+            'terms': self.term_cache.get_stats()
+        }
+        if self.executor is not None:
+            metrics.update(
+                executor=self.executor.get_stats(),
+                batching=self.batcher.get_stats()
+            )
+        return metrics
+
     async def create_post(self, content: Dict) -> str:
         try:
-            post = WordPressPost()
-            post.title = content['title']
-            post.content = await self._prepare_content(content)
-            post.post_status = content.get('status', 'publish')
-            post.terms_names = await self._prepare_taxonomies(content)
-            post.thumbnail = await self._upload_featured_image(content.get('featured_image'))
+            # Featured and content images upload together; the content is built
+            # once all are done
+            thumbnail, uploads = await asyncio.gather(
+                self._upload_featured_image(content.get('featured_image')),
+                self._upload_content_images(
+                    content.get('content_images') or []
+                )
+            )
+            body = await self._prepare_content(content, uploads)
+            status = content.get('status', 'publish')
+            term_ids = await self._prepare_taxonomies(content)
             
             # Create the post
-            post_id = self.client.call(posts.NewPost(post))
+            if self.rest is not None:
+                post_id = await self._create_rest_post(
+                    content['title'], body, status, thumbnail, term_ids
+                )
+            else:
+                post = WordPressPost()
+                post.title = content['title']
+                post.thumbnail = thumbnail
+                post.content = body
+                post.post_status = status
+                post.terms = [
+                    self._term(taxonomy, term_id)
+                    for taxonomy, ids in term_ids.items()
+                    for term_id in ids
+                ]
+                post_id = await self.batcher.call(posts.NewPost(post))
             logging.info(f"Successfully created post with ID: {post_id}")
             return post_id
             
         except Exception as e:
+            if self._is_term_error(e):
+                # A cached term may have been deleted on the site; reload
+                # before the next post
+                self.term_cache.forget()
             logging.error(f"Failed to create post: {str(e)}")
             raise
-            
-    async def _prepare_content(self, content: Dict) -> str:
+
+    async def _create_rest_post(
+        self,
+        title: str,
+        body: str,
+        status: str,
+        thumbnail: Optional[str],
+        term_ids: Dict[str, List[int]]
+    ) -> str:
+        fields = {'title': title, 'content': body, 'status': status}
+        fields.update(
+            (REST_TAXONOMIES[taxonomy], ids)
+            for taxonomy, ids in term_ids.items()
+        )
+        if thumbnail:
+            fields['featured_media'] = int(thumbnail)
+        return await self.rest.create_post(fields)
+
+    async def _prepare_taxonomies(self, content: Dict) -> Dict[str, List[int]]:
+        """Category and tag ids for the post, creating any the site lacks."""
+        return await self.term_cache.resolve({
+            'category': content.get('categories') or [],
+            'post_tag': content.get('tags') or []
+        })
+
+    async def prepare_terms(self, terms_names: Dict[str, List[str]]) -> None:
+        """Create the missing terms for a batch of posts before publishing.
+
+        ``terms_names`` maps ``category`` and ``post_tag`` to term names.
+        """
+        try:
+            await self.term_cache.ensure(terms_names)
+        except Exception as e:
+            # Each post still resolves its own terms when it is published
+            logging.error(f"Term preparation failed: {str(e)}")
+
+    @staticmethod
+    def _is_term_error(error: Exception) -> bool:
+        if isinstance(error, xmlrpc_client.Fault):
+            return 'term' in error.faultString.lower()
+        if isinstance(error, WordPressRestError):
+            return error.code == 'rest_cannot_assign_term' or bool(
+                set(REST_TAXONOMIES.values())
+                & set(error.data.get('params') or {})
+            )
+        return False
+
+    @staticmethod
+    def _term(taxonomy: str, term_id: int) -> WordPressTerm:
+        term = WordPressTerm()
+        term.taxonomy = taxonomy
+        term.id = term_id
+        return term
+
+    async def _fetch_terms(
+        self, taxonomy: str, offset: int, number: int, newest_first: bool
+    ) -> List[Dict]:
+        if self.rest is not None:
+            return await self.rest.list_terms(
+                REST_TAXONOMIES[taxonomy], offset, number, newest_first
+            )
+        page = await self.batcher.call(GetTermPage(taxonomy, {
+            'number': number, 'offset': offset, 'orderby': 'term_id',
+            'order': 'DESC' if newest_first else 'ASC',
+            # get_terms leaves out terms no post uses yet unless told otherwise
+            'hide_empty': False
+        }))
+        return [{'id': term.id, 'name': term.name} for term in page]
+
+    async def _create_term(self, taxonomy: str, name: str) -> int:
+        if self.rest is not None:
+            return await self.rest.create_term(REST_TAXONOMIES[taxonomy], name)
+        term = WordPressTerm()
+        term.taxonomy = taxonomy
+        term.name = name
+        return int(await self.batcher.call(taxonomies.NewTerm(term)))
+
+    async def _upload_content_images(
+        self, images: List[Dict]
+    ) -> List[Tuple[Dict, Dict]]:
+        uploads = await asyncio.gather(
+            *[
+                self.upload_media(
+                    img['data'],
+                    f"content-{img['id']}.jpg",
+                    path=img.get('path')
+                )
+                for img in images
+            ]
+        )
+        return list(zip(images, uploads))
+
+    async def _prepare_content(
+        self, content: Dict, uploads: List[Tuple[Dict, Dict]]
+    ) -> str:
         try:
             processed_content = content['content']
-            
-            # Handle additional images
-            if content.get('content_images'):
-                for img in content['content_images']:
-                    image_id = await self._upload_media(img['data'], f"content-{img['id']}.jpg")
-                    image_url = await self._get_media_url(image_id)
-                    processed_content = self._insert_image(processed_content, image_url, img['description'])
-                    
+
+            # Handle additional images; the upload
+            # response already carries each URL
+            for img, uploaded in uploads:
+                processed_content = self._insert_image(
+                    processed_content,
+                    uploaded['url'],
+                    img.get('description', '')
+                )
+
             # Handle YouTube video
             if content.get('video'):
                 processed_content = self._insert_video(processed_content, content['video']['embed_code'])
@@ -74,36 +264,139 @@ class WordPressPoster:
             logging.error(f"Content preparation failed: {str(e)}")
             raise
             
+    def _insert_image(self, content: str, url: str, description: str) -> str:
+        figure = (
+            f'<figure class="wp-block-image"><img src="{html.escape(url)}" '
+            f'alt="{html.escape(description)}" /></figure>\n'
+        )
+        # Each image opens the section after the
+        # previous one's, skipping the introduction
+        current = content.find('<h2', max(content.rfind('</figure>'), 0))
+        position = content.find('<h2', current + 1) if current >= 0 else -1
+        if position < 0:
+            return content + '\n' + figure
+        return content[:position] + figure + content[position:]
+
+    def _insert_video(self, content: str, embed_code: str) -> str:
+        # After the introduction, before the first section
+        position = content.find('<h2')
+        if position < 0:
+            return content + '\n' + embed_code
+        return content[:position] + embed_code + '\n' + content[position:]
+
     async def _upload_featured_image(self, image_data: Dict) -> Optional[str]:
         try:
             if not image_data:
                 return None
-                
+
+            # Prefer the 1200x630 crop made from the
+            # original rather than the content size
+            featured = image_data.get('renditions', {}).get(
+                'featured', image_data
+            )
             image_id = await self._upload_media(
-                image_data['data'],
-                f"featured-{image_data['id']}.jpg"
+                featured['data'],
+                f"featured-{image_data['id']}.jpg",
+                path=featured.get('path')
             )
             return image_id
             
         except Exception as e:
             logging.error(f"Featured image upload failed: {str(e)}")
             return None
-            
-    async def _upload_media(self, data: bytes, filename: str) -> str:
+
+    async def _upload_media(
+        self, data: bytes, filename: str, path: Optional[str] = None
+    ) -> str:
+        return (await self.upload_media(data, filename, path=path))['id']
+
+    async def upload_media(
+        self, data: bytes, filename: str, path: Optional[str] = None
+    ) -> Dict:
+        """Upload a file, or reuse the attachment already holding its bytes.
+
+        ``path`` is a file holding ``data``, such as its image cache blob; the
+        REST backend streams from it. Returns the attachment ``id`` and ``url``
+        and whether it was ``reused``.
+        """
         try:
-            # Prepare media data
-            mime_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            digest = content_hash(data)
+            # The same bytes uploading twice at once share one upload
+            return await self.upload_flight.do(
+                digest, self._upload_once, data, filename, digest, path
+            )
+
+        except Exception as e:
+            logging.error(f"Media upload failed: {str(e)}")
+            raise
+
+    async def _upload_once(
+        self,
+        data: bytes,
+        filename: str,
+        digest: str,
+        path: Optional[str] = None
+    ) -> Dict:
+        existing = await self._find_uploaded(digest)
+        if existing:
+            self.media_registry.reused += 1
+            logging.info(f"Reusing media {existing['id']} for {filename}")
+            return {
+                'id': existing['id'],
+                'url': existing['url'],
+                'reused': True
+            }
+
+        mime_type = (
+            mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        )
+        if self.rest is not None:
+            # Sent as the request body, from the file when there is one
+            response = await self.rest.upload_media(
+                path if path and Path(path).exists() else data,
+                filename,
+                mime_type
+            )
+        else:
             media_data = {
                 'name': filename,
                 'type': mime_type,
                 'bits': xmlrpc_client.Binary(data),
-                'overwrite': True
+                # Overwriting would delete an attachment with the same name
+                # that other posts use
+                'overwrite': False
             }
-            
-            # Upload to WordPress
-            response = self.client.call(media.UploadFile(media_data))
-            return response['id']
-            
-        except Exception as e:
-            logging.error(f"Media upload failed: {str(e)}")
-           
\ No newline at end of file
+            # Uploads issued together go to WordPress in one multicall
+            response = await self.batcher.call(media.UploadFile(media_data))
+        entry = self.media_registry.remember(
+            digest, response['id'], response.get('url'), filename
+        )
+        self.media_registry.uploaded += 1
+        return {'id': entry['id'], 'url': entry['url'], 'reused': False}
+
+    async def _find_uploaded(self, digest: str) -> Optional[Dict]:
+        entry = self.media_registry.get(digest)
+        if entry is None or not self.media_registry.needs_check(entry):
+            return entry
+        # Checked only when an old entry is about to be reused
+        if self.rest is not None:
+            item = await self.rest.get_media(entry['id'])
+            if item is None:
+                logging.info(f"Media {entry['id']} is gone, uploading again")
+                self.media_registry.forget(digest)
+                return None
+            return self.media_registry.confirm(digest, entry, item['url'])
+        try:
+            item = await self.batcher.call(
+                media.GetMediaItem(int(entry['id']))
+            )
+            return self.media_registry.confirm(
+                digest, entry, getattr(item, 'link', None)
+            )
+        except xmlrpc_client.Fault as e:
+            logging.info(
+                f"Media {entry['id']} is gone "
+                f"({e.faultString}), uploading again"
+            )
+            self.media_registry.forget(digest)
+            return None
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Dec 20 10:48:33 2024
+
+@author: thesaint
+"""
+
+# src/wordpress_rest.py
+from typing import Dict, List, Optional, Union
+from pathlib import Path
+from urllib.parse import quote
+import logging
+import aiohttp
+
+
+class WordPressRestError(Exception):
+
+    def __init__(
+        self, status: int, code: str, message: str, data: Optional[Dict] = None
+    ):
+        super().__init__(f"{status} {code}: {message}")
+        self.status = status
+        self.code = code
+        self.data = data or {}
+
+
+class WordPressRestClient:
+    """WordPress REST API over one keep-alive session and an app password.
+
+    Media is sent as the raw request body, streamed from a file when one is
+    given, so nothing is base64-encoded or copied into an XML document.
+    """
+
+    def __init__(self, config: Dict):
+        self.api_url = (
+            config.get('rest_url') or self._api_url(config['url'])
+        ).rstrip('/')
+        self.auth = aiohttp.BasicAuth(config['username'], config['password'])
+        self.max_connections = int(config.get('upload_concurrency', 4))
+        self.timeout = float(config.get('timeout', 60))
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    @staticmethod
+    def _api_url(url: str) -> str:
+        # The site root is wherever xmlrpc.php lives
+        site = (
+            url[: -len('/xmlrpc.php')]
+            if url.endswith('/xmlrpc.php')
+            else url.rstrip('/')
+        )
+        return f'{site}/wp-json/wp/v2'
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                auth=self.auth,
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_connections, keepalive_timeout=30
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self.session
+
+    async def close(self) -> None:
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    async def _request(
+        self, method: str, path: str, **kwargs
+    ) -> Union[Dict, List]:
+        session = await self._get_session()
+        async with session.request(
+            method, f'{self.api_url}/{path}', **kwargs
+        ) as response:
+            if response.status >= 400:
+                try:
+                    error = await response.json(content_type=None)
+                except ValueError:
+                    error = {}
+                raise WordPressRestError(
+                    response.status,
+                    error.get('code', 'http_error'),
+                    error.get('message', response.reason),
+                    error.get('data')
+                )
+            return await response.json()
+
+    async def upload_media(
+        self, source: Union[bytes, str, Path], filename: str, mime_type: str
+    ) -> Dict:
+        headers = {
+            'Content-Type': mime_type,
+            'Content-Disposition': f'attachment; filename="{quote(filename)}"'
+        }
+        if isinstance(source, bytes):
+            media = await self._request(
+                'POST', 'media', data=source, headers=headers
+            )
+        else:
+            # aiohttp reads the file in chunks off the event loop
+            path = Path(source)
+            headers['Content-Length'] = str(path.stat().st_size)
+            with open(path, 'rb') as f:
+                media = await self._request(
+                    'POST', 'media', data=f, headers=headers
+                )
+        return {'id': str(media['id']), 'url': media.get('source_url')}
+
+    async def get_media(self, media_id: str) -> Optional[Dict]:
+        try:
+            media = await self._request(
+                'GET', f'media/{media_id}', params={'_fields': 'id,source_url'}
+            )
+        except WordPressRestError as e:
+            if e.status == 404:
+                return None
+            raise
+        return {'id': str(media['id']), 'url': media.get('source_url')}
+
+    async def create_post(self, fields: Dict) -> str:
+        post = await self._request('POST', 'posts', json=fields)
+        return str(post['id'])
+
+    async def list_terms(
+        self,
+        taxonomy: str,
+        offset: int,
+        number: int,
+        newest_first: bool = False
+    ) -> List[Dict]:
+        """One page of ``categories`` or ``tags`` ordered by id."""
+        params = {
+            'offset': offset,
+            'per_page': min(number, 100),
+            'orderby': 'id',
+            'order': 'desc' if newest_first else 'asc',
+            '_fields': 'id,name'
+        }
+        return await self._request('GET', taxonomy, params=params)
+
+    async def create_term(self, taxonomy: str, name: str) -> int:
+        try:
+            term = await self._request('POST', taxonomy, json={'name': name})
+        except WordPressRestError as e:
+            # Created by someone else since we last looked
+            if e.code != 'term_exists' or e.data.get('term_id') is None:
+                raise
+            logging.info(f"Term {name} already exists in {taxonomy}")
+            return int(e.data['term_id'])
+        return int(term['id'])
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Dec 19 10:05:26 2024
+
+@author: thesaint
+"""
+
+# src/xmlrpc_batch.py
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import logging
+from wordpress_xmlrpc.compat import xmlrpc_client
+from src.xmlrpc_executor import SiteExecutor
+
+METHOD_NOT_FOUND = -32601
+# PHP's default post_max_size is 8M, and base64 inflates uploads by a third
+DEFAULT_MAX_BATCH_BYTES = 6 * 1024 * 1024
+
+
+def payload_size(method) -> int:
+    """Rough request body size of one call, dominated by any uploaded file."""
+    data = getattr(method, 'data', None)
+    bits = data.get('bits') if isinstance(data, dict) else None
+    if isinstance(bits, xmlrpc_client.Binary):
+        return len(bits.data) * 4 // 3 + 1024
+    return 1024
+
+
+class MulticallBatcher:
+    """Groups XML-RPC calls made close together into ``system.multicall``.
+
+    Calls issued within ``window`` seconds of each other share one HTTP round
+    trip, up to ``max_calls`` calls or ``max_bytes`` of payload per request.
+    Servers without multicall get every call sent on its own. Round trips run
+    on the site's executor, so its worker count bounds how many are in flight.
+    """
+
+    def __init__(
+        self,
+        executor: SiteExecutor,
+        window: float = 0.01,
+        max_calls: int = 20,
+        max_bytes: int = DEFAULT_MAX_BATCH_BYTES
+    ):
+        self.executor = executor
+        self.window = window
+        self.max_calls = max_calls
+        self.max_bytes = max_bytes
+        # WordPress lists system.multicall among its mt.supportedMethods
+        self.multicall_supported = 'system.multicall' in getattr(
+            executor.client, 'supported_methods', ()
+        )
+        self._pending: List[Tuple[Any, asyncio.Future, int]] = []
+        self._pending_bytes = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self.calls = 0
+        self.round_trips = 0
+        self.timeouts = 0
+
+    async def call(self, method, timeout: Optional[float] = None) -> Any:
+        """Result of ``method``, or ``asyncio.TimeoutError`` after ``timeout``
+        seconds (the executor's timeout by default)."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        size = payload_size(method)
+        if not self.multicall_supported:
+            self._spawn([(method, future, size)])
+        else:
+            if self._pending and self._pending_bytes + size > self.max_bytes:
+                self._flush()
+            self._pending.append((method, future, size))
+            self._pending_bytes += size
+            if len(self._pending) >= self.max_calls:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.window, self._flush)
+        try:
+            # Only this caller gives up; the rest
+            # of its batch still gets its results
+            return await asyncio.wait_for(
+                future, self.executor.timeout if timeout is None else timeout
+            )
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logging.warning(
+                f"{method.method_name} timed out on {self.executor.site}"
+            )
+            raise
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending, self._pending_bytes = self._pending, [], 0
+        if batch:
+            self._spawn(batch)
+
+    def _spawn(self, batch: List[Tuple[Any, asyncio.Future, int]]) -> None:
+        task = asyncio.ensure_future(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(
+        self, batch: List[Tuple[Any, asyncio.Future, int]]
+    ) -> None:
+        methods = [method for method, _, _ in batch]
+        label = (
+            'system.multicall'
+            if len(methods) > 1 and self.multicall_supported
+            else methods[0].method_name
+        )
+        try:
+            results = await self.executor.run(
+                self.call_many, methods, label=label
+            )
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, future, _), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def call_many(self, methods: List) -> List[Any]:
+        """Batch ``methods`` into one round trip; errors are returned."""
+        client = self.executor.get_client()
+        self.calls += len(methods)
+        if len(methods) > 1 and self.multicall_supported:
+            try:
+                return self._multicall(client, methods)
+            except xmlrpc_client.Fault as e:
+                if e.faultCode != METHOD_NOT_FOUND:
+                    raise
+                logging.warning(
+                    "Server rejected system.multicall, "
+                    "sending calls one at a time"
+                )
+                self.multicall_supported = False
+            except xmlrpc_client.ProtocolError as e:
+                # Typically 413 from a proxy or PHP
+                # limit; the calls fit on their own
+                logging.warning(
+                    f"Multicall of {len(methods)} calls failed "
+                    f"({e.errcode}), sending them one at a time"
+                )
+        return [self._call_one(client, method) for method in methods]
+
+    def _multicall(self, client, methods: List) -> List[Any]:
+        self.round_trips += 1
+        responses = client.server.system.multicall(
+            [
+                {
+                    'methodName': method.method_name,
+                    'params': list(method.get_args(client))
+                }
+                for method in methods
+            ]
+        )
+        results = []
+        for method, response in zip(methods, responses):
+            if isinstance(response, dict) and 'faultCode' in response:
+                results.append(
+                    xmlrpc_client.Fault(
+                        response['faultCode'], response['faultString']
+                    )
+                )
+            else:
+                try:
+                    results.append(method.process_result(response[0]))
+                except Exception as e:
+                    results.append(e)
+        return results
+
+    def _call_one(self, client, method) -> Any:
+        self.round_trips += 1
+        try:
+            return client.call(method)
+        except Exception as e:
+            return e
+
+    def get_stats(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'round_trips': self.round_trips,
+            'timeouts': self.timeouts,
+            'multicall_supported': self.multicall_supported
+        }
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Dec 21 09:52:17 2024
+
+@author: thesaint
+"""
+
+# src/xmlrpc_executor.py
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Sequence
+from urllib.parse import urlparse
+import asyncio
+import bisect
+import copy
+import logging
+import threading
+import time
+from wordpress_xmlrpc.compat import xmlrpc_client
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class LatencyHistogram:
+    """Counts of call latencies in fixed buckets, cheap to update per call."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given fraction of calls."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def snapshot(self) -> Dict:
+        return {
+            'count': self.count,
+            'avg': self.total / self.count if self.count else 0,
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+            'buckets': {
+                ('+Inf' if bound == float('inf') else str(bound)): count
+                for bound, count in zip(
+                    self.buckets + (float('inf'),), self.counts
+                )
+            }
+        }
+
+
+class _TimeoutMixin:
+    timeout: Optional[float] = None
+
+    def make_connection(self, host):
+        # Transport keeps this connection open between requests
+        connection = super().make_connection(host)
+        connection.timeout = self.timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(self.timeout)
+        return connection
+
+
+class TimeoutTransport(_TimeoutMixin, xmlrpc_client.Transport):
+    def __init__(self, timeout: Optional[float] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.timeout = timeout
+
+
+class SafeTimeoutTransport(_TimeoutMixin, xmlrpc_client.SafeTransport):
+    def __init__(self, timeout: Optional[float] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.timeout = timeout
+
+
+class SiteExecutor:
+    """Runs one WordPress site's blocking XML-RPC calls on its own threads.
+
+    Each worker thread keeps its own copy of the client, and with it one
+    persistent HTTP connection, so the pool holds at most ``max_workers``
+    connections to the site and a slow site only ever ties up its own threads.
+    Calls come back as awaitables bounded by ``timeout``; in-flight counts and
+    latency histograms are kept per method.
+    """
+
+    def __init__(self, client, max_workers: int = 4, timeout: float = 60):
+        self.client = client
+        self.url = client.url
+        self.site = urlparse(self.url).netloc or self.url
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f'xmlrpc-{self.site}'
+        )
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.metrics = {
+            'calls': 0,
+            'errors': 0,
+            'timeouts': 0,
+            'in_flight': 0,
+            'peak_in_flight': 0
+        }
+        self.latency = LatencyHistogram()
+        self.method_latency: Dict[str, LatencyHistogram] = defaultdict(
+            LatencyHistogram
+        )
+
+    def get_client(self):
+        """This thread's copy of the client. A ServerProxy holds one HTTP
+        connection, so threads must not share one."""
+        clone = getattr(self._local, 'client', None)
+        if clone is None:
+            clone = copy.copy(self.client)
+            transport_class = (
+                SafeTimeoutTransport
+                if self.url.startswith('https')
+                else TimeoutTransport
+            )
+            clone.server = xmlrpc_client.ServerProxy(
+                self.url,
+                transport=transport_class(self.timeout),
+                allow_none=True
+            )
+            self._local.client = clone
+        return clone
+
+    async def run(
+        self,
+        fn: Callable,
+        *args,
+        label: str = 'call',
+        timeout: Optional[float] = None
+    ) -> Any:
+        """Run ``fn(*args)`` on a worker thread, timed under ``label``."""
+        future = asyncio.get_running_loop().run_in_executor(
+            self.executor, self._timed, label, fn, *args
+        )
+        try:
+            return await asyncio.wait_for(
+                future, self.timeout if timeout is None else timeout
+            )
+        except asyncio.TimeoutError:
+            # The thread finishes on its own; the socket timeout bounds how
+            # long that takes
+            with self._lock:
+                self.metrics['timeouts'] += 1
+            logging.warning(f"{label} on {self.site} timed out")
+            raise
+
+    def call(self, method, timeout: Optional[float] = None):
+        """Awaitable for one XML-RPC method call."""
+        return self.run(
+            lambda: self.get_client().call(method),
+            label=method.method_name,
+            timeout=timeout
+        )
+
+    def _timed(self, label: str, fn: Callable, *args) -> Any:
+        with self._lock:
+            self.metrics['calls'] += 1
+            self.metrics['in_flight'] += 1
+            self.metrics['peak_in_flight'] = max(
+                self.metrics['peak_in_flight'], self.metrics['in_flight']
+            )
+        started_at = time.perf_counter()
+        try:
+            return fn(*args)
+        except Exception:
+            with self._lock:
+                self.metrics['errors'] += 1
+            raise
+        finally:
+            latency = time.perf_counter() - started_at
+            with self._lock:
+                self.metrics['in_flight'] -= 1
+                self.latency.observe(latency)
+                self.method_latency[label].observe(latency)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'site': self.site,
+                **self.metrics,
+                'max_workers': self.max_workers,
+                'latency': self.latency.snapshot(),
+                'methods': {
+                    name: histogram.snapshot()
+                    for name, histogram in self.method_latency.items()
+                }
+            }
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
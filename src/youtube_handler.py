@@ -8,13 +8,16 @@ Created on Mon Nov 25 18:11:00 2024
 
 # src/youtube_handler.py
 from googleapiclient.discovery import build
-from typing import Optional, Dict
+from typing import Optional, Dict, List
+import asyncio
 import logging
+from src.single_flight import SingleFlight, normalize_key
 
 class YouTubeHandler:
     def __init__(self, config_manager):
         self.api_key = config_manager.get_credentials('youtube')['api_key']
         self.youtube = build('youtube', 'v3', developerKey=self.api_key)
+        self.single_flight = SingleFlight('youtube_search')
         
     async def find_relevant_video(self, topic: str, max_results: int = 3) -> Optional[Dict]:
         try:
@@ -39,6 +42,15 @@ class YouTubeHandler:
             return None
             
     async def _search_videos(self, topic: str, max_results: int) -> Dict:
+        return await self.single_flight.do(
+            normalize_key(topic, max_results),
+            asyncio.to_thread,
+            self._execute_search,
+            topic,
+            max_results
+        )
+
+    def _execute_search(self, topic: str, max_results: int) -> Dict:
         return self.youtube.search().list(
             q=topic,
             part='snippet',
@@ -7,6 +7,8 @@ import pytest
 import asyncio
 from unittest.mock import Mock, patch
 from pathlib import Path
+from src.cache_engine import CacheEngine
+from src.wordpress_poster import WordPressPoster
 
 @pytest.fixture(scope="function")
 def event_loop():
@@ -16,6 +18,14 @@ def event_loop():
     yield loop
     loop.close()
 
+@pytest.fixture(autouse=True)
+def isolated_workdir(tmp_path, monkeypatch):
+    """Run each test from a scratch directory, so the caches and logs the code keeps
+    under relative paths such as data/ and logs/ never land in the repository."""
+    (tmp_path / 'logs').mkdir()
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
 @pytest.fixture
 def config_manager():
     mock_config = Mock()
@@ -47,6 +57,46 @@ def config_manager():
     mock_config.get_credentials = get_credentials
     return mock_config
 
+@pytest.fixture
+async def make_poster(tmp_path):
+    """Build WordPressPosters for a test site, closed again after the test.
+
+    ``client`` stands in for the XML-RPC client; the media registry and term cache
+    share one engine in ``tmp_path``.
+    """
+    posters = []
+
+    def make(url='https://test.com/xmlrpc.php', backend='xmlrpc', client=None, **settings):
+        config_manager = Mock()
+        config_manager.get_credentials = lambda service: {
+            'url': url, 'username': 'test_user', 'password': 'test_pass', 'backend': backend, **settings
+        }
+        if client is None:
+            poster = WordPressPoster(config_manager)
+        else:
+            with patch('src.wordpress_poster.Client', return_value=client):
+                poster = WordPressPoster(config_manager)
+        poster.media_registry.engine = poster.term_cache.engine = CacheEngine(tmp_path / 'cache.db')
+        posters.append(poster)
+        return poster
+
+    yield make
+    for poster in posters:
+        await poster.close()
+
+@pytest.fixture
+def post_content():
+    def make(images=2, **fields):
+        return {
+            'title': 'Test Post',
+            'content': '<p>Intro</p><h2>One</h2><p>a</p><h2>Two</h2><p>b</p>',
+            'featured_image': {'id': 'f', 'data': b'featured'},
+            'content_images': [{'id': str(i), 'data': f'image-{i}'.encode(), 'description': f'Image {i}'}
+                               for i in range(images)],
+            **fields
+        }
+    return make
+
 @pytest.fixture
 def mock_openai_client():
     with patch('openai.OpenAI') as mock:
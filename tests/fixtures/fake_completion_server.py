@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+# tests/fixtures/fake_completion_server.py
+"""Local stand-in for the OpenAI chat completions endpoint.
+
+Run it standalone to benchmark generation offline:
+
+    python -m tests.fixtures.fake_completion_server --port 8089 --delay 2
+
+then point ``[openai] base_url`` at ``http://127.0.0.1:8089/v1``.
+"""
+import argparse
+import asyncio
+import json
+import time
+from aiohttp import web
+
+DEFAULT_CONTENT = "<h1>Test Article</h1>\n<h2>Introduction</h2>\n<p>Fake completion content.</p>"
+
+class FakeCompletionServer:
+    def __init__(self, delay: float = 0.1, content: str = DEFAULT_CONTENT,
+                 chunk_size: int = 8, chunk_delay: float = 0.0, headers: dict = None):
+        self.delay = delay
+        # Sent with every response, e.g. the x-ratelimit-* headers OpenAI reports
+        self.headers = headers or {}
+        self.content = content
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.requests = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.port = None
+        self._runner = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def _content_for(self, payload: dict) -> str:
+        return self.content(payload) if callable(self.content) else self.content
+
+    async def handle_completion(self, request: web.Request) -> web.StreamResponse:
+        payload = await request.json()
+        self.requests.append(payload)
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            content = self._content_for(payload)
+            if payload.get('stream'):
+                return await self._stream(request, payload, content)
+            return web.json_response(self._completion(payload, content), headers=self.headers)
+        finally:
+            self.in_flight -= 1
+
+    async def _stream(self, request: web.Request, payload: dict, content: str) -> web.StreamResponse:
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream', **self.headers})
+        await response.prepare(request)
+        try:
+            for start in range(0, len(content), self.chunk_size):
+                chunk = self._chunk(payload, {'content': content[start:start + self.chunk_size]})
+                await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                if self.chunk_delay:
+                    await asyncio.sleep(self.chunk_delay)
+            await response.write(f"data: {json.dumps(self._chunk(payload, {}, 'stop'))}\n\n".encode())
+            await response.write(b"data: [DONE]\n\n")
+        except ConnectionResetError:
+            # Client aborted the stream early
+            pass
+        return response
+
+    def _completion(self, payload: dict, content: str) -> dict:
+        return {
+            'id': f"chatcmpl-fake-{len(self.requests)}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': payload.get('model', 'gpt-4'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop'
+            }],
+            'usage': {'prompt_tokens': 10, 'completion_tokens': len(content.split()), 'total_tokens': 10 + len(content.split())}
+        }
+
+    def _chunk(self, payload: dict, delta: dict, finish_reason: str = None) -> dict:
+        return {
+            'id': f"chatcmpl-fake-{len(self.requests)}",
+            'object': 'chat.completion.chunk',
+            'created': int(time.time()),
+            'model': payload.get('model', 'gpt-4'),
+            'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+        }
+
+    async def start(self, port: int = 0) -> 'FakeCompletionServer':
+        app = web.Application()
+        app.router.add_post('/v1/chat/completions', self.handle_completion)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+
+async def _serve(port: int, delay: float) -> None:
+    server = await FakeCompletionServer(delay=delay).start(port)
+    print(f"Fake completion server listening on {server.base_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Fake OpenAI completion server')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--delay', type=float, default=2.0, help='Seconds before each response')
+    args = parser.parse_args()
+    asyncio.run(_serve(args.port, args.delay))
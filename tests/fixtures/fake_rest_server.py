@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+# tests/fixtures/fake_rest_server.py
+"""Local stand-in for the WordPress REST API (``/wp-json/wp/v2``).
+
+Run it standalone to benchmark publishing offline:
+
+    python -m tests.fixtures.fake_rest_server --port 8091 --delay 0.2
+
+then set ``[wordpress] backend = rest`` and ``url`` to ``http://127.0.0.1:8091/xmlrpc.php``.
+"""
+import argparse
+import asyncio
+import base64
+import re
+from aiohttp import web
+
+class FakeRestServer:
+    def __init__(self, delay: float = 0.05, username: str = 'test_user', password: str = 'test_pass'):
+        self.delay = delay
+        self.credentials = base64.b64encode(f'{username}:{password}'.encode()).decode()
+        self.requests = []
+        self.connections = set()
+        self.media = {}
+        self.next_media_id = 100
+        self.posts = {}
+        self.terms = {'categories': {}, 'tags': {}}
+        self.port = None
+        self._runner = None
+
+    @property
+    def site_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def url(self) -> str:
+        return f"{self.site_url}/xmlrpc.php"
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        self.requests.append(f"{request.method} {request.path}")
+        # Keep-alive shows up as many requests over few client ports
+        self.connections.add(request.transport.get_extra_info('peername'))
+        if request.headers.get('Authorization') != f'Basic {self.credentials}':
+            return self._error(401, 'rest_not_logged_in', 'You are not currently logged in.')
+        await asyncio.sleep(self.delay)
+        return await handler(request)
+
+    def _error(self, status: int, code: str, message: str, data: dict = None) -> web.Response:
+        return web.json_response({'code': code, 'message': message, 'data': {'status': status, **(data or {})}},
+                                 status=status)
+
+    async def upload_media(self, request: web.Request) -> web.Response:
+        match = re.search(r'filename="?([^";]+)"?', request.headers.get('Content-Disposition', ''))
+        if not match:
+            return self._error(400, 'rest_upload_no_content_disposition', 'No Content-Disposition supplied.')
+        body = await request.read()
+        if not body:
+            return self._error(400, 'rest_upload_no_data', 'No data supplied.')
+        media_id = self.next_media_id
+        self.next_media_id += 1
+        self.media[media_id] = {
+            'id': media_id,
+            'source_url': f"{self.site_url}/wp-content/uploads/{match.group(1)}",
+            'mime_type': request.content_type,
+            'bytes': len(body),
+            'chunked': 'Content-Length' not in request.headers
+        }
+        return web.json_response({k: v for k, v in self.media[media_id].items() if k not in ('bytes', 'chunked')},
+                                 status=201)
+
+    async def get_media(self, request: web.Request) -> web.Response:
+        item = self.media.get(int(request.match_info['id']))
+        if item is None:
+            return self._error(404, 'rest_post_invalid_id', 'Invalid post ID.')
+        return web.json_response({'id': item['id'], 'source_url': item['source_url']})
+
+    async def create_post(self, request: web.Request) -> web.Response:
+        fields = await request.json()
+        post_id = len(self.posts) + 1
+        self.posts[post_id] = fields
+        return web.json_response({'id': post_id, 'status': fields.get('status', 'draft')}, status=201)
+
+    async def list_terms(self, request: web.Request) -> web.Response:
+        search = request.query.get('search', '').lower()
+        terms = sorted((t for t in self.terms[request.match_info['taxonomy']].values() if search in t['name'].lower()),
+                       key=lambda t: t['id'], reverse=request.query.get('order') == 'desc')
+        offset = int(request.query.get('offset', 0))
+        return web.json_response(terms[offset:offset + min(int(request.query.get('per_page', 10)), 100)])
+
+    async def create_term(self, request: web.Request) -> web.Response:
+        taxonomy = request.match_info['taxonomy']
+        name = (await request.json())['name']
+        for term in self.terms[taxonomy].values():
+            if term['name'].lower() == name.lower():
+                return self._error(400, 'term_exists', 'A term with the name provided already exists.',
+                                   {'term_id': term['id']})
+        return web.json_response(self.add_term(taxonomy, name), status=201)
+
+    def add_term(self, taxonomy: str, name: str) -> dict:
+        term_id = sum(len(terms) for terms in self.terms.values()) + 1
+        self.terms[taxonomy][term_id] = {'id': term_id, 'name': name, 'slug': name.lower().replace(' ', '-')}
+        return self.terms[taxonomy][term_id]
+
+    async def start(self, port: int = 0) -> 'FakeRestServer':
+        app = web.Application(middlewares=[self._middleware], client_max_size=64 * 1024 * 1024)
+        app.router.add_post('/wp-json/wp/v2/media', self.upload_media)
+        app.router.add_get('/wp-json/wp/v2/media/{id}', self.get_media)
+        app.router.add_post('/wp-json/wp/v2/posts', self.create_post)
+        app.router.add_get('/wp-json/wp/v2/{taxonomy:categories|tags}', self.list_terms)
+        app.router.add_post('/wp-json/wp/v2/{taxonomy:categories|tags}', self.create_term)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+
+async def _serve(port: int, delay: float) -> None:
+    server = await FakeRestServer(delay=delay).start(port)
+    print(f"Fake REST server listening on {server.site_url}/wp-json/wp/v2")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Fake WordPress REST server')
+    parser.add_argument('--port', type=int, default=8091)
+    parser.add_argument('--delay', type=float, default=0.2, help='Seconds before each response')
+    args = parser.parse_args()
+    asyncio.run(_serve(args.port, args.delay))
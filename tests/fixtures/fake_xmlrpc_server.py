@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+# tests/fixtures/fake_xmlrpc_server.py
+"""Local stand-in for the WordPress XML-RPC endpoint.
+
+Run it standalone to benchmark publishing offline:
+
+    python -m tests.fixtures.fake_xmlrpc_server --port 8090 --delay 0.2
+
+then point ``[wordpress] url`` at ``http://127.0.0.1:8090/xmlrpc.php``.
+"""
+import argparse
+import threading
+import time
+from socketserver import ThreadingMixIn
+from xmlrpc.server import SimpleXMLRPCRequestHandler, SimpleXMLRPCServer
+from xmlrpc.client import Fault
+
+class _RequestHandler(SimpleXMLRPCRequestHandler):
+    rpc_paths = ('/xmlrpc.php',)
+    # Keep connections open between requests like a real web server
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.server.stand_in.record_request(self.client_address)
+        super().do_POST()
+
+    def log_message(self, format, *args):
+        pass
+
+class _ThreadingServer(ThreadingMixIn, SimpleXMLRPCServer):
+    daemon_threads = True
+
+class FakeXmlrpcServer:
+    def __init__(self, delay: float = 0.05, multicall: bool = True):
+        self.delay = delay
+        self.multicall = multicall
+        self.requests = 0
+        self.calls = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.connections = set()
+        self.media = {}
+        self.posts = {}
+        self.terms = {}
+        self.port = None
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/xmlrpc.php"
+
+    def record_request(self, client_address=None) -> None:
+        with self._lock:
+            self.requests += 1
+            self.connections.add(client_address)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            # One delay per HTTP request, however many calls it carries
+            time.sleep(self.delay)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _record(self, name: str) -> None:
+        with self._lock:
+            self.calls.append(name)
+
+    def supported_methods(self):
+        methods = ['wp.uploadFile', 'wp.getMediaItem', 'wp.newPost', 'wp.getTerms', 'wp.newTerm']
+        return methods + (['system.multicall'] if self.multicall else [])
+
+    def upload_file(self, blog_id, username, password, data):
+        self._record('wp.uploadFile')
+        with self._lock:
+            media_id = str(len(self.media) + 100)
+            url = f"http://127.0.0.1:{self.port}/wp-content/uploads/{data['name']}"
+            self.media[media_id] = {'attachment_id': media_id, 'link': url, 'title': data['name'],
+                                    'bytes': len(data['bits'].data)}
+        return {'id': media_id, 'file': data['name'], 'url': url, 'type': data['type']}
+
+    def get_media_item(self, blog_id, username, password, attachment_id):
+        self._record('wp.getMediaItem')
+        item = self.media.get(str(attachment_id))
+        if item is None:
+            raise Fault(404, 'Invalid attachment ID.')
+        return {k: v for k, v in item.items() if k != 'bytes'}
+
+    def new_post(self, blog_id, username, password, content):
+        self._record('wp.newPost')
+        with self._lock:
+            post_id = str(len(self.posts) + 1)
+            self.posts[post_id] = content
+        return post_id
+
+    def get_terms(self, blog_id, username, password, taxonomy, filter=None):
+        self._record('wp.getTerms')
+        filter = filter or {}
+        terms = sorted((t for t in self.terms.values() if t['taxonomy'] == taxonomy), key=lambda t: int(t['term_id']),
+                       reverse=str(filter.get('order', 'ASC')).upper() == 'DESC')
+        offset = int(filter.get('offset', 0))
+        number = int(filter.get('number', len(terms) or 1))
+        return terms[offset:offset + number]
+
+    def new_term(self, blog_id, username, password, content):
+        self._record('wp.newTerm')
+        with self._lock:
+            if any(t['taxonomy'] == content['taxonomy'] and t['name'].lower() == content['name'].lower()
+                   for t in self.terms.values()):
+                raise Fault(500, 'A term with the name provided already exists.')
+            term_id = str(len(self.terms) + 1)
+            self.terms[term_id] = {
+                'term_id': term_id, 'name': content['name'], 'slug': content['name'].lower().replace(' ', '-'),
+                'taxonomy': content['taxonomy'], 'term_group': '0', 'term_taxonomy_id': term_id,
+                'description': '', 'parent': str(content.get('parent', 0)), 'count': 0
+            }
+        return term_id
+
+    def add_term(self, taxonomy: str, name: str) -> str:
+        return self.new_term(0, '', '', {'taxonomy': taxonomy, 'name': name})
+
+    def start(self, port: int = 0) -> 'FakeXmlrpcServer':
+        self._server = _ThreadingServer(('127.0.0.1', port), requestHandler=_RequestHandler,
+                                        allow_none=True, logRequests=False)
+        self._server.stand_in = self
+        self._server.register_function(self.supported_methods, 'mt.supportedMethods')
+        self._server.register_function(self.upload_file, 'wp.uploadFile')
+        self._server.register_function(self.get_media_item, 'wp.getMediaItem')
+        self._server.register_function(self.new_post, 'wp.newPost')
+        self._server.register_function(self.get_terms, 'wp.getTerms')
+        self._server.register_function(self.new_term, 'wp.newTerm')
+        if self.multicall:
+            self._server.register_multicall_functions()
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.calls = []
+            self.connections = set()
+            self.peak_in_flight = 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Fake WordPress XML-RPC server')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--delay', type=float, default=0.2, help='Seconds before each response')
+    parser.add_argument('--no-multicall', action='store_true')
+    args = parser.parse_args()
+    server = FakeXmlrpcServer(delay=args.delay, multicall=not args.no_multicall).start(args.port)
+    print(f"Fake XML-RPC server listening on {server.url}")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
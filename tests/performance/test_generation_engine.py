@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+# tests/performance/test_generation_engine.py
+import pytest
+import time
+import asyncio
+from src.generation_engine import GenerationEngine
+from tests.fixtures.fake_completion_server import FakeCompletionServer
+
+class TestGenerationEngineConcurrency:
+    @pytest.fixture
+    async def completion_server(self):
+        server = await FakeCompletionServer(delay=0.2).start()
+        yield server
+        await server.stop()
+
+    def _engine(self, server, max_concurrent):
+        return GenerationEngine({
+            'api_key': 'sk-test-key',
+            'model': 'gpt-4',
+            'base_url': server.base_url,
+            'max_concurrent_requests': max_concurrent
+        })
+
+    async def _run_batch(self, engine, count):
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            engine.complete([{"role": "user", "content": f"Article {i}"}], max_tokens=10)
+            for i in range(count)
+        ])
+        return results, time.perf_counter() - start
+
+    @pytest.mark.performance
+    @pytest.mark.asyncio
+    async def test_concurrent_generation_is_capped(self, completion_server):
+        engine = self._engine(completion_server, max_concurrent=4)
+        try:
+            results, elapsed = await self._run_batch(engine, 8)
+        finally:
+            await engine.close()
+
+        assert all('Fake completion content' in r for r in results)
+        assert completion_server.peak_in_flight == 4
+        # Two waves of 0.2s instead of eight sequential requests
+        assert elapsed < 0.8
+        metrics = engine.get_metrics()
+        assert metrics['calls'] == 8
+        assert metrics['peak_in_flight'] == 4
+        assert metrics['p95_latency'] >= 0.2
+
+    @pytest.mark.performance
+    @pytest.mark.asyncio
+    async def test_generation_does_not_block_event_loop(self, completion_server):
+        engine = self._engine(completion_server, max_concurrent=4)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker_task = asyncio.create_task(ticker())
+        try:
+            await self._run_batch(engine, 4)
+        finally:
+            ticker_task.cancel()
+            await engine.close()
+        assert ticks >= 10
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+# tests/performance/test_image_decode.py
+import pytest
+import time
+from io import BytesIO
+from PIL import Image, ImageDraw
+from src.media_system.image_optimizer import open_for_size
+
+TARGET = (800, 800)
+
+@pytest.fixture(scope='module')
+def large_jpeg():
+    # A 24 MP photo-sized original with enough detail that the encoder cannot cheat
+    img = Image.linear_gradient('L').resize((6000, 4000)).convert('RGB')
+    draw = ImageDraw.Draw(img)
+    for x in range(0, 6000, 40):
+        draw.line([(x, 0), (6000 - x, 4000)], fill=(x % 255, 80, 160), width=3)
+    output = BytesIO()
+    img.save(output, format='JPEG', quality=90)
+    return output.getvalue()
+
+def full_decode(content):
+    img = Image.open(BytesIO(content))
+    img.load()
+    decoded = img.size
+    img = img.resize(img.size)  # the old path kept the full-size copy until thumbnail
+    img.thumbnail(TARGET, Image.Resampling.LANCZOS, reducing_gap=None)
+    return decoded, img.size
+
+def draft_decode(content):
+    img = open_for_size(content, TARGET)
+    img.load()
+    decoded = img.size
+    img.thumbnail(TARGET, Image.Resampling.LANCZOS)
+    return decoded, img.size
+
+def measure(fn, content, rounds=3):
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn(content)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+class TestDecodeTimeDownscaling:
+    @pytest.mark.performance
+    def test_draft_decode_is_several_times_cheaper(self, large_jpeg):
+        full_time, (full_decoded, full_output) = measure(full_decode, large_jpeg)
+        draft_time, (draft_decoded, draft_output) = measure(draft_decode, large_jpeg)
+
+        full_bytes = full_decoded[0] * full_decoded[1] * 3
+        draft_bytes = draft_decoded[0] * draft_decoded[1] * 3
+        print(f"\nfull decode:  {full_time * 1000:7.1f} ms, {full_bytes / 1e6:6.1f} MB decoded")
+        print(f"draft decode: {draft_time * 1000:7.1f} ms, {draft_bytes / 1e6:6.1f} MB decoded")
+
+        assert full_output == draft_output == (800, 533)
+        # DCT scaling stops at 1/4 here: 1500x1000 is the smallest scale still >= 800 wide
+        assert draft_decoded == (1500, 1000)
+        assert full_bytes / draft_bytes >= 15
+        assert full_time / draft_time >= 3
+
+    @pytest.mark.performance
+    def test_non_jpeg_sources_are_reduced_first(self):
+        output = BytesIO()
+        Image.new('RGB', (6000, 4500), 'blue').save(output, format='PNG')
+        img = open_for_size(output.getvalue(), TARGET)
+        # Fitted size is 800x600; reduction stops at twice that or more
+        assert img.size == (2000, 1500)
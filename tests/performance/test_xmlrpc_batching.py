@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+# tests/performance/test_xmlrpc_batching.py
+import pytest
+import time
+from unittest.mock import AsyncMock, Mock, patch
+from src.cache_engine import CacheEngine
+from src.media_registry import MediaRegistry
+from src.wordpress_poster import WordPressPoster
+from tests.fixtures.fake_xmlrpc_server import FakeXmlrpcServer
+
+IMAGES = 6
+
+def post_content(round_number):
+    sections = ''.join(f'<h2>Section {i}</h2><p>Body {i}</p>' for i in range(IMAGES + 1))
+    return {
+        'title': f'Post {round_number}',
+        'content': f'<p>Intro</p>{sections}',
+        'featured_image': {'id': 'f', 'data': f'featured-{round_number}'.encode() * 2000},
+        'content_images': [{'id': str(i), 'data': f'image-{round_number}-{i}'.encode() * 2000,
+                            'description': f'Image {i}'} for i in range(IMAGES)]
+    }
+
+async def publish(multicall, tmp_path):
+    server = FakeXmlrpcServer(delay=0.1, multicall=multicall).start()
+    try:
+        config_manager = Mock()
+        config_manager.get_credentials = lambda service: {
+            'url': server.url, 'username': 'test_user', 'password': 'test_pass'
+        }
+        poster = WordPressPoster(config_manager)
+        poster.media_registry = MediaRegistry(server.url, engine=CacheEngine(tmp_path / f'{multicall}.db'))
+        server.reset_counts()
+        with patch.object(poster, '_prepare_taxonomies', AsyncMock(return_value={}), create=True):
+            start = time.perf_counter()
+            await poster.create_post(post_content(0))
+            elapsed = time.perf_counter() - start
+        return server.requests, elapsed
+    finally:
+        server.stop()
+
+class TestPublishRoundTrips:
+    @pytest.mark.performance
+    @pytest.mark.asyncio
+    async def test_multicall_cuts_round_trips(self, tmp_path):
+        single_requests, single_time = await publish(False, tmp_path)
+        batched_requests, batched_time = await publish(True, tmp_path)
+        print(f"\nsingle calls: {single_requests} requests, {single_time * 1000:.0f} ms")
+        print(f"multicall:    {batched_requests} requests, {batched_time * 1000:.0f} ms")
+
+        assert single_requests == IMAGES + 2
+        assert batched_requests == 2
+        assert batched_time < single_time
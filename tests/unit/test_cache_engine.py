@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+
+# tests/unit/test_cache_engine.py
+import pytest
+from unittest.mock import patch
+from src.cache_engine import CacheEngine, MemoryTier, get_cache_engine
+from src.content_cache import ContentCache
+from src.cache_manager import CacheManager
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = CacheEngine(tmp_path / 'cache.db', max_bytes=1000)
+    yield engine
+    engine.close()
+
+class TestCacheEngine:
+    def test_namespaces_are_isolated(self, engine):
+        engine.set('a', 'key', {'value': 1})
+        engine.set('b', 'key', [1, 2])
+        assert engine.get('a', 'key') == {'value': 1}
+        assert engine.get('b', 'key') == [1, 2]
+        assert engine.keys('a') == ['key']
+        engine.clear('a')
+        assert engine.get('a', 'key') is None
+        assert engine.get('b', 'key') == [1, 2]
+
+    def test_ttl_expires_entries(self, engine):
+        with patch('src.cache_engine.time.time', return_value=1000.0):
+            engine.set('a', 'short', 'x', ttl=10)
+            engine.set('a', 'forever', 'y')
+        with patch('src.cache_engine.time.time', return_value=1011.0):
+            assert engine.get('a', 'short') is None
+            assert not engine.contains('a', 'short')
+            assert engine.get('a', 'forever') == 'y'
+
+    def test_purge_expired_removes_rows(self, engine):
+        with patch('src.cache_engine.time.time', return_value=1000.0):
+            engine.set('a', 'one', 'x', ttl=10)
+            engine.set('b', 'two', 'x', ttl=10)
+        with patch('src.cache_engine.time.time', return_value=2000.0):
+            assert engine.purge_expired('a') == 1
+            assert engine.stats()['namespaces'] == {'b': {'entries': 1, 'bytes': 3}}
+
+    def test_size_budget_evicts_least_recently_used(self, engine):
+        payload = 'x' * 300
+        for index, key in enumerate(['first', 'second', 'third']):
+            with patch('src.cache_engine.time.time', return_value=1000.0 + index):
+                engine.set('a', key, payload)
+        with patch('src.cache_engine.time.time', return_value=1010.0):
+            engine.get('a', 'first')
+        with patch('src.cache_engine.time.time', return_value=1020.0):
+            engine.set('a', 'fourth', payload)
+
+        assert sorted(engine.keys('a')) == ['first', 'fourth', 'third']
+        assert engine.stats()['total_bytes'] <= engine.max_bytes
+
+    def test_permanent_namespace_is_never_evicted(self, tmp_path):
+        engine = CacheEngine(tmp_path / 'cache.db', max_bytes=1000)
+        engine.mark_permanent('corpus')
+        engine.set('corpus', 'article', 'x' * 800)
+        for index in range(10):
+            engine.set('a', f'key-{index}', 'x' * 300)
+
+        assert engine.get('corpus', 'article') == 'x' * 800
+        assert len(engine.keys('a')) == 3
+        # The mark is kept in the file, so other processes honour it too
+        engine.close()
+        reopened = CacheEngine(tmp_path / 'cache.db', max_bytes=1000)
+        assert reopened.stats()['permanent'] == ['corpus']
+        assert reopened.stats()['evictable_bytes'] == 3 * 302
+        reopened.close()
+
+    def test_byte_total_kept_without_scanning(self, engine):
+        statements = []
+        engine._conn.set_trace_callback(statements.append)
+        engine.set('a', 'one', 'x' * 100)
+        engine.set('a', 'one', 'x' * 200)
+        engine.set('a', 'two', 'x' * 50)
+        engine.delete('a', 'two')
+        assert not any('SUM(size)' in statement for statement in statements)
+        assert engine.stats()['evictable_bytes'] == engine.stats()['total_bytes'] == 202
+
+    def test_purge_older_than_returns_keys(self, engine):
+        with patch('src.cache_engine.time.time', return_value=1000.0):
+            engine.set('a', 'old', 'x')
+        engine.set('a', 'new', 'x')
+        assert engine.purge_older_than('a', 60) == ['old']
+        assert engine.keys('a') == ['new']
+        assert engine.stats()['evictable_bytes'] == 3
+
+    def test_set_many_is_atomic(self, engine):
+        engine.set('a', 'kept', 1)
+        with pytest.raises(TypeError):
+            engine.set_many([('a', 'one', 1), ('a', 'two', object())])
+        assert engine.keys('a') == ['kept']
+
+    def test_expiry_sweep_uses_expiry_index(self, engine):
+        plan = engine._conn.execute(
+            'EXPLAIN QUERY PLAN DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?', (0,)
+        ).fetchall()
+        assert any('entries_expires' in row[-1] for row in plan)
+
+    def test_counters_track_hits_misses_and_evictions(self, engine):
+        engine.set('a', 'key', 'x' * 600)
+        engine.get('a', 'key')
+        engine.get('a', 'missing')
+        engine.set('a', 'other', 'x' * 600)
+        stats = engine.stats()
+        assert (stats['hits'], stats['misses'], stats['evictions']) == (1, 1, 1)
+
+    def test_engine_shared_per_path(self, tmp_path):
+        assert get_cache_engine(tmp_path / 'shared.db') is get_cache_engine(str(tmp_path / 'shared.db'))
+
+class TestMemoryTier:
+    def test_lru_eviction(self):
+        tier = MemoryTier(max_entries=2)
+        tier.set('a', 1)
+        tier.set('b', 2)
+        tier.get('a')
+        tier.set('c', 3)
+        assert tier.get('b') == (False, None)
+        assert tier.get('a') == (True, 1)
+        assert tier.stats()['evictions'] == 1
+
+    def test_expired_entries_miss(self):
+        tier = MemoryTier()
+        with patch('src.cache_engine.time.time', return_value=1000.0):
+            tier.set('a', 1, expires_at=1005.0)
+            tier.set('b', 2, expires_at=2000.0)
+            assert tier.get('a') == (True, 1)
+        with patch('src.cache_engine.time.time', return_value=1010.0):
+            assert tier.get('a') == (False, None)
+            assert tier.purge_expired() == 0
+        with patch('src.cache_engine.time.time', return_value=3000.0):
+            assert tier.purge_expired() == 1
+        assert tier.stats()['expirations'] == 2
+
+class TestCacheClients:
+    @pytest.mark.asyncio
+    async def test_content_cache_round_trip(self, tmp_path):
+        cache = ContentCache(CacheEngine(tmp_path / 'cache.db'))
+        await cache.cache_content('Topic', ['b', 'a'], {'html': '<p>hi</p>'}, 'gpt-4')
+        assert await cache.get_cached_content('Topic', ['a', 'b'], 'gpt-4') == {'html': '<p>hi</p>'}
+        assert await cache.get_cached_content('Topic', ['a', 'b'], 'gpt-3.5') is None
+
+    @pytest.mark.asyncio
+    async def test_content_cache_serves_hot_entries_from_memory(self, tmp_path):
+        engine = CacheEngine(tmp_path / 'cache.db')
+        await ContentCache(engine).cache_content('Topic', ['a'], {'html': 'x'}, 'gpt-4')
+
+        cache = ContentCache(engine)
+        for _ in range(3):
+            assert await cache.get_cached_content('Topic', ['a'], 'gpt-4') == {'html': 'x'}
+        stats = cache.get_stats()
+        assert stats['memory']['hits'] == 2 and stats['memory']['misses'] == 1
+        assert stats['store']['hits'] == 1
+
+    @pytest.mark.asyncio
+    async def test_memory_hits_keep_store_entry_fresh(self, tmp_path):
+        engine = CacheEngine(tmp_path / 'cache.db', max_bytes=1000)
+        cache = ContentCache(engine)
+        cache.touch_batch = 1
+        await cache.cache_content('Hot', ['a'], {'html': 'x' * 200}, 'gpt-4')
+        await cache.cache_content('Cold', ['a'], {'html': 'x' * 200}, 'gpt-4')
+        # Served from memory, yet the store sees the use
+        assert await cache.get_cached_content('Hot', ['a'], 'gpt-4') == {'html': 'x' * 200}
+        engine.set('other', 'filler', 'x' * 400)
+
+        hot_key = cache._generate_cache_key('Hot', ['a'], 'gpt-4')
+        cold_key = cache._generate_cache_key('Cold', ['a'], 'gpt-4')
+        assert engine.contains('content', hot_key) and not engine.contains('content', cold_key)
+
+    def test_cache_manager_uses_its_own_namespace(self, tmp_path):
+        engine = CacheEngine(tmp_path / 'cache.db')
+        manager = CacheManager(engine)
+        manager.cache_content('Topic', {'primary': 'x'}, {'html': 'body'})
+        assert manager.get_cached_content('Topic', {'primary': 'x'}) == {'html': 'body'}
+        assert engine.keys(CacheManager.namespace) and not engine.keys(ContentCache.namespace)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+# tests/unit/test_image_cache.py
+import pytest
+import os
+import shutil
+from unittest.mock import AsyncMock, patch
+from src.image_handler import ImageHandler
+from src.media_system.image_cache import ImageCache, cache_key
+
+PARAMS = {'quality': 85}
+
+def make_image(image_id, payload=b'x' * 100):
+    return {
+        'id': image_id,
+        'data': payload,
+        'format': 'jpeg',
+        'size': (800, 600),
+        'renditions': {
+            'large': {'data': payload, 'format': 'jpeg', 'size': (800, 600)},
+            'thumbnail': {'data': payload[:10], 'format': 'jpeg', 'size': (150, 150)}
+        },
+        'description': 'A garden',
+        'credit': {'name': 'Jane', 'link': 'https://unsplash.com/@jane'}
+    }
+
+class TestImageCache:
+    @pytest.fixture
+    def cache(self, tmp_path):
+        cache = ImageCache(tmp_path)
+        yield cache
+        cache.close()
+
+    def test_hit_returns_complete_dict(self, cache):
+        image = make_image('abc')
+        stored = cache.put('abc', PARAMS, image)
+        assert cache.get('abc', PARAMS) == {**stored, 'cached': True}
+        # Every byte field can be streamed from its blob file
+        assert open(stored['path'], 'rb').read() == image['data']
+        thumbnail = stored['renditions']['thumbnail']
+        assert open(thumbnail['path'], 'rb').read() == image['renditions']['thumbnail']['data']
+        assert {k: v for k, v in stored.items() if k not in ('path', 'renditions')} == \
+            {k: v for k, v in image.items() if k != 'renditions'}
+
+    def test_key_includes_rendition_params(self, cache):
+        cache.put('abc', PARAMS, make_image('abc'))
+        assert cache.get('abc', {'quality': 70}) is None
+        assert cache_key('abc', PARAMS) != cache_key('abc', {'quality': 70})
+
+    def test_identical_blobs_stored_once(self, cache, tmp_path):
+        cache.put('abc', PARAMS, make_image('abc'))
+        key = cache_key('abc', PARAMS)
+        # data and the large rendition share bytes; the thumbnail differs
+        assert len(os.listdir(tmp_path / key[:2] / key)) == 2
+        assert cache.stats()['bytes'] == 110
+
+    def test_lru_eviction_under_byte_budget(self, tmp_path):
+        cache = ImageCache(tmp_path, max_bytes=250)
+        cache.put('a', PARAMS, make_image('a', b'a' * 100))
+        cache.put('b', PARAMS, make_image('b', b'b' * 100))
+        assert cache.get('a', PARAMS) is not None  # 'b' is now least recently used
+        cache.put('c', PARAMS, make_image('c', b'c' * 100))
+
+        assert cache.get('b', PARAMS) is None
+        assert cache.get('a', PARAMS) is not None
+        assert cache.get('c', PARAMS) is not None
+        key = cache_key('b', PARAMS)
+        assert not (tmp_path / key[:2] / key).exists()
+        assert cache.stats()['evictions'] == 1
+        cache.close()
+
+    def test_writes_leave_no_staging_and_survive_reopen(self, cache, tmp_path):
+        cache.put('abc', PARAMS, make_image('abc'))
+        cache.put('abc', PARAMS, make_image('abc', b'y' * 100))
+        key = cache_key('abc', PARAMS)
+        assert os.listdir(tmp_path / key[:2]) == [key]
+
+        reopened = ImageCache(tmp_path)
+        assert reopened.get('abc', PARAMS)['data'] == b'y' * 100
+        reopened.close()
+
+    def test_missing_blob_drops_entry(self, cache, tmp_path):
+        cache.put('abc', PARAMS, make_image('abc'))
+        key = cache_key('abc', PARAMS)
+        shutil.rmtree(tmp_path / key[:2] / key)
+        assert cache.get('abc', PARAMS) is None
+        assert cache.stats()['entries'] == 0
+
+class TestImageHandlerCache:
+    @pytest.mark.asyncio
+    async def test_cache_hit_matches_fresh_result(self, config_manager, tmp_path):
+        from io import BytesIO
+        from PIL import Image
+        output = BytesIO()
+        Image.new('RGB', (1600, 1200), 'green').save(output, format='JPEG')
+
+        handler = ImageHandler(config_manager)
+        handler.image_cache = ImageCache(tmp_path)
+        image = {'id': 'abc', 'url': 'https://example.com/abc.jpg', 'description': 'A garden',
+                 'credit': {'name': 'Jane', 'link': 'https://unsplash.com/@jane'}}
+        try:
+            with patch.object(handler, '_download', AsyncMock(return_value=output.getvalue())) as download:
+                fresh = await handler.optimize_image(image)
+                cached = await handler.optimize_image(image)
+        finally:
+            await handler.close()
+
+        assert download.call_count == 1
+        fresh.pop('timings')
+        assert cached == {**fresh, 'cached': True}
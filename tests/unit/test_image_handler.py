@@ -2,8 +2,18 @@
 
 #!/usr/bin/env python3
 import pytest
+import asyncio
+import time
+from io import BytesIO
+from urllib.parse import parse_qsl, urlsplit
 from unittest.mock import patch, Mock
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+import numpy as np
+from PIL import Image
 from src.image_handler import ImageHandler
+from src.media_system.image_cache import ImageCache
+from src.media_system.perceptual_hash import PerceptualIndex
 
 class TestImageHandler:
     @pytest.fixture
@@ -36,6 +46,125 @@ class TestImageHandler:
 
     @pytest.mark.asyncio
     async def test_error_handling(self, image_handler):
-        with patch('requests.get', side_effect=Exception("API Error")):
+        with patch('src.image_handler.ImageHandler._get_json', side_effect=Exception("API Error")):
             with pytest.raises(Exception):
-                await image_handler.fetch_and_optimize_images("Test", 1)
\ No newline at end of file
+                await image_handler.fetch_and_optimize_images("Test", 1)
+
+class TestAsyncImageFetching:
+    @pytest.fixture
+    async def image_server(self):
+        requests_seen, started_at = [], []
+
+        async def search(request):
+            requests_seen.append(request.path)
+            return web.json_response({'results': [
+                {
+                    'id': f'img{i}',
+                    'urls': {'raw': str(request.url.with_path(f'/img{i}.jpg').with_query(None))},
+                    'description': None,
+                    'user': {'name': 'Jane', 'links': {'html': 'https://unsplash.com/@jane'}}
+                }
+                for i in range(int(request.query['per_page']))
+            ]})
+
+        async def image(request):
+            requests_seen.append(request.path)
+            started_at.append(time.perf_counter())
+            await asyncio.sleep(0.1)
+            output = BytesIO()
+            # A distinct smooth pattern per photo, so none look like duplicates of each other
+            blocks = np.random.default_rng(int(request.match_info['name'][3:])).integers(0, 255, (6, 8, 3), dtype=np.uint8)
+            Image.fromarray(blocks).resize((1600, 1200), Image.Resampling.BILINEAR).save(output, format='JPEG')
+            return web.Response(body=output.getvalue(), content_type='image/jpeg')
+
+        app = web.Application()
+        app.router.add_get('/search/photos', search)
+        app.router.add_get('/{name}.jpg', image)
+        server = TestServer(app)
+        await server.start_server()
+        yield server, requests_seen, started_at
+        await server.close()
+
+    @pytest.mark.asyncio
+    async def test_images_download_concurrently(self, config_manager, image_server, tmp_path):
+        server, requests_seen, started_at = image_server
+        handler = ImageHandler(config_manager)
+        handler.image_cache = ImageCache(tmp_path)
+        handler.perceptual_index = PerceptualIndex(tmp_path / 'perceptual_index.jsonl')
+        try:
+            with patch('src.image_handler.UNSPLASH_SEARCH_URL', str(server.make_url('/search/photos'))):
+                images = await handler.fetch_and_optimize_images('Garden', count=4)
+        finally:
+            await handler.close()
+
+        assert [img['id'] for img in images] == ['img0', 'img1', 'img2', 'img3']
+        # Every download started before the first 0.1s response could finish
+        assert max(started_at) - min(started_at) < 0.1
+        assert all(img['size'] == (1067, 800) for img in images)
+        assert all(img['renditions']['featured']['size'] == (1200, 630) for img in images)
+        assert all(img['timings']['download'] >= 0.1 for img in images)
+        assert all(img['timings']['bytes_out'] < img['timings']['bytes_in'] for img in images)
+        assert len(requests_seen) == 5
+
+    @pytest.mark.asyncio
+    async def test_failed_image_is_replaced_by_spare(self, config_manager, image_server, tmp_path):
+        server, requests_seen, started_at = image_server
+        handler = ImageHandler(config_manager)
+        handler.image_cache = ImageCache(tmp_path)
+        handler.perceptual_index = PerceptualIndex(tmp_path / 'perceptual_index.jsonl')
+        download = handler._download
+
+        async def flaky_download(url):
+            if '/img1.jpg' in url:
+                raise ConnectionError('connection reset')
+            return await download(url)
+
+        try:
+            with patch('src.image_handler.UNSPLASH_SEARCH_URL', str(server.make_url('/search/photos'))), \
+                    patch.object(handler, '_download', side_effect=flaky_download):
+                images = await handler.fetch_and_optimize_images('Garden', count=3)
+        finally:
+            await handler.close()
+
+        assert [img['id'] for img in images] == ['img0', 'img2', 'img3']
+        assert 'img1' not in handler.perceptual_index
+
+    @pytest.mark.asyncio
+    async def test_cancelled_download_is_not_skipped(self, config_manager):
+        handler = ImageHandler(config_manager)
+
+        async def optimize(img):
+            if img['id'] == 'img1':
+                raise asyncio.CancelledError()
+            return {'id': img['id']}
+
+        with patch.object(handler, 'optimize_image', side_effect=optimize):
+            assert await handler._optimize_batch([{'id': 'img0'}]) == [{'id': 'img0'}]
+            with pytest.raises(asyncio.CancelledError):
+                await handler._optimize_batch([{'id': 'img0'}, {'id': 'img1'}])
+
+    @pytest.mark.asyncio
+    async def test_session_is_shared_and_closed(self, config_manager):
+        handler = ImageHandler(config_manager)
+        session = await handler._get_session()
+        assert await handler._get_session() is session
+        await handler.close()
+        assert session.closed
+
+class TestSizedRenditions:
+    def test_unsplash_url_requests_sized_rendition(self, config_manager):
+        handler = ImageHandler(config_manager)
+        url = handler._sized_url('https://images.unsplash.com/photo-1?ixid=abc&ixlib=rb-4.0.3')
+        assert url.startswith('https://images.unsplash.com/photo-1?')
+        query = dict(parse_qsl(urlsplit(url).query))
+        assert query == {'ixid': 'abc', 'ixlib': 'rb-4.0.3', 'w': '1200', 'q': '85', 'fm': 'jpg', 'fit': 'max'}
+
+    def test_panorama_request_covers_featured_crop(self, config_manager):
+        handler = ImageHandler(config_manager)
+        url = handler._sized_url('https://images.unsplash.com/photo-1', 3600, 1200)
+        assert dict(parse_qsl(urlsplit(url).query))['w'] == '1890'
+        # What imgix sends back for that request still fills the 1200x630 crop
+        output = BytesIO()
+        Image.new('RGB', (1890, 630), 'orange').save(output, format='JPEG')
+        renditions = handler.renditions.render(output.getvalue())
+        assert renditions['featured']['size'] == (1200, 630)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+# tests/unit/test_keyword_matcher.py
+import re
+import random
+from src.text_analysis import AnalyzedDocument
+from src.data_processing.keyword_matcher import KeywordMatcher, get_keyword_matcher, match_keywords
+
+CONTENT = """<h1>Organic Gardening Tips</h1>
+
+<p>Organic gardening starts with soil. Garden tips for every garden, gardening-tips too.</p>
+
+<h2>Soil and organic gardening</h2>
+
+<p>Healthy soil feeds plants. <h5>soil notes</h5> Organic gardening tips help beginners.</p>"""
+
+KEYWORDS = ['organic gardening', 'organic gardening tips', 'gardening', 'soil', 'garden tips', 'gardening-tips']
+
+class TestKeywordMatcher:
+    def test_counts_match_word_boundary_regex(self):
+        matches = match_keywords(CONTENT, KEYWORDS)
+        for keyword in KEYWORDS:
+            expected = len(re.findall(r'\b' + re.escape(keyword) + r'\b', CONTENT.lower()))
+            assert matches.counts[keyword] == expected, keyword
+
+    def test_overlapping_keywords_found_in_one_pass(self):
+        matches = match_keywords("organic gardening tips", ['organic gardening', 'gardening tips', 'tips'])
+        assert matches.counts == {'organic gardening': 1, 'gardening tips': 1, 'tips': 1}
+        assert matches.positions == {'organic gardening': (0,), 'gardening tips': (1,), 'tips': (2,)}
+
+    def test_positions_agree_with_document_index(self):
+        doc = AnalyzedDocument.from_text(CONTENT)
+        matches = match_keywords(doc, KEYWORDS)
+        for keyword in KEYWORDS:
+            assert matches.positions[keyword] == doc.keyword_positions(keyword)
+
+    def test_heading_hits_skip_low_level_headings(self):
+        matches = match_keywords(CONTENT, KEYWORDS)
+        assert matches.heading_hits['soil'] == 1
+        assert matches.headings['organic gardening'] == ('Organic Gardening Tips', 'Soil and organic gardening')
+        assert matches.headings['garden tips'] == ()
+
+    def test_matches_random_text_like_regex(self):
+        rng = random.Random(7)
+        vocabulary = ['seo', 'tips', 'seo tips', 'local', 'local seo', 'guide', 'x']
+        keywords = ['seo', 'seo tips', 'local seo', 'local seo tips', 'tips guide']
+        for _ in range(50):
+            text = rng.choice([' ', ', ', '. ']).join(rng.choice(vocabulary) for _ in range(40))
+            matches = KeywordMatcher(tuple(keywords)).match(text)
+            for keyword in keywords:
+                assert matches.counts[keyword] == len(re.findall(r'\b' + re.escape(keyword) + r'\b', text))
+
+    def test_matcher_is_cached_per_keyword_set(self):
+        assert get_keyword_matcher(('a', 'b')) is get_keyword_matcher(('a', 'b'))
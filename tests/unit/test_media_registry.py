@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+# tests/unit/test_media_registry.py
+import pytest
+import time
+from wordpress_xmlrpc.compat import xmlrpc_client
+from wordpress_xmlrpc.methods import media
+from src.cache_engine import CacheEngine
+from src.media_registry import MediaRegistry, content_hash
+
+class FakeWordPress:
+    def __init__(self):
+        self.url = 'https://test.com/xmlrpc.php'
+        self.uploads = []
+        self.attachments = {}
+        self.calls = []
+
+    def call(self, method):
+        self.calls.append(method.method_name)
+        if isinstance(method, media.UploadFile):
+            data = method.data
+            self.uploads.append(data)
+            media_id = str(100 + len(self.uploads))
+            self.attachments[media_id] = f"https://test.com/uploads/{data['name']}"
+            return {'id': media_id, 'url': self.attachments[media_id], 'file': data['name']}
+        if isinstance(method, media.GetMediaItem):
+            media_id = str(method.attachment_id)
+            if media_id not in self.attachments:
+                raise xmlrpc_client.Fault(404, 'Invalid attachment ID.')
+            return type('Media', (), {'id': media_id, 'link': self.attachments[media_id]})()
+        raise AssertionError(f"Unexpected call {method}")
+
+class TestMediaUploadDedupe:
+    @pytest.fixture
+    def poster(self, make_poster):
+        site = FakeWordPress()
+        return make_poster(client=site), site
+
+    @pytest.mark.asyncio
+    async def test_same_bytes_upload_once(self, poster):
+        poster, site = poster
+        first = await poster.upload_media(b'jpeg-bytes', 'featured-abc.jpg')
+        second = await poster.upload_media(b'jpeg-bytes', 'content-abc.jpg')
+        other = await poster.upload_media(b'other-bytes', 'content-def.jpg')
+
+        assert len(site.uploads) == 2
+        assert all(upload['overwrite'] is False for upload in site.uploads)
+        assert second == {'id': first['id'], 'url': first['url'], 'reused': True}
+        assert other['reused'] is False and other['id'] != first['id']
+        assert poster.media_registry.get_stats() == {'uploaded': 2, 'reused': 1}
+
+    @pytest.mark.asyncio
+    async def test_registry_persists_per_site(self, poster, tmp_path):
+        poster, site = poster
+        await poster.upload_media(b'jpeg-bytes', 'featured-abc.jpg')
+        engine = poster.media_registry.engine
+        digest = content_hash(b'jpeg-bytes')
+        assert MediaRegistry(poster.config['url'], engine=engine).get(digest)['id'] == '101'
+        assert MediaRegistry('https://other.com/xmlrpc.php', engine=engine).get(digest) is None
+
+    @pytest.mark.asyncio
+    async def test_fresh_entries_are_not_checked(self, poster):
+        poster, site = poster
+        await poster.upload_media(b'jpeg-bytes', 'featured-abc.jpg')
+        await poster.upload_media(b'jpeg-bytes', 'featured-abc.jpg')
+        assert site.calls == ['wp.uploadFile']
+
+    @pytest.mark.asyncio
+    async def test_missing_attachment_is_uploaded_again(self, poster):
+        poster, site = poster
+        poster.media_registry.verify_after = 0
+        first = await poster.upload_media(b'jpeg-bytes', 'featured-abc.jpg')
+        assert (await poster.upload_media(b'jpeg-bytes', 'featured-abc.jpg'))['reused']
+
+        del site.attachments[first['id']]
+        time.sleep(0.01)
+        again = await poster.upload_media(b'jpeg-bytes', 'featured-abc.jpg')
+        assert again['reused'] is False
+        assert again['id'] != first['id']
+        assert len(site.uploads) == 2
+
+class TestMediaRegistry:
+    def test_entries_survive_eviction(self, tmp_path):
+        engine = CacheEngine(tmp_path / 'cache.db', max_bytes=1000)
+        registry = MediaRegistry('https://test.com/xmlrpc.php', engine=engine)
+        digest = content_hash(b'jpeg-bytes')
+        registry.remember(digest, 101, 'https://test.com/uploads/a.jpg', 'a.jpg')
+        for index in range(10):
+            engine.set('images', f'key-{index}', 'x' * 300)
+
+        assert registry.get(digest)['id'] == '101'
+        assert len(engine.keys('images')) < 10
+        engine.close()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+
+# tests/unit/test_nlp_service.py
+import pytest
+import asyncio
+from src.advanced_quality_validator import AdvancedQualityValidator
+from src.nlp_service import NLPValidationService
+
+ARTICLES = [
+    'However, the garden needs water every day. Therefore we planted it near the well. ' * 10,
+    'Compost feeds the soil. Worms turn it over, and the roots grow deeper each season. ' * 15,
+    'Prune the roses in spring. Then mulch the beds before the summer heat arrives. ' * 5
+]
+
+@pytest.fixture
+def service():
+    # A blank pipeline needs no downloaded model
+    service = NLPValidationService(workers=2, model_name='blank:en', batch_size=2)
+    yield service
+    service.shutdown()
+
+class TestNLPValidationService:
+    @pytest.mark.asyncio
+    async def test_pooled_results_match_in_process(self, service):
+        validator = AdvancedQualityValidator('blank:en')
+        expected = [validator.validate_content_quality(article) for article in ARTICLES]
+
+        assert await service.validate_content_quality(ARTICLES[0]) == expected[0]
+        assert await service.validate_many(ARTICLES) == expected
+
+    @pytest.mark.asyncio
+    async def test_shutdown_stops_workers(self):
+        service = NLPValidationService(workers=1, model_name='blank:en')
+        await service.validate_content_quality(ARTICLES[2])
+        processes = list(service.executor._processes.values())
+        service.shutdown()
+
+        with pytest.raises(RuntimeError):
+            await service.validate_content_quality(ARTICLES[2])
+        assert processes and not any(process.is_alive() for process in processes)
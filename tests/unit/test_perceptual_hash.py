@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+# tests/unit/test_perceptual_hash.py
+import pytest
+import json
+import random
+import time
+from io import BytesIO
+from unittest.mock import AsyncMock, patch
+import numpy as np
+from PIL import Image
+from src.image_handler import ImageHandler
+from src.media_system.image_cache import ImageCache
+from src.media_system.perceptual_hash import BKTree, PerceptualIndex, dhash, hamming
+
+def photo(seed, size=(1600, 1200), quality=90):
+    blocks = np.random.default_rng(seed).integers(0, 255, (6, 8, 3), dtype=np.uint8)
+    output = BytesIO()
+    Image.fromarray(blocks).resize(size, Image.Resampling.BILINEAR).save(output, format='JPEG', quality=quality)
+    return output.getvalue()
+
+class TestDHash:
+    def test_resized_recompressed_copy_is_close(self):
+        original = dhash(photo(1))
+        assert hamming(original, dhash(photo(1, size=(800, 600), quality=60))) <= 4
+
+    def test_different_photos_are_far_apart(self):
+        assert hamming(dhash(photo(1)), dhash(photo(2))) > 12
+
+class TestBKTree:
+    def test_search_matches_brute_force(self):
+        rng = random.Random(7)
+        values = [rng.getrandbits(64) for _ in range(2000)]
+        tree = BKTree()
+        for value in values:
+            tree.add(value)
+        query = values[123] ^ 0b1011  # three bits away from a stored value
+        expected = sorted((hamming(query, v), v) for v in set(values) if hamming(query, v) <= 10)
+        assert tree.search(query, 10) == expected
+        assert expected[0] == (3, values[123])
+        assert len(tree) == len(set(values))
+
+class TestPerceptualIndex:
+    def test_persists_across_runs(self, tmp_path):
+        path = tmp_path / 'index.jsonl'
+        index = PerceptualIndex(path)
+        index.add('abc', 0xFFFF0000FFFF0000)
+
+        reopened = PerceptualIndex(path)
+        assert 'abc' in reopened
+        assert reopened.find(0xFFFF0000FFFF0001) == [('abc', 1)]
+        assert reopened.find(0x0000FFFF0000FFFF) == []
+
+    def test_old_entries_expire_and_are_compacted(self, tmp_path):
+        path = tmp_path / 'index.jsonl'
+        index = PerceptualIndex(path, window_days=1)
+        for i in range(3):
+            index.add(f'old{i}', i, used_at=time.time() - 2 * 86400)
+        index.add('new', 0xFF)
+
+        reopened = PerceptualIndex(path, window_days=1)
+        assert 'old0' not in reopened
+        assert reopened.find(1) == []
+        assert [json.loads(line)['id'] for line in path.read_text().splitlines()] == ['new']
+
+    def test_partial_last_line_is_skipped_and_dropped(self, tmp_path):
+        path = tmp_path / 'index.jsonl'
+        index = PerceptualIndex(path)
+        index.add('abc', 0xFF)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"id": "torn", "hash": "00ff')
+
+        reopened = PerceptualIndex(path)
+        assert 'abc' in reopened and 'torn' not in reopened
+        reopened.add('def', 0xFF00)
+        assert [json.loads(line)['id'] for line in path.read_text().splitlines()] == ['abc', 'def']
+
+class TestImageDedupe:
+    @pytest.mark.asyncio
+    async def test_near_duplicates_are_replaced_by_next_candidate(self, config_manager, tmp_path):
+        handler = ImageHandler(config_manager)
+        handler.image_cache = ImageCache(tmp_path)
+        handler.perceptual_index = PerceptualIndex(tmp_path / 'index.jsonl')
+        handler.perceptual_index.add('seen-before', dhash(photo(1)))
+        handler.perceptual_index.add('used-id', dhash(photo(9)))
+
+        sources = {'a': photo(1, quality=70), 'b': photo(2), 'c': photo(2, size=(1500, 1125)),
+                   'used-id': photo(9), 'd': photo(3), 'e': photo(4)}
+        candidates = [{'id': key, 'url': f'https://example.com/{key}.jpg', 'description': key, 'credit': {}}
+                      for key in ['used-id', 'a', 'b', 'c', 'd', 'e']]
+
+        async def download(url):
+            return sources[url.rsplit('/', 1)[1][:-4]]
+
+        try:
+            with patch.object(handler, 'fetch_images', AsyncMock(return_value=candidates)), \
+                 patch.object(handler, '_download', side_effect=download) as fetched:
+                images = await handler.fetch_and_optimize_images('Garden', count=3)
+        finally:
+            await handler.close()
+
+        # 'used-id' is never downloaded, 'a' matches an earlier post, 'c' repeats 'b'
+        assert [img['id'] for img in images] == ['b', 'd', 'e']
+        assert 'https://example.com/used-id.jpg' not in [call.args[0] for call in fetched.call_args_list]
+        assert all(img['id'] in handler.perceptual_index for img in images)
+
+    @pytest.mark.asyncio
+    async def test_repeated_topic_reuses_images_once_all_were_used(self, config_manager, tmp_path):
+        handler = ImageHandler(config_manager)
+        handler.image_cache = ImageCache(tmp_path)
+        handler.perceptual_index = PerceptualIndex(tmp_path / 'index.jsonl')
+        sources = {f'i{i}': photo(i + 10) for i in range(6)}
+        candidates = [{'id': key, 'url': f'https://example.com/{key}.jpg', 'description': key, 'credit': {}}
+                      for key in sources]
+
+        async def download(url):
+            return sources[url.rsplit('/', 1)[1][:-4]]
+
+        runs = []
+        try:
+            with patch.object(handler, 'fetch_images', AsyncMock(return_value=candidates)), \
+                 patch.object(handler, '_download', side_effect=download) as fetched:
+                for _ in range(3):
+                    runs.append([img['id'] for img in await handler.fetch_and_optimize_images('Garden', count=3)])
+        finally:
+            await handler.close()
+
+        assert runs == [['i0', 'i1', 'i2'], ['i3', 'i4', 'i5'], ['i0', 'i1', 'i2']]
+        # The last run takes the reused photos from the image cache
+        assert fetched.call_count == 6
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+# tests/unit/test_publish_scheduler.py
+import pytest
+import asyncio
+from unittest.mock import AsyncMock, Mock
+from main import WordPressAutomationSystem
+from src.content_management.publish_scheduler import PublishSlotScheduler
+
+class TestPublishSlotScheduler:
+    @pytest.mark.asyncio
+    async def test_slots_respect_interval(self):
+        scheduler = PublishSlotScheduler(0.05)
+        loop = asyncio.get_running_loop()
+        releases = []
+        for _ in range(3):
+            await scheduler.wait_for_slot()
+            releases.append(loop.time())
+        assert scheduler.released == 3
+        assert all(b - a >= 0.05 for a, b in zip(releases, releases[1:]))
+
+    @pytest.mark.asyncio
+    async def test_first_slot_is_immediate(self):
+        scheduler = PublishSlotScheduler(60)
+        assert scheduler.seconds_until_next_slot() == 0
+        await asyncio.wait_for(scheduler.wait_for_slot(), timeout=1)
+
+    def test_negative_interval_rejected(self):
+        with pytest.raises(ValueError):
+            PublishSlotScheduler(-1)
+
+class TestPipelinedExecution:
+    @pytest.fixture
+    def system(self):
+        system = WordPressAutomationSystem.__new__(WordPressAutomationSystem)
+        system.publish_scheduler = PublishSlotScheduler(0.05)
+        system.wordpress_poster = Mock(prepare_terms=AsyncMock())
+        return system
+
+    @pytest.mark.asyncio
+    async def test_preparation_overlaps_publish_interval(self, system):
+        loop = asyncio.get_running_loop()
+        prepared_at, published_at = [], []
+
+        async def prepare_content(topic):
+            await asyncio.sleep(0.02)
+            prepared_at.append(loop.time())
+            return {'topic_data': topic}
+
+        async def publish_content(prepared):
+            published_at.append(loop.time())
+            return {'post_id': prepared['topic_data']['topic']}
+
+        system.prepare_content = prepare_content
+        system.publish_content = publish_content
+        topics = [{'topic': f'Topic {i}'} for i in range(4)]
+
+        results = await system.process_batch_pipelined(topics, workers=4)
+
+        assert sorted(r['post_id'] for r in results) == sorted(t['topic'] for t in topics)
+        # All topics were prepared concurrently, before the later slots opened
+        assert max(prepared_at) < published_at[2]
+        assert all(b - a >= 0.05 for a, b in zip(published_at, published_at[1:]))
+
+    @pytest.mark.asyncio
+    async def test_failed_preparation_does_not_consume_slot(self, system):
+        async def prepare_content(topic):
+            return None if topic['topic'] == 'bad' else {'topic_data': topic}
+
+        system.prepare_content = prepare_content
+        system.publish_content = Mock(side_effect=lambda p: asyncio.sleep(0, {'post_id': 1}))
+
+        results = await system.process_batch_pipelined(
+            [{'topic': 'bad'}, {'topic': 'good'}], workers=2
+        )
+        assert len(results) == 1
+        assert system.publish_scheduler.released == 1
+
+    @pytest.mark.asyncio
+    async def test_batch_terms_prepared_before_first_publish(self, system):
+        calls = []
+        system.wordpress_poster.prepare_terms = AsyncMock(side_effect=lambda names: calls.append(names))
+
+        async def publish_content(prepared):
+            assert calls, 'published before the batch terms existed'
+            return {'post_id': 1}
+
+        system.prepare_content = lambda topic: asyncio.sleep(0, {'topic_data': topic})
+        system.publish_content = publish_content
+        topics = [{'topic': 'a', 'category': 'News', 'tags': 'x, y'},
+                  {'topic': 'b', 'category': 'Travel', 'tags': 'y,z'}]
+
+        await system.process_batch_pipelined(topics, workers=2)
+        assert calls == [{'category': ['News', 'Travel'], 'post_tag': ['x', 'y', 'y', 'z']}]
+
+    @pytest.mark.asyncio
+    async def test_publish_failure_stops_workers(self, system):
+        prepared = []
+
+        async def prepare_content(topic):
+            prepared.append(topic['topic'])
+            return {'topic_data': topic}
+
+        system.prepare_content = prepare_content
+        system.publish_scheduler.wait_for_slot = AsyncMock(side_effect=RuntimeError('scheduler broke'))
+        topics = [{'topic': f'Topic {i}'} for i in range(10)]
+
+        with pytest.raises(RuntimeError, match='scheduler broke'):
+            await asyncio.wait_for(system.process_batch_pipelined(topics, workers=1), 2)
+        await asyncio.sleep(0)
+        # The worker was blocked on the full ready queue and has been cancelled
+        assert len(prepared) < len(topics)
+        assert not [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
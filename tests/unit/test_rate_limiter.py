@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+
+# tests/unit/test_rate_limiter.py
+import pytest
+import asyncio
+from unittest.mock import Mock
+from src.generation_engine import GenerationEngine
+from src.rate_limiter import EnhancedRateLimiter, GCRA, RateLimit, parse_duration, parse_retry_after
+from tests.fixtures.fake_completion_server import FakeCompletionServer
+
+def limiter(per_minute=1200, per_hour=100000, burst=1):
+    # 1200 a minute one at a time is one slot every 50ms
+    return EnhancedRateLimiter(api_limits={'test': RateLimit(per_minute, per_hour, 1, 3, burst=burst)})
+
+class TestGCRA:
+    def test_burst_then_steady_rate(self):
+        # Two back to back, the other two of the four spaced 20s apart
+        window = GCRA(4, 60, burst=2)
+        for _ in range(2):
+            assert window.wait_time(0) == 0
+            window.consume(0)
+        assert window.wait_time(0) == pytest.approx(20)
+        assert window.used(0) == 2 and window.remaining(0) == 0
+        window.consume(20)
+        window.consume(40)
+        assert window.wait_time(40) == pytest.approx(20)
+        assert window.remaining(60) == 1
+
+    @pytest.mark.parametrize('limit,period,burst', [(20, 60, None), (20, 60, 5), (20, 60, 20), (1000, 3600, 100)])
+    def test_no_rolling_window_exceeds_limit(self, limit, period, burst):
+        window, now, admitted = GCRA(limit, period, burst), 0.0, []
+        while now < 4 * period:
+            wait = window.wait_time(now)
+            if wait > 0:
+                now += wait
+                continue
+            window.consume(now)
+            admitted.append(now)
+        first, busiest = 0, 0
+        for last, at in enumerate(admitted):
+            while admitted[first] <= at - period + 1e-6:
+                first += 1
+            busiest = max(busiest, last - first + 1)
+        assert busiest == limit
+
+    def test_burst_of_one_spaces_requests(self):
+        window = GCRA(60, 60, burst=1)
+        window.consume(0)
+        assert window.wait_time(0.5) == pytest.approx(0.5)
+        assert window.remaining(1) == 1
+
+class TestEnhancedRateLimiter:
+    @pytest.mark.asyncio
+    async def test_waiters_woken_when_slots_free(self):
+        rate_limiter = limiter()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        released = []
+
+        async def request():
+            assert await rate_limiter.acquire('test')
+            released.append(loop.time() - started)
+
+        await asyncio.gather(*[request() for _ in range(4)])
+        assert released[0] < 0.01
+        for earlier, later in zip(released, released[1:]):
+            assert 0.04 <= later - earlier < 0.08
+
+    @pytest.mark.asyncio
+    async def test_priority_served_first(self):
+        rate_limiter = limiter()
+        await rate_limiter.acquire('test')
+        order = []
+
+        async def request(name, priority):
+            await rate_limiter.acquire('test', priority=priority)
+            order.append(name)
+
+        low = [asyncio.ensure_future(request(f'low-{i}', 5)) for i in range(3)]
+        await asyncio.sleep(0)
+        urgent = asyncio.ensure_future(request('urgent', 0))
+        await asyncio.gather(*low, urgent)
+        assert order == ['urgent', 'low-0', 'low-1', 'low-2']
+
+    @pytest.mark.asyncio
+    async def test_callers_take_turns(self):
+        rate_limiter = limiter(per_minute=6000)
+        await rate_limiter.acquire('test')
+        order = []
+
+        async def request(caller):
+            await rate_limiter.acquire('test', caller=caller)
+            order.append(caller)
+
+        busy = [asyncio.ensure_future(request('busy')) for _ in range(6)]
+        await asyncio.sleep(0)
+        quiet = [asyncio.ensure_future(request('quiet')) for _ in range(2)]
+        await asyncio.gather(*busy, *quiet)
+        assert order[:4] == ['busy', 'quiet', 'busy', 'quiet']
+
+    @pytest.mark.asyncio
+    async def test_timeout_gives_up_slot(self):
+        rate_limiter = limiter(per_minute=60)
+        await rate_limiter.acquire('test')
+        assert await rate_limiter.acquire('test', timeout=0.05) is False
+        status = await rate_limiter.get_status('test')
+        assert status['timeouts'] == 1 and status['queue_size'] == 0
+        assert status['minute_usage'] == 1
+
+    @pytest.mark.asyncio
+    async def test_hour_window_also_applies(self):
+        rate_limiter = limiter(per_minute=6000, per_hour=2, burst=2)
+        assert await rate_limiter.acquire('test')
+        assert await rate_limiter.acquire('test')
+        assert await rate_limiter.acquire('test', timeout=0.05) is False
+        status = await rate_limiter.get_status('test')
+        assert status['hour_usage'] == 2
+        assert status['next_slot_in'] > 1000
+
+    @pytest.mark.asyncio
+    async def test_unknown_api_is_refused(self):
+        assert await limiter().acquire('missing') is False
+
+    def test_limits_from_config(self):
+        config_manager = Mock()
+        config_manager.get_credentials = lambda section: {
+            'openai_requests_per_minute': '40', 'wordpress_requests_per_hour': '120', 'unknown_requests_per_minute': '1'
+        }
+        rate_limiter = EnhancedRateLimiter(config_manager)
+        assert rate_limiter.api_limits['openai'].requests_per_minute == 40
+        assert rate_limiter.api_limits['wordpress'].requests_per_hour == 120
+        assert rate_limiter.states['openai'].minute.interval == pytest.approx(1.5)
+
+class TestAdaptiveLimits:
+    def test_durations_and_retry_after(self):
+        assert parse_duration('6m0s') == 360
+        assert parse_duration('1.5s') == 1.5
+        assert parse_duration('20ms') == pytest.approx(0.02)
+        assert parse_duration('soon') is None
+        assert parse_retry_after('3') == 3
+        assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0
+        assert parse_retry_after(None) is None
+
+    @pytest.mark.asyncio
+    async def test_throttling_halves_rate_and_pauses(self):
+        rate_limiter = limiter(per_minute=600)
+        rate_limiter.record_response('test', 429, {'Retry-After': '0.1'})
+        # Responses already on their way do not cut the rate again
+        rate_limiter.record_response('test', 429, {'Retry-After': '0.1'})
+        status = await rate_limiter.get_status('test')
+        assert status['live_limits']['minute'] == 300
+        assert 0.05 < status['paused_for'] <= 0.1
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        assert await rate_limiter.acquire('test')
+        assert loop.time() - started >= 0.09
+
+    @pytest.mark.asyncio
+    async def test_successes_ramp_back_to_ceiling(self):
+        rate_limiter = limiter(per_minute=600)
+        rate_limiter.record_response('test', 429, {'retry-after': '0'})
+        rate_limiter.record_response('test', 200, {})
+        state = rate_limiter.states['test']
+        # Additive steps of 5% of the ceiling
+        assert state.minute.limit == 330
+        for _ in range(20):
+            rate_limiter.record_response('test', 200, {})
+        assert state.minute.limit == 600
+        assert state.throttles == 0
+
+    @pytest.mark.asyncio
+    async def test_openai_headers_set_capacity_and_pause(self):
+        rate_limiter = EnhancedRateLimiter()
+        rate_limiter.record_response('openai', 200, {
+            'x-ratelimit-limit-requests': '500', 'x-ratelimit-remaining-requests': '499',
+            'x-ratelimit-reset-requests': '120ms'
+        })
+        state = rate_limiter.states['openai']
+        assert state.ceilings['minute'] == 500
+        # Climbs from the configured 20 a minute toward what OpenAI allows
+        assert state.minute.limit == 45
+
+        rate_limiter.record_response('openai', 200, {
+            'x-ratelimit-limit-requests': '500', 'x-ratelimit-remaining-requests': '0',
+            'x-ratelimit-reset-requests': '6m0s'
+        })
+        status = await rate_limiter.get_status('openai')
+        assert status['minute_usage'] == status['live_limits']['minute']
+        assert 359 < status['paused_for'] <= 360
+
+    @pytest.mark.asyncio
+    async def test_openai_token_budget_holds_requests(self):
+        rate_limiter = EnhancedRateLimiter()
+        rate_limiter.record_response('openai', 200, {
+            'x-ratelimit-limit-tokens': '40000', 'x-ratelimit-remaining-tokens': '1000',
+            'x-ratelimit-reset-tokens': '1.5s'
+        })
+        status = await rate_limiter.get_status('openai')
+        assert 1.4 < status['paused_for'] <= 1.5
+
+    @pytest.mark.asyncio
+    async def test_unsplash_remaining_syncs_hour_window(self):
+        rate_limiter = EnhancedRateLimiter()
+        rate_limiter.record_response('unsplash', 200, {'X-Ratelimit-Limit': '50', 'X-Ratelimit-Remaining': '10'})
+        status = await rate_limiter.get_status('unsplash')
+        assert status['ceilings']['hour'] == 50
+        assert status['hour_usage'] == 40
+
+    @pytest.mark.asyncio
+    async def test_engine_reports_openai_headers(self):
+        server = await FakeCompletionServer(delay=0, headers={
+            'x-ratelimit-limit-requests': '500', 'x-ratelimit-remaining-requests': '0',
+            'x-ratelimit-reset-requests': '2s'
+        }).start()
+        engine = GenerationEngine({'model': 'gpt-4', 'api_key': 'test', 'base_url': server.base_url})
+        engine.rate_limiter = EnhancedRateLimiter()
+        try:
+            await engine.complete([{'role': 'user', 'content': 'hi'}])
+        finally:
+            await engine.close()
+            await server.stop()
+        status = await engine.rate_limiter.get_status('openai')
+        assert status['acquired'] == 1
+        assert status['ceilings']['minute'] == 500
+        assert status['paused_for'] > 1
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+# tests/unit/test_rendition_engine.py
+import pytest
+from io import BytesIO
+from unittest.mock import patch
+from PIL import Image
+from src.media_system import rendition_engine
+from src.media_system.featured_image import FeaturedImageHandler
+from src.media_system.rendition_engine import RenditionEngine, RenditionSpec, default_renditions
+
+def encode(size, format='JPEG', mode='RGB'):
+    output = BytesIO()
+    Image.new(mode, size, 'orange').save(output, format=format)
+    return output.getvalue()
+
+class TestRenditionEngine:
+    def test_all_renditions_come_from_one_decode(self):
+        engine = RenditionEngine()
+        with patch.object(rendition_engine, 'open_for_size', wraps=rendition_engine.open_for_size) as decode:
+            renditions = engine.render(encode((4000, 3000)))
+
+        assert decode.call_count == 1
+        # The decode only needs to cover the largest rendition
+        assert decode.call_args.args[1] == (1200, 900)
+        assert {name: r['size'] for name, r in renditions.items()} == {
+            'featured': (1200, 630),
+            'large': (1067, 800),
+            'w800': (800, 600),
+            'w400': (400, 300),
+            'thumbnail': (150, 150)
+        }
+        for rendition in renditions.values():
+            assert Image.open(BytesIO(rendition['data'])).size == rendition['size']
+
+    def test_featured_crop_covers_wide_sources(self):
+        renditions = RenditionEngine().render(encode((6000, 1500)))
+        assert renditions['featured']['size'] == (1200, 630)
+        assert renditions['large']['size'] == (1200, 300)
+
+    def test_source_size_covers_every_rendition(self):
+        engine = RenditionEngine()
+        assert engine.source_size((4000, 3000)) == (1200, 900)
+        # The featured crop needs 630 rows, not the 400 of a 1200-wide panorama
+        assert engine.source_size((3600, 1200)) == (1890, 630)
+        assert engine.source_size((600, 400)) == (600, 400)
+
+    def test_small_sources_are_never_upscaled(self):
+        renditions = RenditionEngine().render(encode((600, 400), format='PNG'))
+        assert renditions['large']['size'] == (600, 400)
+        assert renditions['w800']['size'] == (600, 400)
+        # Cropped to the featured shape at the source's own resolution
+        assert renditions['featured']['size'] == (600, 315)
+
+    def test_webp_alongside_jpeg(self):
+        engine = RenditionEngine(webp=True)
+        renditions = engine.render(encode((1600, 1200), format='PNG', mode='RGBA'))
+        for rendition in renditions.values():
+            assert Image.open(BytesIO(rendition['webp'])).format == 'WEBP'
+            assert Image.open(BytesIO(rendition['data'])).format == 'JPEG'
+
+    def test_from_settings(self):
+        engine = RenditionEngine.from_settings({
+            'image_max_width': '1000', 'image_max_height': '700', 'image_quality': '70',
+            'image_content_widths': '640, 320', 'image_thumbnail_size': '100', 'image_webp': 'true'
+        })
+        assert engine.renditions == default_renditions(1000, 700, (640, 320), 100)
+        assert engine.quality == 70
+        assert engine.webp
+        assert engine.max_width == 1200
+
+    def test_rejects_duplicate_names(self):
+        with pytest.raises(ValueError):
+            RenditionEngine((RenditionSpec('large', 800), RenditionSpec('large', 400)))
+
+class TestFeaturedImageHandler:
+    @pytest.mark.asyncio
+    async def test_uses_existing_featured_rendition(self):
+        handler = FeaturedImageHandler()
+        featured = {'data': b'featured', 'size': (1200, 630)}
+        with patch.object(handler.rendition_engine, 'render') as render:
+            result = await handler.process_featured_image({
+                'id': 'abc', 'data': b'large', 'renditions': {'featured': featured},
+                'description': 'A garden', 'credit': {'name': 'Jane'}
+            })
+        render.assert_not_called()
+        assert result['data'] == b'featured'
+        assert result['alt_text'] == 'A garden'
+        assert result['caption'] == 'Photo by Jane on Unsplash'
+
+    @pytest.mark.asyncio
+    async def test_renders_from_original(self):
+        handler = FeaturedImageHandler()
+        result = await handler.process_featured_image({'id': 'abc', 'data': encode((2400, 1600))})
+        assert Image.open(BytesIO(result['data'])).size == (1200, 630)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+# tests/unit/test_section_generator.py
+import pytest
+import json
+import time
+from src.generation_engine import GenerationEngine
+from src.section_generator import SectionedArticleGenerator
+from tests.fixtures.fake_completion_server import FakeCompletionServer
+
+KEYWORDS = {'primary': ['organic gardening'], 'word_count': 3200}
+
+def fake_content(payload):
+    prompt = payload['messages'][0]['content']
+    if 'Return only JSON' in prompt:
+        return json.dumps({'title': 'Organic Gardening Guide', 'sections': ['Soil', 'Compost', 'Pests', 'Harvest']})
+    return f"<p>{prompt.split(chr(10))[-3].strip()}</p>"
+
+class TestSectionedArticleGenerator:
+    @pytest.fixture
+    async def completion_server(self):
+        server = FakeCompletionServer(delay=0.2, content=fake_content)
+        await server.start()
+        yield server
+        await server.stop()
+
+    @pytest.fixture
+    async def section_generator(self, completion_server):
+        engine = GenerationEngine({
+            'api_key': 'sk-test-key',
+            'model': 'gpt-4',
+            'base_url': completion_server.base_url,
+            'max_concurrent_requests': 8
+        })
+        yield SectionedArticleGenerator(engine)
+        await engine.close()
+
+    def test_parse_outline_handles_literal_newlines(self, section_generator):
+        outline = section_generator.parse_outline("Introduction\\nBasics\\nTips\\nFAQ\\nConclusion")
+        assert outline == ['Introduction', 'Basics', 'Tips', 'FAQ', 'Conclusion']
+        assert section_generator._body_headings(outline) == ['Basics', 'Tips']
+
+    @pytest.mark.asyncio
+    async def test_sections_generated_concurrently(self, section_generator, completion_server):
+        start = time.perf_counter()
+        content = await section_generator.generate('Organic Gardening', KEYWORDS)
+        elapsed = time.perf_counter() - start
+
+        headings = ['Soil', 'Compost', 'Pests', 'Harvest', 'Frequently Asked Questions', 'Conclusion']
+        positions = [content.index(f"<h2>{h}</h2>") for h in headings]
+        assert positions == sorted(positions)
+        assert content.startswith("<h1>Organic Gardening Guide</h1>")
+        # One outline round trip plus one concurrent wave of seven parts
+        assert len(completion_server.requests) == 8
+        assert completion_server.peak_in_flight == 7
+        assert elapsed < 1.0
+
+    @pytest.mark.asyncio
+    async def test_custom_outline_skips_outline_request(self, section_generator, completion_server):
+        outline = section_generator.parse_outline("Introduction\\nBasics\\nTips\\nConclusion")
+        content = await section_generator.generate('Organic Gardening', KEYWORDS, outline)
+        assert "<h2>Basics</h2>" in content and "<h2>Tips</h2>" in content
+        assert not any('Return only JSON' in r['messages'][0]['content'] for r in completion_server.requests)
+        assert len(completion_server.requests) == 5
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+# tests/unit/test_single_flight.py
+import pytest
+import asyncio
+from unittest.mock import patch
+from src.single_flight import SingleFlight, normalize_key
+from src.content_generator import EnhancedContentGenerator
+from src.image_handler import ImageHandler
+
+class TestSingleFlight:
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight('test')
+        calls = []
+
+        async def fetch(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return {'value': value}
+
+        results = await asyncio.gather(*[flight.do('key', fetch, 1) for _ in range(5)])
+
+        assert calls == [1]
+        assert results == [{'value': 1}] * 5
+        # Followers get their own copy of the shared result
+        assert len({id(result) for result in results}) == 5
+        assert flight.get_stats() == {'calls': 5, 'executions': 1, 'deduplicated': 4, 'in_flight': 0}
+
+    @pytest.mark.asyncio
+    async def test_sequential_calls_are_not_coalesced(self):
+        flight = SingleFlight('test')
+
+        async def fetch():
+            return 'done'
+
+        await flight.do('key', fetch)
+        await flight.do('key', fetch)
+        assert flight.get_stats()['executions'] == 2
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_waiter(self):
+        flight = SingleFlight('test')
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError('boom')
+
+        results = await asyncio.gather(*[flight.do('key', fail) for _ in range(3)], return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert flight.get_stats()['executions'] == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_others(self):
+        flight = SingleFlight('test')
+
+        async def fetch():
+            await asyncio.sleep(0.02)
+            return 'done'
+
+        first = asyncio.ensure_future(flight.do('key', fetch))
+        second = asyncio.ensure_future(flight.do('key', fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == 'done'
+
+    @pytest.mark.asyncio
+    async def test_call_cancelled_when_every_waiter_leaves(self):
+        flight = SingleFlight('test')
+        started = asyncio.Event()
+        finished = []
+
+        async def fetch():
+            started.set()
+            await asyncio.sleep(1)
+            finished.append(True)
+
+        waiter = asyncio.ensure_future(flight.do('key', fetch))
+        await started.wait()
+        waiter.cancel()
+        await asyncio.sleep(0.01)
+        assert finished == []
+        assert flight.get_stats()['in_flight'] == 0
+
+    def test_normalize_key_ignores_case_spacing_and_order(self):
+        assert normalize_key(' Organic  Gardening', {'primary': ['b', 'A']}) == \
+            normalize_key('organic gardening', {'primary': ['a', 'b']})
+        assert normalize_key('organic gardening') != normalize_key('urban gardening')
+
+class TestSingleFlightIntegration:
+    @pytest.mark.asyncio
+    async def test_duplicate_topics_share_one_generation(self, config_manager):
+        generator = EnhancedContentGenerator(config_manager)
+        calls = []
+
+        async def generate_article(topic, keywords, outline=None):
+            calls.append(topic)
+            await asyncio.sleep(0.01)
+            return f"<h2>{topic}</h2>"
+
+        generator.generate_article = generate_article
+        keywords = {'primary': ['soil', 'compost']}
+        results = await asyncio.gather(
+            generator._generate_with_retry('Organic Gardening', keywords),
+            generator._generate_with_retry('organic gardening ', {'primary': ['compost', 'soil']}),
+            generator._generate_with_retry('Urban Gardening', keywords)
+        )
+
+        assert len(calls) == 2
+        assert results[0] == results[1]
+        assert generator.get_generation_metrics()['single_flight']['deduplicated'] == 1
+
+    @pytest.mark.asyncio
+    async def test_duplicate_image_queries_share_one_search(self, config_manager):
+        handler = ImageHandler(config_manager)
+
+        async def slow_search(*args, **kwargs):
+            await asyncio.sleep(0.02)
+            return {'results': []}
+
+        with patch.object(handler, '_get_json', side_effect=slow_search) as get_json:
+            await asyncio.gather(*[handler.fetch_images('Garden Tools') for _ in range(3)])
+        assert get_json.call_count == 1
+        assert handler.single_flight.get_stats()['deduplicated'] == 2
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+# tests/unit/test_stream_monitor.py
+import pytest
+from src.content_generator import EnhancedContentGenerator
+from src.stream_monitor import StreamAbortError, StreamCheckpoint, StreamMonitor, StreamRules
+from tests.fixtures.fake_completion_server import FakeCompletionServer
+
+ENGLISH_PARAGRAPH = "<p>This is a short paragraph about the garden and how we can grow food in it.</p>\n"
+
+class TestStreamMonitor:
+    def _feed_in_pieces(self, monitor, text, size=5):
+        for start in range(0, len(text), size):
+            monitor.feed(text[start:start + size])
+
+    def test_counts_words_and_headings_across_split_deltas(self):
+        monitor = StreamMonitor(StreamRules(language=None))
+        self._feed_in_pieces(monitor, "<h1>Title here</h1>\n<h2>First part</h2>\nsome body words <h2>Second</h2> end", 3)
+        content = monitor.finish()
+        assert monitor.heading_counts['h1'] == 1
+        assert monitor.heading_counts['h2'] == 2
+        assert monitor.word_count == len(content.split())
+
+    def test_aborts_on_runaway_length(self):
+        monitor = StreamMonitor(StreamRules(max_words=50, heading_within_words=0, language=None))
+        with pytest.raises(StreamAbortError) as exc_info:
+            self._feed_in_pieces(monitor, "<h2>Heading</h2> " + "word " * 100)
+        assert exc_info.value.rule == 'length'
+        assert monitor.word_count == 51
+
+    def test_aborts_without_early_h2(self):
+        monitor = StreamMonitor(StreamRules(heading_within_words=20, language=None))
+        with pytest.raises(StreamAbortError) as exc_info:
+            self._feed_in_pieces(monitor, "word " * 40)
+        assert exc_info.value.rule == 'structure'
+
+    def test_aborts_on_wrong_language(self):
+        monitor = StreamMonitor(StreamRules(heading_within_words=0, language_check_words=30))
+        with pytest.raises(StreamAbortError) as exc_info:
+            self._feed_in_pieces(monitor, "<h2>Jardin</h2> " + "jardinage biologique durable " * 20)
+        assert exc_info.value.rule == 'language'
+
+    def test_english_passes_language_check(self):
+        monitor = StreamMonitor(StreamRules(heading_within_words=0, language_check_words=30))
+        self._feed_in_pieces(monitor, "<h2>Garden</h2>\n" + ENGLISH_PARAGRAPH * 5)
+        assert monitor.language_checked
+
+class TestStreamingGeneration:
+    @pytest.fixture
+    async def completion_server(self):
+        server = FakeCompletionServer(delay=0, content="<h2>Intro</h2>\n" + ENGLISH_PARAGRAPH * 20)
+        await server.start()
+        yield server
+        await server.stop()
+
+    @pytest.fixture
+    def generator(self, config_manager, completion_server, tmp_path):
+        credentials = config_manager.get_credentials
+        config_manager.get_credentials = lambda service=None: (
+            {**credentials('openai'), 'base_url': completion_server.base_url} if service == 'openai'
+            else {'mode': 'streaming', 'stream_checkpoint_interval': '10', 'checkpoint_dir': str(tmp_path)}
+            if service == 'generation' else credentials(service)
+        )
+        return EnhancedContentGenerator(config_manager)
+
+    @pytest.mark.asyncio
+    async def test_streams_complete_article(self, generator, completion_server, tmp_path):
+        content = await generator.generate_article('Gardening', {'primary': ['garden']})
+        assert content == completion_server.content
+        assert completion_server.requests[0]['stream'] is True
+        assert not list(tmp_path.glob('*.txt'))
+
+    @pytest.mark.asyncio
+    async def test_early_abort_clears_checkpoint(self, generator, completion_server, tmp_path):
+        generator.stream_rules = StreamRules(max_words=30, language=None)
+        with pytest.raises(StreamAbortError):
+            await generator.generate_article('Gardening', {'primary': ['garden']})
+        assert not list(tmp_path.glob('*.txt'))
+
+    @pytest.mark.asyncio
+    async def test_resumes_from_checkpoint(self, generator, completion_server, tmp_path):
+        keywords = {'primary': ['garden']}
+        StreamCheckpoint(tmp_path / f"{generator._checkpoint_key('Gardening', keywords)}.txt").save(
+            "<h2>Saved</h2>\n" + ENGLISH_PARAGRAPH
+        )
+        content = await generator.generate_article('Gardening', keywords)
+        assert content.startswith("<h2>Saved</h2>")
+        messages = completion_server.requests[0]['messages']
+        assert messages[1]['role'] == 'assistant'
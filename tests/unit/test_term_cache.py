@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+# tests/unit/test_term_cache.py
+import pytest
+import asyncio
+import time
+from src.cache_engine import CacheEngine
+from src.term_cache import TermCache, term_key
+from tests.fixtures.fake_xmlrpc_server import FakeXmlrpcServer
+
+class FakeSite:
+    """Terms of one taxonomy, served in pages ordered by id."""
+
+    def __init__(self, names=()):
+        self.terms = {}
+        self.pages = []
+        self.created = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        for name in names:
+            self.add(name)
+
+    def add(self, name):
+        term_id = len(self.terms) + 1
+        self.terms[term_id] = name
+        return term_id
+
+    async def fetch_page(self, taxonomy, offset, number, newest_first):
+        self.pages.append((offset, newest_first))
+        ids = sorted(self.terms, reverse=newest_first)[offset:offset + number]
+        return [{'id': term_id, 'name': self.terms[term_id]} for term_id in ids]
+
+    async def create_term(self, taxonomy, name):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if any(term_key(existing) == term_key(name) for existing in self.terms.values()):
+            raise ValueError('A term with the name provided already exists.')
+        self.created.append(name)
+        return self.add(name)
+
+def make_cache(site, tmp_path, **kwargs):
+    return TermCache('https://test.com/xmlrpc.php', site.fetch_page, site.create_term,
+                     engine=CacheEngine(tmp_path / 'cache.db'), page_size=2, **kwargs)
+
+class TestTermCache:
+    @pytest.mark.asyncio
+    async def test_loads_all_pages_once(self, tmp_path):
+        site = FakeSite(['News', 'Food &amp; Drink', 'Travel', 'Tech', 'Sport'])
+        cache = make_cache(site, tmp_path)
+        ids = await cache.resolve({'category': ['travel', 'Food & Drink', 'Travel']})
+
+        assert ids == {'category': [3, 2]}
+        assert site.pages == [(0, False), (2, False), (4, False)]
+        # A second process finds the terms in the cache engine
+        again = TermCache(cache.site_url, site.fetch_page, site.create_term, engine=cache.engine, page_size=2)
+        site.pages.clear()
+        assert await again.resolve({'category': ['News']}) == {'category': [1]}
+        assert site.pages == []
+
+    @pytest.mark.asyncio
+    async def test_refresh_reads_only_new_terms(self, tmp_path):
+        site = FakeSite(['a', 'b', 'c', 'd'])
+        cache = make_cache(site, tmp_path)
+        await cache.ensure({'post_tag': ['a']})
+        site.add('e')
+        site.pages.clear()
+
+        assert await cache.resolve({'post_tag': ['e']}) == {'post_tag': [5]}
+        assert site.pages == [(0, True)]
+        assert site.created == []
+
+    @pytest.mark.asyncio
+    async def test_missing_terms_created_together(self, tmp_path):
+        site = FakeSite(['existing'])
+        cache = make_cache(site, tmp_path)
+        await cache.ensure({'post_tag': ['existing', 'one', 'two', 'three', 'One']})
+
+        assert sorted(site.created) == ['one', 'three', 'two']
+        assert site.peak_in_flight == 3
+        site.pages.clear()
+        ids = await cache.resolve({'post_tag': ['one', 'two', 'three']})
+        assert sorted(ids['post_tag']) == [2, 3, 4]
+        assert site.pages == []
+
+    @pytest.mark.asyncio
+    async def test_term_created_elsewhere_is_picked_up(self, tmp_path):
+        site = FakeSite(['a'])
+        cache = make_cache(site, tmp_path)
+        await cache.ensure({'category': ['a']})
+        original = site.create_term
+
+        async def create_term(taxonomy, name):
+            # Another writer adds the term between our refresh and our create
+            site.add(name)
+            return await original(taxonomy, name)
+
+        cache.create_term = create_term
+        assert await cache.resolve({'category': ['b']}) == {'category': [2]}
+
+    @pytest.mark.asyncio
+    async def test_reloads_when_old(self, tmp_path):
+        site = FakeSite(['a', 'b'])
+        cache = make_cache(site, tmp_path, reload_after_hours=1)
+        await cache.ensure({'category': ['a']})
+        cache._taxonomies['category']['loaded_at'] = time.time() - 7200
+        del site.terms[2]
+        site.pages.clear()
+
+        await cache.ensure({'category': ['a']})
+        assert site.pages == [(0, False)]
+        assert cache.get_stats()['terms'] == {'category': 1}
+
+class TestPosterTerms:
+    @pytest.fixture
+    def server(self):
+        server = FakeXmlrpcServer(delay=0.02).start()
+        server.add_term('category', 'News')
+        server.add_term('post_tag', 'beach')
+        yield server
+        server.stop()
+
+    @pytest.fixture
+    def poster(self, server, make_poster):
+        return make_poster(server.url)
+
+    @pytest.mark.asyncio
+    async def test_batch_terms_created_in_one_request(self, server, poster):
+        server.reset_counts()
+        await poster.prepare_terms({'category': ['News', 'Travel'],
+                                    'post_tag': ['beach', 'summer', 'sun', 'sea']})
+        assert server.calls.count('wp.newTerm') == 4
+        # Both taxonomies load, then refresh, then create, each in one multicall
+        assert server.requests == 3
+
+        server.reset_counts()
+        post_id = await poster.create_post({'title': 'Post', 'content': '<p>Hi</p>',
+                                            'categories': ['Travel'], 'tags': ['Sun', 'beach']})
+        assert server.calls == ['wp.newPost']
+        terms = {taxonomy: sorted(ids) for taxonomy, ids in server.posts[post_id]['terms'].items()}
+        names = {term['name']: int(term['term_id']) for term in server.terms.values()}
+        assert terms == {'category': [names['Travel']], 'post_tag': sorted([names['sun'], names['beach']])}
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+# tests/unit/test_text_analysis.py
+import pytest
+from src.text_analysis import AnalyzedDocument, analyze_text
+from src.data_processing.keyword_manager import KeywordManager
+
+SAMPLE = """<h1>Organic Gardening Tips</h1>
+
+<p>Organic gardening starts with soil. Read our <a href="https://example.com/soil">soil guide</a>!</p>
+
+<h2>Why organic-gardening works</h2>
+
+<p>Healthy soil feeds plants. Organic gardening tips help beginners grow food.</p>"""
+
+class TestAnalyzedDocument:
+    def test_single_pass_fields(self):
+        doc = analyze_text(SAMPLE)
+        assert doc.word_count == len(SAMPLE.split())
+        assert len(doc.paragraphs) == 4
+        assert doc.headings == ((1, 'Organic Gardening Tips'), (2, 'Why organic-gardening works'))
+        assert doc.links == ('https://example.com/soil',)
+        assert doc.flesch_score != 0
+
+    def test_same_content_reuses_document(self):
+        doc = analyze_text(SAMPLE)
+        assert analyze_text(SAMPLE) is doc
+        assert analyze_text(doc) is doc
+
+    def test_document_is_immutable(self):
+        doc = analyze_text(SAMPLE)
+        with pytest.raises(AttributeError):
+            doc.text = "changed"
+        with pytest.raises(TypeError):
+            doc.token_index['organic'] = ()
+
+    def test_keyword_positions_use_word_boundaries(self):
+        doc = AnalyzedDocument.from_text("garden gardening garden tips, garden-tips")
+        assert doc.count_keyword('garden') == 3
+        assert doc.count_keyword('garden tips') == 1
+        assert doc.keyword_positions('garden tips') == (2,)
+        assert doc.count_keyword('garden-tips') == 1
+        assert doc.count_keyword('tips garden') == 0
+
+    @pytest.mark.asyncio
+    async def test_keyword_manager_consumes_document(self):
+        manager = KeywordManager()
+        usage = await manager.analyze_keyword_usage(
+            analyze_text(SAMPLE),
+            {'primary': ['organic gardening'], 'secondary': ['soil']}
+        )
+        assert usage['keyword_counts'] == {'primary': {'organic gardening': 3}, 'secondary': {'soil': 4}}
+        assert usage['heading_usage']['organic gardening'] == ['Organic Gardening Tips']
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+
+# tests/unit/test_uniqueness_validator.py
+import random
+import difflib
+import pytest
+import numpy as np
+from unittest.mock import patch
+from src.uniqueness_validator import UniquenessValidator
+from src.minhash_index import MinHashLSHIndex, hash_shingles
+from src.fingerprint_store import FingerprintStore, hash_words, jaccard
+
+WORDS = ('garden soil compost water seed plant root leaf sun shade grow harvest bloom '
+         'weed mulch prune pot bed tool season rain insect worm fruit flower').split()
+
+def make_article(seed, words=600):
+    rng = random.Random(seed)
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+def edit(text, fraction, seed=0):
+    rng = random.Random(seed)
+    words = text.split()
+    for i in rng.sample(range(len(words)), int(len(words) * fraction)):
+        words[i] = rng.choice(WORDS)
+    return ' '.join(words)
+
+class TestMinHashLSHIndex:
+    def test_near_duplicates_share_a_bucket(self, tmp_path):
+        index = MinHashLSHIndex(tmp_path / 'index.db')
+        original = make_article(1)
+        index.add('original', index.signature(original))
+        assert index.query(index.signature(edit(original, 0.1))) == ['original']
+        assert index.query(index.signature(make_article(2))) == []
+
+    def test_signatures_persist_and_tombstones_apply(self, tmp_path):
+        path = tmp_path / 'index.db'
+        index = MinHashLSHIndex(path)
+        for key in ('a', 'b'):
+            index.add(key, index.signature(make_article(key)))
+        index.remove('a')
+
+        reloaded = MinHashLSHIndex(path)
+        assert len(reloaded) == 1 and 'b' in reloaded
+        assert reloaded.query(reloaded.signature(make_article('b'))) == ['b']
+
+    def test_changed_parameters_discard_old_signatures(self, tmp_path):
+        path = tmp_path / 'index.db'
+        index = MinHashLSHIndex(path)
+        index.add('a', index.signature(make_article(1)))
+        assert len(MinHashLSHIndex(path, num_perm=64, bands=16)) == 0
+
+    def test_buckets_stay_on_disk(self, tmp_path):
+        index = MinHashLSHIndex(tmp_path / 'index.db')
+        index.add_many((key, index.signature(make_article(key))) for key in ('a', 'b', 'c'))
+        count = lambda: index._conn.execute('SELECT COUNT(*) FROM buckets').fetchone()[0]
+        assert count() == 3 * index.bands
+        assert index.get('b').tolist() == index.signature(make_article('b')).tolist()
+        index.remove('b')
+        assert count() == 2 * index.bands and index.get('b') is None
+
+class TestUniquenessValidator:
+    @pytest.mark.asyncio
+    async def test_only_candidates_are_compared(self, tmp_path):
+        validator = UniquenessValidator(str(tmp_path))
+        original = make_article(1)
+        for seed in range(2, 12):
+            await validator.check_uniqueness(make_article(seed))
+        await validator.check_uniqueness(original)
+
+        with patch('src.uniqueness_validator.SequenceMatcher', wraps=difflib.SequenceMatcher) as matcher:
+            result = await validator.check_uniqueness(edit(original, 0.05))
+
+        assert matcher.call_count == 1
+        assert list(result['similarity_scores']) == [validator._generate_hash(original)]
+        assert result['is_unique'] is False
+
+    @pytest.mark.asyncio
+    async def test_unrelated_content_is_unique(self, tmp_path):
+        validator = UniquenessValidator(str(tmp_path))
+        await validator.check_uniqueness(make_article(1))
+        result = await validator.check_uniqueness(make_article(2))
+        assert result['is_unique'] is True
+        assert result['similarity_scores'] == {}
+
+    @pytest.mark.asyncio
+    async def test_existing_cache_is_backfilled(self, tmp_path):
+        article = make_article(3)
+        (tmp_path / 'legacy.txt').write_text(article, encoding='utf-8')
+        validator = UniquenessValidator(str(tmp_path))
+        assert 'legacy' in validator.index
+        result = await validator.check_uniqueness(article)
+        assert result['similarity_scores']['legacy'] == pytest.approx(1.0)
+
+    @pytest.mark.asyncio
+    async def test_index_rebuilds_from_fingerprints_without_reading_text(self, tmp_path):
+        validator = UniquenessValidator(str(tmp_path))
+        article = make_article(4)
+        await validator.check_uniqueness(article)
+        validator.index.close()
+        (tmp_path / 'minhash_index.db').unlink()
+
+        with patch('pathlib.Path.read_text') as read_text:
+            rebuilt = UniquenessValidator(str(tmp_path))
+        read_text.assert_not_called()
+        assert validator._generate_hash(article) in rebuilt.index
+
+    @pytest.mark.asyncio
+    async def test_cleanup_forgets_old_articles(self, tmp_path):
+        validator = UniquenessValidator(str(tmp_path))
+        article = make_article(5)
+        with patch('src.cache_engine.time.time', return_value=1000.0):
+            await validator.check_uniqueness(article)
+        await validator.cleanup_old_cache(max_age_days=30)
+
+        key = validator._generate_hash(article)
+        assert key not in validator.index and key not in validator.fingerprints
+        assert (await validator.check_uniqueness(article))['similarity_scores'] == {}
+
+    @pytest.mark.asyncio
+    async def test_corpus_survives_cache_eviction(self, tmp_path):
+        validator = UniquenessValidator(str(tmp_path))
+        article = make_article(6)
+        await validator.check_uniqueness(article)
+        validator.engine.max_bytes = 2000
+        for index in range(20):
+            validator.engine.set('content', f'page-{index}', 'x' * 500)
+
+        assert validator.engine.stats()['evictions'] > 0
+        assert validator.engine.get('uniqueness_text', validator._generate_hash(article)) == article
+        result = await validator.check_uniqueness(edit(article, 0.05))
+        assert validator._generate_hash(article) in result['similarity_scores']
+
+class TestFingerprintStore:
+    def test_fingerprints_round_trip_through_memory_map(self, tmp_path):
+        store = FingerprintStore(tmp_path)
+        article = make_article(1)
+        store.add('a', store.fingerprint(article))
+        fingerprint = FingerprintStore(tmp_path).get('a')
+        assert isinstance(fingerprint.words, np.memmap)
+        assert np.array_equal(fingerprint.words, hash_words(article))
+        assert np.array_equal(fingerprint.shingles, hash_shingles(article))
+
+    def test_appends_after_open_are_readable(self, tmp_path):
+        store = FingerprintStore(tmp_path)
+        store.add('a', store.fingerprint(make_article(1)))
+        store.get('a')
+        store.add('b', store.fingerprint(make_article(2)))
+        assert np.array_equal(store.get('b').words, hash_words(make_article(2)))
+
+    def test_word_jaccard_matches_set_jaccard(self):
+        first, second = make_article(1), edit(make_article(1), 0.3)
+        words_a, words_b = set(first.split()), set(second.split())
+        expected = len(words_a & words_b) / len(words_a | words_b)
+        assert jaccard(hash_words(first), hash_words(second)) == pytest.approx(expected)
+
+    def test_compact_drops_removed_entries(self, tmp_path):
+        store = FingerprintStore(tmp_path)
+        for seed in range(5):
+            store.add(str(seed), store.fingerprint(make_article(seed)))
+        store.remove('1')
+        store.remove('3')
+        stats = store.compact()
+        assert stats['entries'] == 3
+        assert stats['bytes_after'] < stats['bytes_before']
+
+        reopened = FingerprintStore(tmp_path)
+        assert sorted(reopened.keys()) == ['0', '2', '4']
+        assert np.array_equal(reopened.get('4').shingles, hash_shingles(make_article(4)))
+
+    def test_truncated_index_record_is_ignored(self, tmp_path):
+        store = FingerprintStore(tmp_path)
+        store.add('a', store.fingerprint(make_article(1)))
+        with open(store.index_path, 'ab') as f:
+            f.write(b'partial')
+        assert list(FingerprintStore(tmp_path).keys()) == ['a']
+
+    def test_add_after_torn_writes_stays_aligned(self, tmp_path):
+        store = FingerprintStore(tmp_path)
+        first = store.fingerprint(make_article(1))
+        store.add('a', first)
+        with open(store.data_path, 'ab') as f:
+            f.write(b'abcdef')
+        with open(store.index_path, 'ab') as f:
+            f.write(b'partial')
+
+        second = store.fingerprint(make_article(2))
+        reopened = FingerprintStore(tmp_path)
+        reopened.add('b', second)
+        assert reopened.data_path.stat().st_size % 4 == 0
+
+        store = FingerprintStore(tmp_path)
+        assert list(store.keys()) == ['a', 'b']
+        for key, fingerprint in (('a', first), ('b', second)):
+            stored = store.get(key)
+            assert np.array_equal(stored.words, fingerprint.words)
+            assert np.array_equal(stored.shingles, fingerprint.shingles)
@@ -2,8 +2,12 @@
 
 # tests/unit/test_wordpress_poster.py
 import pytest
-from unittest.mock import patch, Mock
+import threading
+import time
+from unittest.mock import AsyncMock, patch, Mock
+from wordpress_xmlrpc.methods import media
 from src.wordpress_poster import WordPressPoster
+from src.xmlrpc_executor import SiteExecutor
 
 class TestWordPressPoster:
     @pytest.fixture
@@ -33,4 +37,76 @@ class TestWordPressPoster:
                 'url': 'test.jpg',
                 'alt': 'Test Image'
             })
-            assert result['id'] == 456
\ No newline at end of file
+            assert result['id'] == 456
+
+class SlowWordPress:
+    """Stands in for the XML-RPC client; every call takes 0.1s like a real round trip.
+
+    State lives in shared containers because the poster copies the client per thread.
+    """
+
+    def __init__(self):
+        self.url = 'https://test.com/xmlrpc.php'
+        self.lock = threading.Lock()
+        self.stats = {'in_flight': 0, 'max_in_flight': 0}
+        self.calls = []
+
+    def call(self, method):
+        with self.lock:
+            self.calls.append(method.method_name)
+            self.stats['in_flight'] += 1
+            self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self.stats['in_flight'])
+        time.sleep(0.1)
+        with self.lock:
+            self.stats['in_flight'] -= 1
+        if isinstance(method, media.UploadFile):
+            name = method.data['name']
+            return {'id': name, 'url': f'https://test.com/uploads/{name}', 'file': name}
+        return 789
+
+class TestConcurrentMediaUploads:
+    @pytest.fixture
+    def poster(self, make_poster):
+        site = SlowWordPress()
+        return make_poster(client=site), site
+
+    @pytest.mark.asyncio
+    async def test_images_upload_together_within_limit(self, poster):
+        poster, site = poster
+        poster.batcher.executor = SiteExecutor(site, max_workers=3)
+        content = {
+            'title': 'Test Post',
+            'content': '<p>Intro</p><h2>One</h2><p>a</p><h2>Two</h2><p>b</p><h2>Three</h2><p>c</p>',
+            'featured_image': {'id': 'f', 'data': b'featured'},
+            'content_images': [{'id': str(i), 'data': f'image-{i}'.encode(), 'description': f'Image {i}'}
+                               for i in range(4)]
+        }
+        with patch.object(poster, '_prepare_taxonomies', AsyncMock(return_value={}), create=True):
+            started = time.perf_counter()
+            post_id = await poster.create_post(content)
+            elapsed = time.perf_counter() - started
+
+        assert post_id == 789
+        assert site.stats['max_in_flight'] == 3
+        # Five uploads three at a time plus the post itself, with no URL lookups
+        assert site.calls.count('wp.uploadFile') == 5
+        assert site.calls[-1] == 'wp.newPost' and len(site.calls) == 6
+        assert elapsed < 0.45
+
+    @pytest.mark.asyncio
+    async def test_images_inserted_with_upload_urls(self, poster):
+        poster, site = poster
+        content = {'content': '<p>Intro</p><h2>One</h2><p>a</p><h2>Two</h2><p>b</p>',
+                   'video': {'embed_code': '<iframe></iframe>'}}
+        uploads = await poster._upload_content_images([
+            {'id': 'a', 'data': b'a', 'description': 'First "photo"'},
+            {'id': 'b', 'data': b'b', 'description': 'Second'}
+        ])
+        html = await poster._prepare_content(content, uploads)
+
+        assert html == (
+            '<p>Intro</p><iframe></iframe>\n<h2>One</h2><p>a</p>'
+            '<figure class="wp-block-image"><img src="https://test.com/uploads/content-a.jpg" '
+            'alt="First &quot;photo&quot;" /></figure>\n<h2>Two</h2><p>b</p>\n'
+            '<figure class="wp-block-image"><img src="https://test.com/uploads/content-b.jpg" alt="Second" /></figure>\n'
+        )
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+# tests/unit/test_wordpress_rest.py
+import pytest
+from src.media_system.image_cache import ImageCache
+from src.wordpress_rest import WordPressRestClient, WordPressRestError
+from tests.fixtures.fake_rest_server import FakeRestServer
+
+class TestWordPressRest:
+    @pytest.fixture
+    async def server(self):
+        server = await FakeRestServer(delay=0.01).start()
+        yield server
+        await server.stop()
+
+    def test_api_url_from_xmlrpc_url(self):
+        client = WordPressRestClient({'url': 'https://example.com/blog/xmlrpc.php', 'username': 'u', 'password': 'p'})
+        assert client.api_url == 'https://example.com/blog/wp-json/wp/v2'
+        client = WordPressRestClient({'url': 'https://example.com/xmlrpc.php', 'username': 'u', 'password': 'p',
+                                      'rest_url': 'https://example.com/?rest_route=/wp/v2/'})
+        assert client.api_url == 'https://example.com/?rest_route=/wp/v2'
+
+    @pytest.mark.asyncio
+    async def test_create_post_keeps_contract(self, server, make_poster, post_content):
+        poster = make_poster(server.url, backend='rest')
+        server.add_term('categories', 'Travel')
+        post_id = await poster.create_post(post_content(categories=['Travel'], tags=['beach', 'summer']))
+
+        assert isinstance(post_id, str)
+        post = server.posts[int(post_id)]
+        assert post['title'] == 'Test Post'
+        assert post['status'] == 'publish'
+        assert post['featured_media'] in server.media
+        assert post['content'].count('/wp-content/uploads/content-') == 2
+        assert post['categories'] == [1]
+        assert [server.terms['tags'][i]['name'] for i in post['tags']] == ['beach', 'summer']
+        # Every request shares the connections of one keep-alive session
+        assert len(server.connections) <= 4 < len(server.requests)
+
+    @pytest.mark.asyncio
+    async def test_upload_streams_cached_file(self, server, make_poster, tmp_path):
+        cache = ImageCache(tmp_path / 'images')
+        image = cache.put('photo', {}, {'id': 'photo', 'data': b'\xff\xd8' + b'x' * 200_000})
+        poster = make_poster(server.url, backend='rest')
+        try:
+            uploaded = await poster.upload_media(image['data'], 'content-photo.jpg', path=image['path'])
+        finally:
+            cache.close()
+
+        item = server.media[int(uploaded['id'])]
+        assert item['bytes'] == 200_002
+        assert item['mime_type'] == 'image/jpeg'
+        assert not item['chunked']
+        assert uploaded['url'].endswith('/content-photo.jpg')
+
+    @pytest.mark.asyncio
+    async def test_missing_media_is_uploaded_again(self, server, make_poster):
+        poster = make_poster(server.url, backend='rest', media_verify_hours='0')
+        poster.media_registry.verify_after = -1
+        first = await poster.upload_media(b'bytes', 'a.jpg')
+        again = await poster.upload_media(b'bytes', 'a.jpg')
+        del server.media[int(first['id'])]
+        replaced = await poster.upload_media(b'bytes', 'a.jpg')
+
+        assert again == {**first, 'reused': True}
+        assert replaced['reused'] is False and replaced['id'] != first['id']
+
+    @pytest.mark.asyncio
+    async def test_existing_term_is_not_duplicated(self, server):
+        server.add_term('tags', 'Beach')
+        client = WordPressRestClient({'url': server.url, 'username': 'test_user', 'password': 'test_pass'})
+        try:
+            ids = [await client.create_term('tags', name) for name in ('beach', 'new')]
+            page = await client.list_terms('tags', 0, 10, newest_first=True)
+        finally:
+            await client.close()
+        assert ids == [1, 2]
+        assert [term['name'] for term in page] == ['new', 'Beach']
+
+    @pytest.mark.asyncio
+    async def test_errors_carry_wordpress_code(self, server):
+        client = WordPressRestClient({'url': server.url, 'username': 'test_user', 'password': 'wrong'})
+        try:
+            with pytest.raises(WordPressRestError) as error:
+                await client.create_post({'title': 'x'})
+        finally:
+            await client.close()
+        assert error.value.status == 401
+        assert error.value.code == 'rest_not_logged_in'
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+# tests/unit/test_xmlrpc_batch.py
+import pytest
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+from wordpress_xmlrpc import Client
+from wordpress_xmlrpc.compat import xmlrpc_client
+from wordpress_xmlrpc.methods import media
+from src.xmlrpc_batch import MulticallBatcher
+from src.xmlrpc_executor import SiteExecutor
+from tests.fixtures.fake_xmlrpc_server import FakeXmlrpcServer
+
+def upload(name, size=10):
+    return media.UploadFile({'name': name, 'type': 'image/jpeg', 'bits': xmlrpc_client.Binary(b'x' * size),
+                             'overwrite': False})
+
+class TestMulticallBatcher:
+    @pytest.fixture
+    def server(self):
+        server = FakeXmlrpcServer(delay=0.02).start()
+        yield server
+        server.stop()
+
+    @pytest.mark.asyncio
+    async def test_publish_takes_two_round_trips(self, server, make_poster, post_content):
+        poster = make_poster(server.url)
+        server.reset_counts()
+        with patch.object(poster, '_prepare_taxonomies', AsyncMock(return_value={}), create=True):
+            post_id = await poster.create_post(post_content(images=3))
+
+        assert server.requests == 2
+        assert server.calls == ['wp.uploadFile'] * 4 + ['wp.newPost']
+        post = server.posts[post_id]
+        assert post['post_thumbnail'] in server.media
+        assert post['post_content'].count('/wp-content/uploads/content-') == 3
+        assert poster.batcher.get_stats() == {'calls': 5, 'round_trips': 2, 'timeouts': 0,
+                                             'multicall_supported': True}
+
+    @pytest.mark.asyncio
+    async def test_servers_without_multicall_get_single_calls(self, make_poster, post_content):
+        server = FakeXmlrpcServer(delay=0.02, multicall=False).start()
+        try:
+            poster = make_poster(server.url)
+            server.reset_counts()
+            with patch.object(poster, '_prepare_taxonomies', AsyncMock(return_value={}), create=True):
+                await poster.create_post(post_content(images=3))
+        finally:
+            server.stop()
+
+        assert not poster.batcher.multicall_supported
+        assert server.requests == 5
+        assert server.peak_in_flight == 4
+
+    @pytest.mark.asyncio
+    async def test_fault_only_fails_its_own_call(self, server):
+        client = Client(server.url, 'test_user', 'test_pass')
+        batcher = MulticallBatcher(SiteExecutor(client))
+        results = await asyncio.gather(
+            batcher.call(upload('a.jpg')),
+            batcher.call(media.GetMediaItem(999)),
+            return_exceptions=True
+        )
+        assert results[0]['file'] == 'a.jpg'
+        assert isinstance(results[1], xmlrpc_client.Fault) and results[1].faultCode == 404
+        assert batcher.round_trips == 1
+
+    @pytest.mark.asyncio
+    async def test_batches_split_by_payload_size(self, server):
+        client = Client(server.url, 'test_user', 'test_pass')
+        batcher = MulticallBatcher(SiteExecutor(client), max_bytes=3000)
+        server.reset_counts()
+        await asyncio.gather(*[batcher.call(upload(f'{i}.jpg', size=1000)) for i in range(4)])
+        # Each upload is about 2.4KB on the wire, so they cannot share a request
+        assert server.requests == 4
+
+    @pytest.mark.asyncio
+    async def test_rejected_multicall_falls_back(self):
+        client = Mock(url='https://test.com/xmlrpc.php', supported_methods=['system.multicall', 'wp.uploadFile'],
+                      blog_id=0, username='u', password='p')
+        client.server.system.multicall.side_effect = xmlrpc_client.Fault(-32601, 'requested method does not exist')
+        client.call.side_effect = lambda method: {'file': method.data['name']}
+        executor = SiteExecutor(client)
+        executor.get_client = lambda: client
+        batcher = MulticallBatcher(executor)
+
+        results = await asyncio.gather(batcher.call(upload('a.jpg')), batcher.call(upload('b.jpg')))
+        assert [r['file'] for r in results] == ['a.jpg', 'b.jpg']
+        assert batcher.multicall_supported is False
+        await batcher.call(upload('c.jpg'))
+        assert client.server.system.multicall.call_count == 1
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+# tests/unit/test_xmlrpc_executor.py
+import pytest
+import asyncio
+import time
+from wordpress_xmlrpc import Client
+from wordpress_xmlrpc.compat import xmlrpc_client
+from wordpress_xmlrpc.methods import media
+from src.xmlrpc_executor import LatencyHistogram, SiteExecutor
+from tests.fixtures.fake_xmlrpc_server import FakeXmlrpcServer
+
+class TestSiteExecutor:
+    @pytest.fixture
+    def server(self):
+        server = FakeXmlrpcServer(delay=0.05).start()
+        server.upload_file(0, '', '', {'name': 'a.jpg', 'type': 'image/jpeg', 'bits': xmlrpc_client.Binary(b'x')})
+        yield server
+        server.stop()
+
+    @pytest.fixture
+    def executor(self, server):
+        executor = SiteExecutor(Client(server.url, 'test_user', 'test_pass'), max_workers=2, timeout=5)
+        yield executor
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_slow_site_does_not_block_event_loop(self, server, executor):
+        server.delay = 0.3
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(tick())
+        await executor.call(media.GetMediaItem(100))
+        ticker.cancel()
+        assert ticks >= 15
+
+    @pytest.mark.asyncio
+    async def test_connections_are_reused(self, server, executor):
+        server.reset_counts()
+        for _ in range(3):
+            await asyncio.gather(*[executor.call(media.GetMediaItem(100)) for _ in range(2)])
+        assert server.requests == 6
+        assert len(server.connections) <= 2
+
+    @pytest.mark.asyncio
+    async def test_call_times_out(self, server, executor):
+        server.delay = 0.5
+        started = time.perf_counter()
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.call(media.GetMediaItem(100), timeout=0.1)
+        assert time.perf_counter() - started < 0.3
+        assert executor.get_stats()['timeouts'] == 1
+
+    @pytest.mark.asyncio
+    async def test_stats_per_method(self, executor):
+        await asyncio.gather(*[executor.call(media.GetMediaItem(100)) for _ in range(4)])
+        with pytest.raises(Exception):
+            await executor.call(media.GetMediaItem(999))
+
+        stats = executor.get_stats()
+        assert stats['site'].startswith('127.0.0.1:')
+        assert stats['calls'] == 5 and stats['errors'] == 1
+        assert stats['in_flight'] == 0 and stats['peak_in_flight'] == 2
+        assert stats['methods']['wp.getMediaItem']['count'] == 5
+        assert stats['latency']['count'] == 5 and stats['latency']['p50'] >= 0.05
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.05, 0.5, 5.0):
+        histogram.observe(seconds)
+    assert histogram.percentile(0.5) == 0.1
+    assert histogram.percentile(0.75) == 1.0
+    assert histogram.percentile(1.0) == float('inf')
+    assert histogram.snapshot()['buckets'] == {'0.1': 2, '1.0': 1, '+Inf': 1}